@@ -0,0 +1,25 @@
+from collections import defaultdict
+from typing import Callable
+
+# Domain events, emitted by the routers after the change has been committed.
+# Subscribers are in-process (caches, memoized counts); they must be cheap and must not raise.
+DOCUMENTS_CHANGED = "documents_changed"  # document_ids: list[str]
+TAGS_CHANGED = "tags_changed"  # document_ids: list[str] (empty when only the tag list changed)
+PERMISSIONS_CHANGED = "permissions_changed"  # document_ids: list[str]
+USERS_CHANGED = "users_changed"  # user_ids: list[str]
+
+_subscribers: dict[str, list[Callable]] = defaultdict(list)
+
+
+def subscribe(*events: str):
+    """Decorator registering a handler called as handler(event, **payload)."""
+    def register(handler: Callable):
+        for event in events:
+            _subscribers[event].append(handler)
+        return handler
+    return register
+
+
+def emit(event: str, **payload):
+    for handler in _subscribers[event]:
+        handler(event, **payload)
@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+from sqlalchemy import delete, event, insert, update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db import engine
+from app.models.jobs import Job
+from app.utils.timestamps import utc_in, utc_now
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 10  # user-facing work
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10  # backfills
+
+PRUNE_INTERVAL_SECONDS = 60 * 60  # how often each worker pool deletes jobs past JOB_RETENTION_SECONDS
+
+# Durable job queue on the jobs table: no broker, every process running a JobWorkerPool takes
+# part. Jobs are enqueued in the caller's transaction (they exist iff the change committed) and
+# claimed with a conditional UPDATE, so two workers never run the same job. Handlers must be
+# idempotent: a worker that dies mid-job leaves it "running" until JOB_LOCK_TIMEOUT_SECONDS,
+# then it is retried.
+_handlers: dict[str, Callable[[dict], None]] = {}
+_wake = threading.Event()
+
+
+def job_handler(kind: str):
+    """Register `handler(payload: dict)` for jobs of `kind`. Raise to fail the attempt."""
+    def register(handler):
+        _handlers[kind] = handler
+        return handler
+    return register
+
+
+# ================================================================================================
+#                                       Enqueueing
+# ================================================================================================
+def enqueue(
+    session: Session,
+    kind: str,
+    payloads: list[dict],
+    priority: int = PRIORITY_NORMAL,
+    max_attempts: Optional[int] = None,
+):
+    """
+    Add one job per payload with a single INSERT, in the session's transaction (doesn't commit).
+    A payload's "document_id", if any, is also stored in its own column for lookups.
+    """
+    if not payloads:
+        return
+    now = utc_now()
+    session.exec(insert(Job), params=[
+        {
+            "kind": kind,
+            "payload": json.dumps(payload),
+            "priority": priority,
+            "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+            "run_after": now,
+            "document_id": payload.get("document_id"),
+            "created_at": now,
+        }
+        for payload in payloads
+    ])
+    # Wake this process's workers once the jobs are visible, instead of at their next poll
+    if not event.contains(session, "after_commit", _wake_workers):
+        event.listen(session, "after_commit", _wake_workers)
+
+
+def _wake_workers(session):
+    _wake.set()
+
+
+# ================================================================================================
+#                                        Running
+# ================================================================================================
+def claim_job(worker: str) -> Optional[Job]:
+    """Mark the most urgent due job as running and return a detached copy, or None."""
+    for _ in range(5):  # lost races with other workers
+        with Session(engine) as session:
+            now = utc_now()
+            candidate = (
+                select(Job.id)
+                .where(Job.status == "queued", Job.run_after <= now)
+                .order_by(Job.priority.desc(), Job.id)
+                .limit(1)
+            )
+            if engine.dialect.name == "postgresql":
+                candidate = candidate.with_for_update(skip_locked=True)
+            job_id = session.exec(candidate).first()
+            if job_id is None:
+                return None
+            claimed = session.exec(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="running", attempts=Job.attempts + 1, locked_by=worker, locked_at=now)
+            ).rowcount
+            session.commit()
+            if claimed:
+                job = session.get(Job, job_id)
+                session.expunge(job)
+                return job
+    return None
+
+
+def run_job(job: Job):
+    """Run a claimed job's handler and record the outcome: done, retry later, or failed."""
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler for job kind {job.kind!r}")
+        handler(json.loads(job.payload))
+    except Exception as exc:
+        logger.warning("Job %s (%s) attempt %s failed: %s", job.id, job.kind, job.attempts, exc)
+        error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+        if job.attempts >= job.max_attempts:
+            _finish(job, status="failed", finished_at=utc_now(), last_error=error)
+        else:
+            _finish(job, status="queued", run_after=utc_in(retry_delay(job.attempts)), last_error=error)
+    else:
+        _finish(job, status="succeeded", finished_at=utc_now(), last_error=None)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, so failing jobs don't retry in lockstep."""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _finish(job: Job, **values):
+    with Session(engine) as session:
+        session.exec(
+            update(Job)
+            .where(Job.id == job.id, Job.locked_by == job.locked_by)
+            .values(locked_by=None, locked_at=None, **values)
+        )
+        session.commit()
+
+
+def requeue_stale_jobs() -> int:
+    """Give jobs whose worker died (running longer than JOB_LOCK_TIMEOUT_SECONDS) back to the queue."""
+    cutoff = utc_in(-settings.JOB_LOCK_TIMEOUT_SECONDS)
+    with Session(engine) as session:
+        stale = (Job.status == "running", Job.locked_at < cutoff)
+        session.exec(
+            update(Job).where(*stale, Job.attempts >= Job.max_attempts)
+            .values(status="failed", finished_at=utc_now(), locked_by=None, locked_at=None,
+                    last_error="Worker stopped responding")
+        )
+        requeued = session.exec(
+            update(Job).where(*stale).values(status="queued", locked_by=None, locked_at=None)
+        ).rowcount
+        session.commit()
+    return requeued
+
+
+def prune_finished_jobs(older_than: Optional[float] = None) -> int:
+    """Delete succeeded and failed jobs finished more than `older_than` (default JOB_RETENTION_SECONDS) ago."""
+    if older_than is None:
+        if not settings.JOB_RETENTION_SECONDS:
+            return 0  # kept forever
+        older_than = settings.JOB_RETENTION_SECONDS
+    with Session(engine) as session:
+        pruned = session.exec(
+            delete(Job).where(Job.status.in_(["succeeded", "failed"]), Job.finished_at < utc_in(-older_than))
+        ).rowcount
+        session.commit()
+    return pruned
+
+
+class JobWorkerPool:
+    """Threads claiming and running jobs until stopped."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._maintenance_lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def start(self):
+        requeue_stale_jobs()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{prefix}:{i}",), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        _wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _work(self, worker: str):
+        idle_polls = 0
+        while not self._stop.is_set():
+            try:
+                self._prune()
+                job = claim_job(worker)
+                if job is not None:
+                    idle_polls = 0
+                    run_job(job)
+                    continue
+                idle_polls += 1
+                if idle_polls % 60 == 0:
+                    requeue_stale_jobs()
+            except Exception:
+                logger.exception("Job worker %s", worker)  # e.g. database unavailable: back off and retry
+            _wake.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+            _wake.clear()
+
+    def _prune(self):
+        """prune_finished_jobs, at most every PRUNE_INTERVAL_SECONDS for the whole pool."""
+        with self._maintenance_lock:
+            if time.monotonic() < self._next_prune:
+                return
+            self._next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+        pruned = prune_finished_jobs()
+        if pruned:
+            logger.info("Pruned %d finished jobs", pruned)
+
+
+def run_pending_jobs() -> int:
+    """Run due jobs in the calling thread until none is left (scripts and checks). Returns the count."""
+    count = 0
+    while (job := claim_job(f"{socket.gethostname()}:{os.getpid()}:inline")) is not None:
+        run_job(job)
+        count += 1
+    return count
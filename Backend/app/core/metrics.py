@@ -0,0 +1,110 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from app.core.config import settings
+
+# Prometheus metrics, served by GET /metrics. With several uvicorn workers each process writes
+# its samples to files in METRICS_MULTIPROC_DIR and /metrics aggregates them, whichever worker
+# answers; prometheus_client reads that location from the environment when it is imported.
+# Empty the directory before (re)starting the server, or old processes' counters are kept.
+if settings.METRICS_MULTIPROC_DIR:
+    os.makedirs(settings.METRICS_MULTIPROC_DIR, exist_ok=True)
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402 (the environment must be set first)
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(12))  # 1 KiB .. 4 GiB
+
+# ================================================================================================
+#                                        HTTP
+# ================================================================================================
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to complete a request, by route template",
+    ["method", "route"], buckets=_LATENCY_BUCKETS,
+)
+REQUESTS = Counter("http_requests_total", "Requests by route template and status", ["method", "route", "status"])
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled (streams and long polls included)",
+    multiprocess_mode="livesum",
+)
+BYTES_RECEIVED = Counter("http_request_body_bytes_total", "Request body bytes read, by route", ["route"])
+BYTES_SENT = Counter("http_response_body_bytes_total", "Response body bytes sent, by route", ["route"])
+UPLOAD_SIZE = Histogram("upload_size_bytes", "Size of each stored upload", buckets=_SIZE_BUCKETS)
+AUTH_FAILURES = Counter("auth_failures_total", "Rejected logins and tokens", ["reason"])
+
+# ================================================================================================
+#                                       Database
+# ================================================================================================
+QUERY_DURATION = Histogram("db_query_duration_seconds", "Time per SQL statement", buckets=_LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements run while handling a request",
+    ["route"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+REQUEST_QUERY_TIME = Histogram(
+    "db_query_seconds_per_request", "Time spent in SQL while handling a request",
+    ["route"], buckets=_LATENCY_BUCKETS,
+)
+DB_CONNECTIONS_IN_USE = Gauge(
+    "db_connections_in_use", "Connections checked out of the pool", multiprocess_mode="livesum"
+)
+
+
+class RequestStats:
+    """Per-request SQL totals. Shared by reference with the threadpool running sync routes."""
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def instrument_engine(engine):
+    """Time every statement and track pool checkouts through SQLAlchemy events."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+        QUERY_DURATION.observe(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+    @event.listens_for(engine, "checkout")
+    def checked_out(dbapi_connection, connection_record, connection_proxy):
+        DB_CONNECTIONS_IN_USE.inc()
+
+    @event.listens_for(engine, "checkin")
+    def checked_in(dbapi_connection, connection_record):
+        DB_CONNECTIONS_IN_USE.dec()
+
+
+def render() -> tuple[bytes, str]:
+    """The exposition text for every process (multiprocess mode) or this one."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def worker_exited(pid: int):
+    """Drop a stopped process's live gauges from the aggregate."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,168 @@
+import random
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core import metrics, profiling
+from app.core.config import settings
+
+
+class MaxBodySizeMiddleware:
+    """
+    Reject request bodies larger than `max_size` before they are read.
+    A declared Content-Length over the limit is refused up front; otherwise bytes are
+    counted as they stream in and the request fails with 413 once the limit is crossed.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_size:
+            response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class MetricsMiddleware:
+    """
+    Request metrics for app.core.metrics: latency, status and body bytes per route template
+    (the matched FastAPI route, so /documents/{doc_id} is one series), in-flight requests, and
+    the SQL statements each request ran. Outermost, so rejected and failed requests count too.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        received = sent = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        metrics.REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.REQUESTS_IN_PROGRESS.dec()
+            metrics.current_request.reset(token)
+            route = scope.get("route")
+            # Unmatched paths share one series, so scanners can't create unbounded label values
+            template = route.path if route is not None else "<unmatched>"
+            method = scope["method"]
+            metrics.REQUEST_LATENCY.labels(method, template).observe(elapsed)
+            metrics.REQUESTS.labels(method, template, str(status)).inc()
+            metrics.REQUEST_QUERIES.labels(template).observe(stats.queries)
+            metrics.REQUEST_QUERY_TIME.labels(template).observe(stats.query_seconds)
+            if received:
+                metrics.BYTES_RECEIVED.labels(template).inc(received)
+            if sent:
+                metrics.BYTES_SENT.labels(template).inc(sent)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests for app.core.profiling: those an admin marks with "X-Profile: 1" (the
+    response then carries X-Profile-Id) and a PROFILE_SAMPLE_RATE share of the rest.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = await self._start_profile(scope)
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+        await self._run_profiled(profile, scope, receive, send)
+
+    async def _start_profile(self, scope: Scope):
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") in (b"1", b"true") and await run_in_threadpool(_is_admin, headers):
+            return profiling.RequestProfile("header")
+        if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+            return profiling.RequestProfile("sample")
+        return None
+
+    async def _run_profiled(self, profile, scope: Scope, receive: Receive, send: Send):
+        status = 500
+
+        async def tagging_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile.trigger == "header":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", profile.id.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = profiling.current_profile.set(profile)
+        try:
+            await self.app(scope, receive, tagging_send)
+        finally:
+            finished = time.perf_counter()
+            profiling.current_profile.reset(token)
+            await run_in_threadpool(profiling.save_profile, profile, scope, status, finished)
+
+
+def _is_admin(headers: dict) -> bool:
+    """Whether the request's bearer token belongs to an admin (an invalid token just isn't one)."""
+    from app.db import engine
+    from app.routers.auth import resolve_principal
+    from app.utils.access_control import is_admin
+    from app.utils.jwt_handler import decode_access_token
+
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    payload = decode_access_token(token) if scheme.lower() == "bearer" else None
+    if not payload or not payload.get("sub"):
+        return False
+    user = resolve_principal(payload, engine)
+    return user is not None and is_admin(user)
@@ -0,0 +1,308 @@
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.utils.timestamps import utc_now
+
+# Request profiling, for finding where a slow request's time goes. A profiled request (an admin
+# sent "X-Profile: 1", or it was sampled at PROFILE_SAMPLE_RATE) records every SQL statement with
+# its timing, parameters and the line of app code that ran it (lazy loads included), and runs its
+# route function under cProfile. Sync routes run on a worker thread, where cProfile has to be
+# enabled, so the routers build their routes with ProfiledRoute, which wraps those functions;
+# async routes share the event loop with other requests and only get the SQL timeline. The
+# result is written to PROFILE_DIR, where any worker serves it (GET /profiles).
+#
+# Independently of profiling, statements slower than SLOW_QUERY_MS are logged to "app.slow_queries".
+PROFILE_DIR = settings.PROFILE_DIR or os.path.join(os.path.abspath(settings.STORAGE_ROOT), "profiles")
+MAX_QUERIES = 5000  # statements kept per profile; the count and total time still cover all of them
+MAX_FUNCTIONS = 60  # rows of the cProfile summary stored in the JSON (the .prof file has everything)
+
+slow_query_log = logging.getLogger("app.slow_queries")
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BACKEND_DIR = os.path.dirname(_APP_DIR)
+_INSTRUMENTATION = {os.path.abspath(__file__), os.path.join(_APP_DIR, "core", "metrics.py")}
+
+
+class RequestProfile:
+    """What one profiled request did. Shared by reference with the threadpool running sync routes."""
+
+    def __init__(self, trigger: str):
+        self.id = uuid.uuid4().hex
+        self.trigger = trigger  # header | sample
+        self.created_at = utc_now()
+        self.started = time.perf_counter()
+        self.queries: list[tuple] = []  # (start, seconds, statement, parameters, origin)
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.profiler: Optional[cProfile.Profile] = None
+        self.endpoint_started: Optional[float] = None
+        self.endpoint_finished: Optional[float] = None
+
+    def run_endpoint(self, call, *args, **kwargs):
+        self.profiler = cProfile.Profile()
+        self.endpoint_started = time.perf_counter()
+        self.profiler.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self.profiler.disable()
+            self.endpoint_finished = time.perf_counter()
+
+    def add_query(self, started: float, seconds: float, statement: str, parameters, executemany: bool):
+        self.query_count += 1
+        self.query_seconds += seconds
+        if len(self.queries) < MAX_QUERIES:
+            parameters = format_parameters(parameters, executemany)
+            self.queries.append((started, seconds, statement, parameters, query_origin()))
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+# ================================================================================================
+#                                        Hooks
+# ================================================================================================
+class ProfiledRoute(APIRoute):
+    """
+    Route class for the routers (`APIRouter(route_class=ProfiledRoute)`). With PROFILING_ENABLED,
+    sync route functions are wrapped so that in profiled requests they run under cProfile on
+    their worker thread; otherwise routes are built unchanged.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if settings.PROFILING_ENABLED and not _is_async(endpoint):
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _is_async(endpoint) -> bool:
+    return inspect.iscoroutinefunction(endpoint) or inspect.isasyncgenfunction(endpoint)
+
+
+def _profiled(endpoint):
+    # functools.wraps keeps the signature and globals FastAPI reads parameters from
+    @functools.wraps(endpoint)
+    def run(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        return profile.run_endpoint(endpoint, *args, **kwargs)
+
+    return run
+
+
+def instrument_engine(engine):
+    """Feed statement timings to the current profile."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["profile_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        finished = time.perf_counter()
+        started = conn.info.pop("profile_started", finished)
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add_query(started - profile.started, finished - started, statement, parameters, executemany)
+
+
+def log_slow_queries(engine, threshold_ms: float):
+    """Log statements taking `threshold_ms` or longer, wherever they run (requests, jobs, scripts)."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["slow_query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        finished = time.perf_counter()
+        seconds = finished - conn.info.pop("slow_query_started", finished)
+        if seconds * 1000 >= threshold_ms:
+            slow_query_log.warning(
+                "Slow query (%.1f ms) at %s: %s | parameters: %s",
+                seconds * 1000, query_origin() or "?", " ".join(statement.split()),
+                format_parameters(parameters, executemany),
+            )
+
+
+def query_origin() -> Optional[str]:
+    """The innermost line of app code on the stack, e.g. "app/routers/documents.py:215 (get_document)"."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and filename not in _INSTRUMENTATION:
+            return f"{os.path.relpath(filename, _BACKEND_DIR)}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return None
+
+
+def format_parameters(parameters, executemany: bool = False, max_rows: int = 3, max_chars: int = 200):
+    """Bound parameters, JSON-friendly and shortened (extracted text and hashes can be long)."""
+    if executemany:
+        rows = [format_parameters(row, max_chars=max_chars) for row in parameters[:max_rows]]
+        return rows + [f"... {len(parameters)} rows"] if len(parameters) > max_rows else rows
+    if isinstance(parameters, dict):
+        return {key: _short(value, max_chars) for key, value in parameters.items()}
+    if isinstance(parameters, (tuple, list)):
+        return [_short(value, max_chars) for value in parameters]
+    return _short(parameters, max_chars)
+
+
+def _short(value, max_chars: int):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= max_chars else f"{text[:max_chars]}... ({len(text)} chars)"
+
+
+# ================================================================================================
+#                                        Storage
+# ================================================================================================
+def save_profile(profile: RequestProfile, scope: dict, status: int, finished: float) -> str:
+    """Write the profile (JSON summary and, for sync routes, a .prof file) and prune old ones."""
+    route = scope.get("route")
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    endpoint_sql = sum(
+        seconds for start, seconds, *_ in profile.queries
+        if profile.endpoint_started is not None
+        and profile.endpoint_started <= profile.started + start <= profile.endpoint_finished
+    )
+    timing = {"total": ms(finished - profile.started), "sql": ms(profile.query_seconds)}
+    if profile.endpoint_started is not None:
+        timing.update(
+            # Body parsing, authentication and other dependencies
+            before_endpoint=ms(profile.endpoint_started - profile.started),
+            endpoint=ms(profile.endpoint_finished - profile.endpoint_started),
+            endpoint_sql=ms(endpoint_sql),
+            # Response validation and serialization, streamed and file bodies, sending
+            after_endpoint=ms(finished - profile.endpoint_finished),
+        )
+
+    statements: dict[str, list] = {}  # repeated statements (N+1 queries) stand out here
+    for _, seconds, statement, _, _ in profile.queries:
+        entry = statements.setdefault(statement, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    document = {
+        "id": profile.id,
+        "created_at": profile.created_at,
+        "trigger": profile.trigger,
+        "method": scope["method"],
+        "path": scope["path"],
+        "query_string": scope.get("query_string", b"").decode("latin-1"),
+        "route": route.path if route is not None else None,
+        "status": status,
+        "query_count": profile.query_count,
+        "timing_ms": timing,
+        "statements": [
+            {"statement": statement, "count": count, "total_ms": ms(seconds)}
+            for statement, (count, seconds) in sorted(statements.items(), key=lambda item: -item[1][1])
+        ],
+        "queries": [
+            {"start_ms": ms(start), "duration_ms": ms(seconds), "statement": statement,
+             "parameters": parameters, "origin": origin}
+            for start, seconds, statement, parameters, origin in profile.queries
+        ],
+        "functions": _function_summary(profile.profiler) if profile.profiler else [],
+    }
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if profile.profiler is not None:
+        profile.profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile.id}.prof"))
+    _write_atomic(os.path.join(PROFILE_DIR, f"{profile.id}.json"), json.dumps(document, default=str))
+    prune_profiles(settings.PROFILE_MAX_KEPT)
+    return profile.id
+
+
+def _function_summary(profiler: cProfile.Profile) -> list[dict]:
+    """The functions with the most cumulative time, as in `pstats ... sort_stats("cumulative")`."""
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: -item[1][3])[:MAX_FUNCTIONS]
+    summary = []
+    for (filename, line, name), (primitive_calls, calls, own, cumulative, _) in rows:
+        if filename.startswith(_BACKEND_DIR):
+            filename = os.path.relpath(filename, _BACKEND_DIR)
+        summary.append({
+            "function": f"{filename}:{line}({name})" if line else name,
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        })
+    return summary
+
+
+def _write_atomic(path: str, text: str):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "w") as out:
+            out.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _profile_files() -> list[tuple[float, str]]:
+    """(mtime, id) of every stored profile, newest first."""
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    found = []
+    for name in names:
+        if name.endswith(".json"):
+            try:
+                found.append((os.path.getmtime(os.path.join(PROFILE_DIR, name)), name[:-5]))
+            except FileNotFoundError:
+                continue
+    return sorted(found, reverse=True)
+
+
+def prune_profiles(keep: int):
+    for _, profile_id in _profile_files()[keep:]:
+        for ext in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+def profile_path(profile_id: str, ext: str) -> Optional[str]:
+    """Path of a stored profile file, or None if there's none (ids are checked, not trusted)."""
+    if len(profile_id) != 32 or any(c not in "0123456789abcdef" for c in profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, profile_id + ext)
+    return path if os.path.exists(path) else None
+
+
+def list_profiles(limit: int) -> list[dict]:
+    """Summaries of the newest profiles (without the query timeline and function table)."""
+    summaries = []
+    for _, profile_id in _profile_files()[:limit]:
+        try:
+            with open(os.path.join(PROFILE_DIR, profile_id + ".json")) as f:
+                document = json.load(f)
+        except (FileNotFoundError, ValueError):  # pruned or being replaced meanwhile
+            continue
+        for key in ("statements", "queries", "functions"):
+            document.pop(key, None)
+        document["has_pstats"] = os.path.exists(os.path.join(PROFILE_DIR, profile_id + ".prof"))
+        summaries.append(document)
+    return summaries
@@ -0,0 +1,368 @@
+"""
+Offline bulk import / export of the whole repository, for moving data between environments.
+
+    cd Backend
+    python -m app.db.bulk_transfer import ~/share --uploader admin@example.com --tags-from-dirs
+    python -m app.db.bulk_transfer import manifest.csv --uploader admin@example.com
+    python -m app.db.bulk_transfer export repository.tar.gz        # .tar, .tar.gz or .zip
+
+Import sources:
+  directory   one document per file, titled after the file name
+  .csv        columns path,title,description,access_level,tags,uploader (tags separated by ";")
+  .jsonl      one document per line: flat like the CSV, or as written by export:
+              {"id", "title", "description", "access_level", "uploader", "created_at", "tags": [...],
+               "versions": [{"path", "version_number", "uploaded_at", "uploaded_by"}]}
+Paths in a manifest are relative to the manifest. To import an export, extract the archive and
+import its manifest.jsonl.
+
+Files are hashed and copied into the blob store by a process pool and rows are written with
+executemany, one transaction per --chunk-size documents. Progress is checkpointed after each
+committed chunk, so re-running an interrupted import resumes where it stopped. Document ids
+are derived from the source, so a chunk that committed right before a crash is skipped, not
+duplicated.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+from sqlmodel import Session, select
+
+from app.core.events import emit, DOCUMENTS_CHANGED
+from app.db import engine
+from app.db.session import init_db
+from app.models import Document, DocumentVersion, DocumentTagLink, Tag, User
+from app.utils.bulk_ingest import ensure_tags, insert_documents
+from app.utils.file_handler import PendingBlob, pending_blobs, resolve_path, store_blob
+from app.utils.response_cache import response_cache  # noqa: F401 (subscribes to DOCUMENTS_CHANGED)
+from app.utils.timestamps import utc_now
+
+IMPORT_NAMESPACE = uuid.UUID("6f1c8a52-4a0e-4f57-9d0c-3f0f4f1e2b7d")
+MANIFEST_NAME = "manifest.jsonl"
+
+
+# ================================================================================================
+#                                        Sources
+# ================================================================================================
+def read_source(source: str, tags_from_dirs: bool = False) -> Iterator[dict]:
+    """Documents to import, in a stable order (resuming relies on it)."""
+    if os.path.isdir(source):
+        return _directory_items(source, tags_from_dirs)
+    if source.endswith(".csv"):
+        return _csv_items(source)
+    if source.endswith(".jsonl"):
+        return _jsonl_items(source)
+    raise SystemExit(f"Unsupported source {source!r}: expected a directory, .csv or .jsonl")
+
+
+def _directory_items(root: str, tags_from_dirs: bool) -> Iterator[dict]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            relative = os.path.relpath(path, root)
+            yield {
+                "key": relative,
+                "title": os.path.splitext(name)[0],
+                "tags": relative.split(os.sep)[:-1] if tags_from_dirs else [],
+                "versions": [{"path": path}],
+            }
+
+
+def _csv_items(manifest: str) -> Iterator[dict]:
+    with open(manifest, newline="") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            yield _manifest_item(row, os.path.dirname(os.path.abspath(manifest)), line)
+
+
+def _jsonl_items(manifest: str) -> Iterator[dict]:
+    with open(manifest) as f:
+        for number, line in enumerate(f, start=1):
+            if line.strip():
+                yield _manifest_item(json.loads(line), os.path.dirname(os.path.abspath(manifest)), number)
+
+
+def _manifest_item(entry: dict, base: str, line: int) -> dict:
+    versions = entry.get("versions") or [{"path": entry.get("path")}]
+    for ver in versions:
+        ver["path"] = os.path.join(base, ver["path"]) if ver.get("path") else None
+    tags = entry.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(";")
+    return {
+        "key": entry.get("id") or f"line {line}",
+        "id": entry.get("id") or None,
+        "title": entry.get("title") or os.path.splitext(os.path.basename(versions[0]["path"] or ""))[0],
+        "description": entry.get("description") or "",
+        "access_level": entry.get("access_level") or "public",
+        "uploader": entry.get("uploader") or None,
+        "created_at": entry.get("created_at") or None,
+        "tags": tags,
+        "versions": versions,
+    }
+
+
+# ================================================================================================
+#                                         Import
+# ================================================================================================
+def _store_file(path: Optional[str]):
+    """Runs in a worker process: the stored blob, or why the file couldn't be stored."""
+    if not path:
+        return "no path given"
+    try:
+        with open(path, "rb") as src:
+            return store_blob(src, os.path.splitext(path)[1])
+    except OSError as exc:
+        return f"{os.path.basename(path)}: {exc.strerror or exc}"
+
+
+def _load_checkpoint(path: str, source: str) -> int:
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return 0
+    if checkpoint.get("source") != source:
+        raise SystemExit(f"Checkpoint {path} belongs to {checkpoint.get('source')!r}; pass another --checkpoint")
+    return checkpoint["done"]
+
+
+def _save_checkpoint(path: str, source: str, done: int):
+    with open(path + ".tmp", "w") as f:
+        json.dump({"source": source, "done": done}, f)
+    os.replace(path + ".tmp", path)
+
+
+def import_repository(
+    source: str,
+    uploader: str,
+    chunk_size: int = 1000,
+    workers: Optional[int] = None,
+    tags_from_dirs: bool = False,
+    checkpoint: Optional[str] = None,
+):
+    source = os.path.abspath(source)
+    checkpoint = checkpoint or f"import-{os.path.basename(source.rstrip(os.sep))}.checkpoint.json"
+    init_db()
+    done = _load_checkpoint(checkpoint, source)
+    if done:
+        print(f"Resuming after {done} documents ({checkpoint})")
+    items = itertools.islice(read_source(source, tags_from_dirs), done, None)
+    created = skipped = failed = 0
+    start = time.perf_counter()
+
+    with Session(engine) as session, ProcessPoolExecutor(workers) as pool:
+        user_ids = dict(session.exec(select(User.email, User.id)).all())
+        if uploader not in user_ids:
+            raise SystemExit(f"Unknown uploader {uploader!r}")
+
+        while chunk := list(itertools.islice(items, chunk_size)):
+            for item in chunk:
+                item["id"] = item.get("id") or str(uuid.uuid5(IMPORT_NAMESPACE, f"{source}\0{item['key']}"))
+            existing = set(session.exec(select(Document.id).where(Document.id.in_([i["id"] for i in chunk]))).all())
+            todo = [item for item in chunk if item["id"] not in existing]
+            skipped += len(chunk) - len(todo)
+
+            paths = [ver["path"] for item in todo for ver in item["versions"]]
+            outcomes = iter(pool.map(_store_file, paths, chunksize=16))
+            documents, versions, links, blobs, tagged = [], [], [], [], []
+            for item in todo:
+                stored = [next(outcomes) for _ in item["versions"]]
+                error = next((outcome for outcome in stored if not isinstance(outcome, PendingBlob)), None)
+                error = error or _unknown_users(item, user_ids)
+                if error:
+                    for blob in stored:
+                        if isinstance(blob, PendingBlob):
+                            blob.discard(session)
+                    failed += 1
+                    print(f"  skipped {item['key']}: {error}", file=sys.stderr)
+                    continue
+                blobs.extend(stored)
+                _build_rows(item, stored, user_ids[item.get("uploader") or uploader], user_ids,
+                            documents, versions)
+                tagged.append(item)
+
+            names = {name.strip() for item in tagged for name in item["tags"] if name.strip()}
+            tag_ids = ensure_tags(session, names)
+            for item in tagged:
+                links.extend(
+                    {"document_id": item["id"], "tag_id": tag_ids[name]}
+                    for name in sorted({name.strip() for name in item["tags"] if name.strip()})
+                )
+            with pending_blobs(session, blobs):
+                insert_documents(session, documents, versions, links)
+                session.commit()
+            # Reaches running servers only when they share the response cache (RESPONSE_CACHE_URL)
+            emit(DOCUMENTS_CHANGED, document_ids=[doc["id"] for doc in documents])
+            created += len(documents)
+            done += len(chunk)
+            _save_checkpoint(checkpoint, source, done)
+            rate = created / (time.perf_counter() - start)
+            print(f"{done} read, {created} created, {skipped} already present, {failed} failed ({rate:.0f} docs/s)")
+
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    print(f"Import complete: {created} created, {skipped} already present, {failed} failed")
+
+
+def _unknown_users(item: dict, user_ids: dict) -> Optional[str]:
+    emails = {item.get("uploader"), *(ver.get("uploaded_by") for ver in item["versions"])} - {None}
+    unknown = sorted(emails - user_ids.keys())
+    return f"unknown user {', '.join(unknown)}" if unknown else None
+
+
+def _build_rows(item: dict, stored: list[PendingBlob], uploader_id: str, user_ids: dict,
+                documents: list, versions: list):
+    created_at = item.get("created_at") or utc_now()
+    documents.append({
+        "id": item["id"],
+        "title": item["title"] or "Untitled",
+        "description": item.get("description", ""),
+        "access_level": item.get("access_level", "public"),
+        "file_path": stored[0].path,
+        "uploader_id": uploader_id,
+        "created_at": created_at,
+    })
+    for number, (ver, blob) in enumerate(zip(item["versions"], stored), start=1):
+        version_number = ver.get("version_number") or number
+        versions.append({
+            "id": str(uuid.uuid5(IMPORT_NAMESPACE, f"{item['id']}\0{version_number}")),
+            "document_id": item["id"],
+            "version_number": version_number,
+            "file_path": blob.path,
+            "uploaded_by": user_ids[ver["uploaded_by"]] if ver.get("uploaded_by") else uploader_id,
+            "uploaded_at": ver.get("uploaded_at") or created_at,
+        })
+
+
+# ================================================================================================
+#                                         Export
+# ================================================================================================
+class _ArchiveWriter:
+    """Minimal common interface over streaming tar (optionally gzipped) and zip output."""
+
+    def __init__(self, path: str):
+        if path.endswith(".zip"):
+            self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True)
+            self._tar = None
+        elif path.endswith((".tar", ".tar.gz", ".tgz")):
+            self._tar = tarfile.open(path, "w|gz" if path.endswith(("gz", "tgz")) else "w|")
+            self._zip = None
+        else:
+            raise SystemExit(f"Unsupported archive {path!r}: expected .tar, .tar.gz or .zip")
+
+    def add(self, file_path: str, member: str):
+        if self._zip is not None:
+            self._zip.write(file_path, member)
+        else:
+            self._tar.add(file_path, member, recursive=False)
+
+    def close(self):
+        (self._zip or self._tar).close()
+
+
+def export_repository(archive_path: str, batch_size: int = 1000):
+    """Stream every document's files plus manifest.jsonl (written last) into `archive_path`."""
+    written = set()
+    exported = missing = 0
+    archive = _ArchiveWriter(archive_path)
+    with Session(engine) as session, tempfile.NamedTemporaryFile("w+", suffix=".jsonl") as manifest:
+        emails = dict(session.exec(select(User.id, User.email)).all())
+        documents = session.exec(
+            select(Document).order_by(Document.created_at, Document.id).execution_options(yield_per=batch_size)
+        )
+        for batch in documents.partitions():
+            ids = [doc.id for doc in batch]
+            versions = {}
+            for ver in session.exec(
+                select(DocumentVersion).where(DocumentVersion.document_id.in_(ids)).order_by(DocumentVersion.version_number)
+            ):
+                versions.setdefault(ver.document_id, []).append(ver)
+            tags = {}
+            for document_id, name in session.exec(
+                select(DocumentTagLink.document_id, Tag.name)
+                .join(Tag, Tag.id == DocumentTagLink.tag_id)
+                .where(DocumentTagLink.document_id.in_(ids))
+            ):
+                tags.setdefault(document_id, []).append(name)
+
+            for doc in batch:
+                entries = []
+                for ver in versions.get(doc.id) or []:
+                    member = f"files/{ver.file_path}"
+                    if member not in written:
+                        if not os.path.isfile(resolve_path(ver.file_path)):
+                            missing += 1
+                            print(f"  missing file {ver.file_path} (document {doc.id})", file=sys.stderr)
+                            continue
+                        archive.add(resolve_path(ver.file_path), member)
+                        written.add(member)
+                    entries.append({
+                        "path": member,
+                        "version_number": ver.version_number,
+                        "uploaded_at": ver.uploaded_at,
+                        "uploaded_by": emails.get(ver.uploaded_by),
+                    })
+                if not entries:
+                    continue
+                manifest.write(json.dumps({
+                    "id": doc.id,
+                    "title": doc.title,
+                    "description": doc.description,
+                    "access_level": doc.access_level,
+                    "uploader": emails.get(doc.uploader_id),
+                    "created_at": doc.created_at,
+                    "tags": sorted(tags.get(doc.id, [])),
+                    "versions": entries,
+                }) + "\n")
+                exported += 1
+            # Keep memory flat across millions of rows. Per object: expunge_all() would also detach
+            # the rows the yield_per result is still streaming.
+            for obj in itertools.chain(batch, *versions.values()):
+                session.expunge(obj)
+
+        manifest.flush()
+        archive.add(manifest.name, MANIFEST_NAME)
+    archive.close()
+    print(f"Exported {exported} documents ({len(written)} files, {missing} missing) to {archive_path}")
+
+
+# ================================================================================================
+#                                          CLI
+# ================================================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import / export of the document repository.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="import a directory tree or a CSV / JSONL manifest")
+    importer.add_argument("source")
+    importer.add_argument("--uploader", required=True, help="email of the user owning documents without one")
+    importer.add_argument("--chunk-size", type=int, default=1000, help="documents per transaction")
+    importer.add_argument("--workers", type=int, default=None, help="hashing/copying processes (default: CPUs)")
+    importer.add_argument("--tags-from-dirs", action="store_true", help="tag files with their directory names")
+    importer.add_argument("--checkpoint", help="progress file (default: import-<source name>.checkpoint.json)")
+
+    exporter = commands.add_parser("export", help="export everything to a .tar, .tar.gz or .zip archive")
+    exporter.add_argument("archive")
+    exporter.add_argument("--batch-size", type=int, default=1000, help="documents fetched per query")
+
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        import_repository(
+            args.source, args.uploader, args.chunk_size, args.workers, args.tags_from_dirs, args.checkpoint
+        )
+    else:
+        export_repository(args.archive, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Run background jobs outside the web processes, e.g. with JOB_WORKERS=0 on the API servers.
+
+    cd Backend
+    python -m app.db.jobs work --workers 4     # until interrupted
+    python -m app.db.jobs drain                # run what is due now, then exit
+    python -m app.db.jobs prune --days 1       # delete finished jobs older than that (default JOB_RETENTION_SECONDS)
+"""
+import argparse
+import sys
+import time
+
+from app.core.jobs import JobWorkerPool, prune_finished_jobs, requeue_stale_jobs, run_pending_jobs
+from app.db.session import init_db
+import app.utils.post_upload  # noqa: F401 (registers the post-upload job handlers)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run queued background jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("work", help="run a worker pool until interrupted")
+    worker.add_argument("--workers", type=int, default=4)
+    commands.add_parser("drain", help="run due jobs in this process until none is left")
+    pruner = commands.add_parser("prune", help="delete succeeded and failed jobs past their retention")
+    pruner.add_argument("--days", type=float, help="age in days (default JOB_RETENTION_SECONDS)")
+
+    args = parser.parse_args(argv)
+    init_db()
+    if args.command == "drain":
+        requeue_stale_jobs()
+        print(f"Ran {run_pending_jobs()} jobs")
+        return 0
+    if args.command == "prune":
+        older_than = args.days * 24 * 60 * 60 if args.days is not None else None
+        print(f"Deleted {prune_finished_jobs(older_than)} finished jobs")
+        return 0
+
+    pool = JobWorkerPool(args.workers)
+    pool.start()
+    print(f"{args.workers} job workers running, Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
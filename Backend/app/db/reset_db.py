@@ -1,11 +1,18 @@
+from sqlalchemy import text
+
 from app.db import engine
+from app.db.session import init_db
 from app.models import *
+from app.utils.search_index import search_metadata
 from sqlmodel import SQLModel
 
 print("Dropping all tables...")
+search_metadata.drop_all(engine)
 SQLModel.metadata.drop_all(engine)
+with engine.begin() as connection:
+    connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
 
-print("Creating all tables...")
-SQLModel.metadata.create_all(engine)
+print("Running migrations...")
+init_db()
 
 print("Database reset complete.")
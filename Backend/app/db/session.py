@@ -1,13 +1,78 @@
-from sqlmodel import SQLModel, create_engine, Session
+import os
 
-sqlite_file_name = "database.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlmodel import create_engine, Session
+
+from app.core.config import settings
+
+
+def _engine_options(url) -> dict:
+    options = {"echo": settings.DATABASE_ECHO, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    in_memory = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+    if not in_memory:
+        # In-memory SQLite uses a single shared connection; pool sizing doesn't apply
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+    if url.get_backend_name() == "sqlite":
+        # Sync routes run on the threadpool, so connections move between threads
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def _configure_sqlite(dbapi_connection, _connection_record):
+    """Per-connection pragmas: WAL lets readers run alongside a writer, busy_timeout waits out locks."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE_BYTES)}")
+    cursor.close()
+
+
+database_url = make_url(settings.DATABASE_URL)
+engine = create_engine(database_url, **_engine_options(database_url))
+if database_url.get_backend_name() == "sqlite":
+    event.listen(engine, "connect", _configure_sqlite)
+if settings.METRICS_ENABLED:
+    from app.core.metrics import instrument_engine
+    instrument_engine(engine)
+if settings.PROFILING_ENABLED:
+    from app.core.profiling import instrument_engine as instrument_profiles
+    instrument_profiles(engine)
+if settings.SLOW_QUERY_MS:
+    from app.core.profiling import log_slow_queries
+    log_slow_queries(engine, settings.SLOW_QUERY_MS)
+
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BASELINE_REVISION = "0001"
+
+
+def alembic_config() -> Config:
+    """Alembic config usable from any working directory (uvicorn, scripts, benchmarks)."""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["configure_logging"] = False  # keep the server's logging setup
+    return config
 
-engine = create_engine(sqlite_url, echo=True)
 
 def init_db():
-    from app import models
-    SQLModel.metadata.create_all(engine)
+    """Apply pending migrations and make sure the full-text index exists."""
+    from app.utils.search_index import create_search_index
+    config = alembic_config()
+    tables = inspect(engine).get_table_names()
+    if "documents" in tables and "alembic_version" not in tables:
+        # Created by SQLModel.metadata.create_all before migrations existed
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+    create_search_index(engine)
 
 def get_session():
     with Session(engine) as session:
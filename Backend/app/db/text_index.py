@@ -0,0 +1,145 @@
+"""
+Extract the text of existing versions for field=content search, e.g. after upgrading, after
+installing pypdf, or after raising TEXT_EXTRACTION_MAX_CHARS (run `reset` first).
+
+    cd Backend
+    python -m app.db.text_index backfill --processes 8
+    python -m app.db.text_index status
+    python -m app.db.text_index reset
+
+`backfill` only handles versions that have no text yet, so it can be interrupted and rerun, and
+runs safely next to the job workers. Files are parsed in a process pool (extraction is CPU bound);
+this process writes the results, one transaction per batch.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import case, delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, func
+
+from app.db import engine
+from app.db.session import init_db
+from app.models import DocumentVersion, Job, VersionText
+from app.utils.file_handler import resolve_path
+from app.utils.search_index import supports_full_text, version_text_fts
+from app.utils.text_extraction import extract_text, prune_version_texts, reuse_version_text, store_version_texts
+
+
+def _extract_file(file_path: str):
+    """Runs in a pool process. Returns (ExtractedText, None) or (None, error)."""
+    try:
+        return extract_text(resolve_path(file_path)), None
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+def backfill(processes: int, batch_size: int) -> int:
+    with Session(engine) as session:
+        pruned = prune_version_texts(session)
+        session.commit()
+        pending = session.exec(
+            select(DocumentVersion.id, DocumentVersion.document_id, DocumentVersion.file_path)
+            .outerjoin(VersionText, VersionText.version_id == DocumentVersion.id)
+            .where(VersionText.version_id.is_(None))
+            .order_by(DocumentVersion.uploaded_at.desc())  # newest first: the likeliest to be searched
+        ).mappings().all()
+    # Versions sharing a blob are extracted once
+    by_file: dict[str, list[dict]] = {}
+    for version in pending:
+        by_file.setdefault(version["file_path"], []).append(dict(version))
+    files = list(by_file)
+    print(f"{len(pending)} versions ({len(files)} files) without text, {pruned} orphaned texts removed")
+
+    done = failed = 0
+    with ProcessPoolExecutor(processes) as pool:
+        for start in range(0, len(files), batch_size):
+            batch = files[start:start + batch_size]
+            with Session(engine) as session:
+                extracted_before = set(session.exec(
+                    select(VersionText.file_path).where(VersionText.file_path.in_(batch))
+                ).all())
+            to_extract = [file_path for file_path in batch if file_path not in extracted_before]
+            results = []
+            for file_path, (extracted, error) in zip(to_extract, pool.map(_extract_file, to_extract)):
+                if error:
+                    failed += 1
+                    print(f"  {file_path}: {error}")
+                    continue
+                results.extend((version, extracted) for version in by_file[file_path])
+            reused = [version for file_path in extracted_before for version in by_file[file_path]]
+            _write(reused, results)
+            done += len(batch)
+            print(f"  {done}/{len(files)} files")
+    print(f"Done: {len(files) - failed} files indexed" + (f", {failed} failed (still pending, rerun to retry)" if failed else ""))
+    return 1 if failed else 0
+
+
+def _write(reused: list[dict], results: list):
+    """Store one batch in one transaction, skipping versions a job worker indexed meanwhile."""
+    for _ in range(3):
+        with Session(engine) as session:
+            ids = [version["id"] for version in reused] + [version["id"] for version, _ in results]
+            indexed = set(session.exec(select(VersionText.version_id).where(VersionText.version_id.in_(ids))).all())
+            for version in reused:
+                if version["id"] not in indexed:
+                    reuse_version_text(session, version)
+            store_version_texts(session, [(version, text) for version, text in results if version["id"] not in indexed])
+            try:
+                session.commit()
+                return
+            except IntegrityError:
+                session.rollback()  # a worker got to one of them first; look again
+    raise RuntimeError("Batch keeps conflicting with the job workers")
+
+
+def status():
+    with Session(engine) as session:
+        versions = session.exec(select(func.count()).select_from(DocumentVersion)).one()
+        rows = session.exec(
+            select(VersionText.extractor, func.count(), func.sum(VersionText.characters), func.sum(case((VersionText.truncated, 1), else_=0)))
+            .group_by(VersionText.extractor)
+        ).all()
+        failed_jobs = session.exec(
+            select(func.count()).select_from(Job).where(Job.kind == "text.extract", Job.status == "failed")
+        ).one()
+    extracted = sum(count for _, count, _, _ in rows)
+    print(f"{versions} versions: {extracted} with text, {versions - extracted} pending, "
+          f"{failed_jobs} failed text.extract jobs")
+    for extractor, count, characters, truncated in rows:
+        print(f"  {extractor:<6} {count:>8} versions {characters or 0:>14} characters {truncated or 0:>6} truncated")
+
+
+def reset():
+    with Session(engine) as session:
+        if supports_full_text(engine):
+            session.exec(delete(version_text_fts))
+        session.exec(delete(VersionText))
+        session.commit()
+    print("Removed all extracted text; run backfill to extract it again")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the extracted text behind field=content search.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    filler = commands.add_parser("backfill", help="extract the text of every version that has none yet")
+    filler.add_argument("--processes", type=int, default=os.cpu_count(), help="extraction processes")
+    filler.add_argument("--batch-size", type=int, default=200, help="files written per transaction")
+    commands.add_parser("status", help="count versions with and without text")
+    commands.add_parser("reset", help="forget all extracted text")
+
+    args = parser.parse_args(argv)
+    init_db()
+    if args.command == "backfill":
+        return backfill(args.processes, args.batch_size)
+    if args.command == "status":
+        status()
+    else:
+        reset()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Rebuild or verify the materialized document_visibility table (see MATERIALIZED_ACL).
+
+    cd Backend
+    python -m app.db.visibility rebuild
+    python -m app.db.visibility check --users 50
+
+`check` compares the table with a fresh computation row by row, then replays the Python rules
+(`can_access_document`) for every document and a sample of non-admin users and compares the
+result with what the table lets them see. The second part runs a few queries per document and
+user, so keep the sample small on large corpora. Exits with status 1 on any difference.
+"""
+import argparse
+import sys
+
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, select, func
+
+from app.db import engine
+from app.db.session import init_db
+from app.models import Document, DocumentVisibility, User
+from app.utils.access_control import can_access_document, is_admin
+from app.utils.visibility_index import materialized_visibility_clause, rebuild_visibility, visibility_rows
+
+
+def rebuild():
+    with Session(engine) as session:
+        rebuild_visibility(session)
+        session.commit()
+        total = session.exec(select(func.count()).select_from(DocumentVisibility)).one()
+    print(f"Rebuilt document_visibility: {total} rows")
+
+
+def check_rows(session: Session) -> int:
+    expected = set(session.exec(visibility_rows()).all())
+    actual = set(session.exec(select(DocumentVisibility.document_id, DocumentVisibility.principal)).all())
+    missing, extra = expected - actual, actual - expected
+    for label, rows in (("missing", missing), ("extra", extra)):
+        for document_id, principal in sorted(rows)[:20]:
+            print(f"  {label}: {document_id} {principal}")
+    print(f"{'FAIL' if missing or extra else 'ok':<4} rows: {len(actual)} stored, {len(missing)} missing, {len(extra)} extra")
+    return len(missing) + len(extra)
+
+
+def check_rules(session: Session, user_limit: int) -> int:
+    # Admins bypass the table
+    users = session.exec(select(User).order_by(User.id).options(joinedload(User.role))).all()
+    users = [user for user in users if not is_admin(user)][:user_limit]
+    documents = session.exec(select(Document).options(joinedload(Document.uploader))).all()
+    failures = 0
+    for user in users:
+        visible = set(session.exec(select(Document.id).where(materialized_visibility_clause(user))).all())
+        allowed = {doc.id for doc in documents if can_access_document(user, doc, session)}
+        if visible != allowed:
+            failures += 1
+            print(f"  {user.email}: {len(allowed - visible)} hidden, {len(visible - allowed)} exposed")
+    print(f"{'FAIL' if failures else 'ok':<4} rules: {len(users)} users x {len(documents)} documents, {failures} differ")
+    return failures
+
+
+def check(user_limit: int) -> int:
+    with Session(engine) as session:
+        failures = check_rows(session) + check_rules(session, user_limit)
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the materialized document_visibility table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="recompute every row from documents and permissions")
+    checker = commands.add_parser("check", help="compare the table with the access rules")
+    checker.add_argument("--users", type=int, default=20, help="non-admin users to replay the rules for")
+
+    args = parser.parse_args(argv)
+    init_db()
+    if args.command == "rebuild":
+        rebuild()
+        return 0
+    return check(args.users)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
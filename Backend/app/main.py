@@ -2,8 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
+import anyio
+from app.core.config import settings
+from app.core import metrics
+from app.core.middleware import MaxBodySizeMiddleware, MetricsMiddleware, ProfilingMiddleware
+from app.core.jobs import JobWorkerPool
 from app.db.session import init_db
-from app.routers import auth, users, roles, departments, documents, versions, tags, permissions
+from app.routers import (
+    auth, users, roles, departments, documents, versions, tags, permissions, cache, changes, jobs, profiles,
+    metrics as metrics_router,
+)
 
 app = FastAPI(title="Document Management System (POC)")
 
@@ -21,6 +29,19 @@ app.add_middleware(
     allow_headers=["*"],    # allow all headers
 )
 
+# Refuse oversized uploads before they are read (slack covers multipart headers and form fields)
+app.add_middleware(MaxBodySizeMiddleware, max_size=settings.MAX_UPLOAD_SIZE_BYTES + 1024 * 1024)
+
+# Request profiles (GET /profiles)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profiles.router)
+
+# Prometheus metrics at /metrics; added last so it wraps everything else
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router.router)
+
 # Routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -30,10 +51,39 @@ app.include_router(departments.router)
 # app.include_router(versions.router)
 app.include_router(permissions.router)
 app.include_router(tags.router)
+app.include_router(cache.router)
+app.include_router(changes.router)
+app.include_router(jobs.router)
+
 
 @app.on_event("startup")
 def on_startup():
     init_db()
 
+
+# Post-upload processing and other background jobs (see app.core.jobs)
+job_workers = JobWorkerPool(settings.JOB_WORKERS)
+
+
+@app.on_event("startup")
+def start_job_workers():
+    job_workers.start()
+
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    job_workers.stop()
+
+
+@app.on_event("shutdown")
+def remove_worker_metrics():
+    metrics.worker_exited(os.getpid())
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    # Every sync route, dependency and file write runs on this pool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
 DOCUMENTS_DIR = os.path.join(os.path.dirname(__file__), "..", "Documents")
 app.mount("/Documents", StaticFiles(directory=DOCUMENTS_DIR), name="documents")
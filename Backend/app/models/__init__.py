@@ -2,5 +2,9 @@ from .users import User
 from .roles import Role
 from .departments import Department
 from .documents import Document, DocumentVersion
-from .permissions import DocumentUserPermission, DocumentDepartmentPermission
+from .permissions import DocumentUserPermission, DocumentDepartmentPermission, DocumentVisibility
 from .tags import Tag, DocumentTagLink
+from .changes import DocumentChange, DeletedDocumentVisibility
+from .jobs import Job
+from .texts import VersionText
+from .refresh_tokens import RefreshToken
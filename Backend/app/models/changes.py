@@ -0,0 +1,25 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class DocumentChange(SQLModel, table=True):
+    """Append-only change log behind GET /changes, written in the same transaction as the change."""
+    __tablename__ = "document_changes"
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse a sequence number
+
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    document_id: str = Field(index=True)  # no foreign key: deletions are logged too
+    kind: str  # created | updated | deleted | version_added | version_deleted | tags_changed | permissions_changed
+    changed_at: str
+    changed_by: Optional[str] = None  # user id
+
+
+class DeletedDocumentVisibility(SQLModel, table=True):
+    """
+    Who could see a document when it was deleted (principals as in document_visibility), so
+    GET /changes lists the deletion only to them.
+    """
+    __tablename__ = "deleted_document_visibility"
+
+    document_id: str = Field(primary_key=True)
+    principal: str = Field(primary_key=True)
@@ -1,5 +1,6 @@
 import uuid
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 from .users import User
@@ -9,15 +10,21 @@ from .tags import DocumentTagLink
 
 class Document(SQLModel, table=True):
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_created_at_id", "created_at", "id"),  # newest-first listings and cursors
+        Index("ix_documents_uploader_id_created_at", "uploader_id", "created_at"),  # /documents/my
+        Index("ix_documents_updated_at_id", "updated_at", "id"),  # incremental export
+    )
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, index=True)
     title: str
     description: Optional[str] = None
     access_level: str = Field(default="public")  # public | department | private
-    file_path: str = Field(default="")
+    file_path: str = Field(default="", index=True)
     uploader_id: str = Field(foreign_key="users.id")
     current_version_id: Optional[str] = Field(foreign_key="document_versions.id", default=None)
     created_at: Optional[str] = None  # ISO format datetime string
+    updated_at: Optional[str] = None  # bumped by app.utils.timestamps.touch_documents
 
     # Relationships
     uploader: Optional[User] = Relationship(back_populates="uploaded_documents")
@@ -34,11 +41,15 @@ class Document(SQLModel, table=True):
 
 class DocumentVersion(SQLModel, table=True):
     __tablename__ = "document_versions"
+    __table_args__ = (
+        # Also serves lookups by document_id alone; rejects two uploads racing to the same number
+        Index("uq_document_versions_document_id_version_number", "document_id", "version_number", unique=True),
+    )
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, index=True)
     document_id: str = Field(foreign_key="documents.id", nullable=False)
     version_number: int
-    file_path: str = Field(default="")
+    file_path: str = Field(default="", index=True)
     uploaded_by: str = Field(foreign_key="users.id")
     uploaded_at: Optional[str] = None  # ISO format datetime string
 
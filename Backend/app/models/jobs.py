@@ -0,0 +1,27 @@
+from typing import Optional
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+
+
+class Job(SQLModel, table=True):
+    """Durable background job, run by app.core.jobs."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_priority_run_after", "status", "priority", "run_after"),  # claiming
+        Index("ix_jobs_document_id", "document_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    payload: str = "{}"  # JSON object passed to the handler
+    status: str = "queued"  # queued | running | succeeded | failed
+    priority: int = 0  # higher runs first
+    attempts: int = 0
+    max_attempts: int = 5
+    run_after: str  # not claimed before this time (retry backoff)
+    document_id: Optional[str] = None  # for looking up a document's jobs
+    locked_by: Optional[str] = None
+    locked_at: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: str
+    finished_at: Optional[str] = None
@@ -1,9 +1,11 @@
 import uuid
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 
 class DocumentUserPermission(SQLModel, table=True):
     __tablename__ = "document_user_permissions"
+    __table_args__ = (Index("ix_document_user_permissions_document_id_user_id", "document_id", "user_id"),)
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, index=True)
     document_id: str = Field(foreign_key="documents.id", nullable=False)
@@ -16,6 +18,9 @@ class DocumentUserPermission(SQLModel, table=True):
 
 class DocumentDepartmentPermission(SQLModel, table=True):
     __tablename__ = "document_department_permissions"
+    __table_args__ = (
+        Index("ix_document_department_permissions_document_id_department_id", "document_id", "department_id"),
+    )
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True, index=True)
     document_id: str = Field(foreign_key="documents.id", nullable=False)
@@ -24,3 +29,16 @@ class DocumentDepartmentPermission(SQLModel, table=True):
 
     document: "Document" = Relationship(back_populates="department_permissions")
     department: "Department" = Relationship(back_populates="document_permissions")
+
+
+class DocumentVisibility(SQLModel, table=True):
+    """
+    Materialized access rules: one row per (document, principal allowed to see it).
+    Derived from documents, uploaders and the two permission tables; maintained by
+    app.utils.visibility_index and read when MATERIALIZED_ACL is on.
+    """
+    __tablename__ = "document_visibility"
+    __table_args__ = (Index("ix_document_visibility_principal_document_id", "principal", "document_id"),)
+
+    document_id: str = Field(foreign_key="documents.id", primary_key=True)
+    principal: str = Field(primary_key=True)  # "public" | "department:<id>" | "user:<id>"
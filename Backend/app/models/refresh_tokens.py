@@ -0,0 +1,20 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class RefreshToken(SQLModel, table=True):
+    """
+    A refresh token handed out at login or by POST /auth/refresh. Only its SHA-256 is stored.
+    Each is good for one use: refreshing replaces it with the next token of the same family
+    (every token descending from one login), and a revoked family is refused as a whole.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id: str = Field(primary_key=True)
+    token_hash: str = Field(unique=True, index=True)
+    user_id: str = Field(foreign_key="users.id", index=True)
+    family_id: str = Field(index=True)
+    created_at: str
+    expires_at: str
+    replaced_by: Optional[str] = None  # id of the token it was traded for, once spent
+    revoked_at: Optional[str] = None  # logout, or a spent token presented again
@@ -6,7 +6,7 @@ class DocumentTagLink(SQLModel, table=True):
     __tablename__ = "document_tags"
 
     document_id: str = Field(foreign_key="documents.id", primary_key=True)
-    tag_id: int = Field(foreign_key="tags.id", primary_key=True)
+    tag_id: int = Field(foreign_key="tags.id", primary_key=True, index=True)
 
     document: "Document" = Relationship(back_populates="tags")
     tag: "Tag" = Relationship(back_populates="documents")
@@ -0,0 +1,19 @@
+from sqlmodel import SQLModel, Field
+
+
+class VersionText(SQLModel, table=True):
+    """
+    Text extracted from a version's file. The text itself lives in the full-text index
+    (app.utils.search_index.version_text_fts); this row records that the version has been
+    processed and where each page starts in it. Versions without a row are still pending.
+    """
+    __tablename__ = "version_texts"
+
+    version_id: str = Field(foreign_key="document_versions.id", primary_key=True)
+    document_id: str = Field(index=True)
+    file_path: str = Field(index=True)  # versions sharing a blob reuse its text
+    extractor: str  # pdf | docx | pptx | xlsx | odf | text | none (unsupported file type)
+    page_offsets: str = "[]"  # JSON list: character offset at which each page starts
+    characters: int = 0
+    truncated: bool = False  # cut at TEXT_EXTRACTION_MAX_CHARS
+    extracted_at: str
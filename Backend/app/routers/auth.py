@@ -1,68 +1,208 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from app.db.session import get_session
 from app.models.users import User
-from app.utils.security import hash_password, verify_password
-from app.utils.jwt_handler import create_access_token, decode_access_token
-from app.schemas.auth import Token, UserLogin, UserRegister
-from datetime import timedelta
+from app.utils.security import hash_password_async, verify_and_update_password
+from app.utils.jwt_handler import create_access_token, decode_access_token, principal_from_claims, user_claims
+from app.utils.refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_refresh_token
+from app.schemas.auth import RefreshRequest, Token, UserLogin, UserRegister
+import time
+from typing import Optional
+from sqlalchemy.orm import joinedload
 from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.throttle import ConcurrencyLimiter
+from app.core.metrics import AUTH_FAILURES
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=ProfiledRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Authenticated users keyed by token `sub`. Entries are read-only snapshots (role and department
+# loaded), dropped on user changes in this process and expired by TTL for other workers.
+principal_cache = TTLCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL_SECONDS)
 
-# Register a new user
-@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register_user(user_in: UserRegister, session: Session = Depends(get_session)):
-    existing_user = session.exec(select(User).where(User.email == user_in.email)).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    user = User(
-        email=user_in.email,
-        full_name=user_in.full_name,
-        hashed_password=hash_password(user_in.password),
-        department_id=user_in.department_id,
-        role_id= 2 #default role is user (admin will be assigned manually in the database)
-    )
+# When users' role or department last changed in this process (see invalidate_principal). Access
+# tokens issued before then carry stale claims, so their users are loaded instead until the
+# tokens expire. Other workers keep trusting the claims for at most ACCESS_TOKEN_EXPIRE_MINUTES.
+claims_changed_at = TTLCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+all_claims_changed_at = 0.0
+
+
+# Password hashing runs on its own executor (app.utils.security), so these routes are async:
+# their short queries go to the threadpool, the hash doesn't hold a threadpool worker.
+account_limiter = ConcurrencyLimiter(
+    settings.LOGIN_MAX_CONCURRENT_PER_ACCOUNT, "Too many simultaneous login attempts for this account"
+)
+address_limiter = ConcurrencyLimiter(settings.LOGIN_MAX_CONCURRENT_PER_IP, "Too many simultaneous requests from this address")
+
+
+def client_address(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def _user_by_email(session: Session, email: str) -> Optional[User]:
+    return session.exec(select(User).where(User.email == email)).first()
+
+
+def _save_user(session: Session, user: User) -> User:
     session.add(user)
     session.commit()
     session.refresh(user)
+    return user
+
+
+def _issue_tokens(session: Session, user: User, refresh_token: str) -> dict:
+    """Commit the refresh token and pair it with an access token carrying the user's claims."""
+    claims = user_claims(user)
+    session.commit()
+    return {
+        "access_token": create_access_token(data=claims),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
 
-    access_token = create_access_token(data={"sub": user.id})
-    return {"access_token": access_token, "token_type": "bearer"}
+
+def _login_tokens(session: Session, user: User) -> dict:
+    return _issue_tokens(session, user, issue_refresh_token(session, user.id))
+
+
+# Register a new user
+@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
+async def register_user(user_in: UserRegister, request: Request, session: Session = Depends(get_session)):
+    with address_limiter.hold(client_address(request)):
+        existing_user = await run_in_threadpool(_user_by_email, session, user_in.email)
+        if existing_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
+
+        user = User(
+            email=user_in.email,
+            full_name=user_in.full_name,
+            hashed_password=await hash_password_async(user_in.password),
+            department_id=user_in.department_id,
+            role_id= 2 #default role is user (admin will be assigned manually in the database)
+        )
+        user = await run_in_threadpool(_save_user, session, user)
+
+    return await run_in_threadpool(_login_tokens, session, user)
 
 
 # Login user
 @router.post("/login", response_model=Token)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.email == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(status_code=401, detail="Invalid email or password")
+async def login_user(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    session: Session = Depends(get_session),
+):
+    try:
+        with address_limiter.hold(client_address(request)), account_limiter.hold(form_data.username.strip().lower()):
+            user = await run_in_threadpool(_user_by_email, session, form_data.username)
+            valid, new_hash = False, None
+            if user:
+                valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+            if not valid:
+                AUTH_FAILURES.labels("bad_credentials").inc()
+                raise HTTPException(status_code=401, detail="Invalid email or password")
+            if new_hash:
+                # Hashed with an older scheme or other rounds than configured: upgrade it now
+                user.hashed_password = new_hash
+                await run_in_threadpool(_save_user, session, user)
+    except HTTPException as exc:
+        if exc.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            AUTH_FAILURES.labels("throttled").inc()
+        raise
+
+    return await run_in_threadpool(_login_tokens, session, user)
+
+
+# Trade a refresh token for a new pair
+@router.post("/refresh", response_model=Token)
+def refresh_tokens(body: RefreshRequest, session: Session = Depends(get_session)):
+    user_id, refresh_token = rotate_refresh_token(session, body.refresh_token)
+    # Claims come from the database rather than the old token, so role and department changes apply
+    user = session.exec(select(User).options(joinedload(User.role)).where(User.id == user_id)).first()
+    if user is None:
+        AUTH_FAILURES.labels("unknown_user").inc()
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    return _issue_tokens(session, user, refresh_token)
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": user.id}, expires_delta=access_token_expires)
 
-    return {"access_token": access_token, "token_type": "bearer"}
+# Revoke a refresh token and every token of its login; access tokens still run out on their own
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout_user(body: RefreshRequest, session: Session = Depends(get_session)):
+    if revoke_refresh_token(session, body.refresh_token):
+        session.commit()
 
 
 # Get current user
 def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
     payload = decode_access_token(token)
     if payload is None:
+        AUTH_FAILURES.labels("invalid_token").inc()
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
     user_id: str = payload.get("sub")
     if user_id is None:
+        AUTH_FAILURES.labels("invalid_token").inc()
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
 
-    user = session.get(User, user_id)
+    user = resolve_principal(payload, session.get_bind())
     if user is None:
+        AUTH_FAILURES.labels("unknown_user").inc()
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+
+def resolve_principal(payload: dict, bind):
+    """
+    Who a valid access token's payload stands for: its role and department claims when they can
+    be trusted (no query; routes only need those and the id), otherwise the user from
+    load_principal. None if the user no longer exists.
+    """
+    if settings.ACCESS_TOKEN_CLAIMS and not _claims_outdated(payload["sub"], payload.get("iat")):
+        principal = principal_from_claims(payload)
+        if principal is not None:
+            return principal
+    return load_principal(payload["sub"], bind)
+
+
+def load_principal(user_id: str, bind) -> Optional[User]:
+    """The cached snapshot of a user (role and department loaded), or None if there's no such user."""
+    user = principal_cache.get(user_id)
+    if user is None:
+        # User, role and department in one query, loaded in a private session so the request's
+        # commits never expire the snapshot that gets cached
+        with Session(bind) as principal_session:
+            user = principal_session.exec(
+                select(User)
+                .options(joinedload(User.role), joinedload(User.department))
+                .where(User.id == user_id)
+            ).first()
+        if user is not None:
+            principal_cache.set(user_id, user)
+    return user
+
+
+def invalidate_principal(user_id: Optional[str] = None):
+    """Forget cached principals after a user (or, with no id, any role/department) changes."""
+    global all_claims_changed_at
+    if user_id is None:
+        principal_cache.clear()
+        all_claims_changed_at = time.time()
+    else:
+        principal_cache.delete(user_id)
+        claims_changed_at.set(user_id, time.time())
+
+
+def _claims_outdated(user_id: str, issued_at: Optional[int]) -> bool:
+    if issued_at is None:
+        return True
+    changed_at = max(claims_changed_at.get(user_id) or 0.0, all_claims_changed_at)
+    return issued_at <= changed_at  # iat has whole seconds: a token from the same second may be stale
+
 # Get current admin user
 def get_current_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.role.name != "admin":
@@ -72,5 +212,9 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)):
 
 # Get current logged-in user
 @router.get("/me")
-def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+def read_users_me(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    # The full record: current_user may only hold the token's claims
+    user = load_principal(current_user.id, session.get_bind())
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
\ No newline at end of file
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from app.routers.auth import get_current_admin_user
+from app.utils.response_cache import response_cache
+from app.core.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/cache", tags=["Cache"], dependencies=[Depends(get_current_admin_user)], route_class=ProfiledRoute)
+
+
+@router.get("/stats")
+def get_cache_stats():
+    """Response cache hits and misses per namespace since this worker started."""
+    return {"ttl_seconds": response_cache.ttl, "namespaces": response_cache.stats()}
+
+
+@router.delete("/", status_code=204)
+def clear_cache():
+    response_cache.invalidate("documents", "tags")
+    return
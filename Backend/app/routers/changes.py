@@ -0,0 +1,78 @@
+import asyncio
+import time
+from fastapi import APIRouter, Depends, Query, Request
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, exists, or_
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.profiling import ProfiledRoute
+from app.db import engine
+from app.models.changes import DeletedDocumentVisibility, DocumentChange
+from app.models.documents import Document
+from app.models.users import User
+from app.schemas.changes import ChangeFeed, ChangeRead
+from app.routers.auth import get_current_user
+from app.utils.access_control import is_admin, visible_documents_clause
+from app.utils.change_log import latest_seq
+from app.utils.visibility_index import principals
+
+router = APIRouter(prefix="/changes", tags=["Changes"], dependencies=[Depends(get_current_user)], route_class=ProfiledRoute)
+
+
+@router.get("/", response_model=ChangeFeed)
+async def list_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="next_since from the previous call (0 for everything)"),
+    limit: int = Query(500, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=settings.CHANGES_MAX_WAIT_SECONDS, description="Seconds to wait for a change"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Document changes after `since`, oldest first. With `wait` the call returns as soon as there
+    is a change (long polling), or empty once the time is up. Changes to documents the caller
+    can't see are left out, and deletions are listed to those who could see the document then.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        # Polls the database rather than waiting for an in-process signal, so changes made
+        # through other workers are seen too; the check is one primary-key lookup
+        feed = await run_in_threadpool(_read_changes, current_user, since, limit)
+        remaining = deadline - time.monotonic()
+        if feed.changes or remaining <= 0 or await request.is_disconnected():
+            return feed
+        since = feed.next_since
+        await asyncio.sleep(min(settings.CHANGES_POLL_INTERVAL_SECONDS, remaining))
+
+
+def _read_changes(user: User, since: int, limit: int) -> ChangeFeed:
+    with Session(engine) as session:
+        head = latest_seq(session)
+        if head <= since:
+            return ChangeFeed(changes=[], next_since=since)
+        # Earlier changes to a deleted document are superseded by its deletion
+        visible = or_(
+            _visible_deletion(user),
+            exists(select(Document.id).where(Document.id == DocumentChange.document_id, visible_documents_clause(user))),
+        )
+        rows = session.exec(
+            select(DocumentChange)
+            .where(DocumentChange.seq > since, DocumentChange.seq <= head, visible)
+            .order_by(DocumentChange.seq)
+            .limit(limit)
+        ).all()
+    # A short page means everything up to `head` was scanned, including changes left out
+    next_since = rows[-1].seq if len(rows) == limit else head
+    return ChangeFeed(changes=[ChangeRead.model_validate(row) for row in rows], next_since=next_since)
+
+
+def _visible_deletion(user: User):
+    """Deletions of documents `user` could see, going by the visibility recorded at deletion."""
+    if is_admin(user):
+        return DocumentChange.kind == "deleted"
+    return and_(
+        DocumentChange.kind == "deleted",
+        exists(select(DeletedDocumentVisibility.document_id).where(
+            DeletedDocumentVisibility.document_id == DocumentChange.document_id,
+            DeletedDocumentVisibility.principal.in_(principals(user)),
+        )),
+    )
@@ -3,9 +3,10 @@ from sqlmodel import Session, select
 from app.db import get_session
 from app.models.departments import Department
 from app.schemas.departments import DepartmentCreate, DepartmentRead
-from app.routers.auth import get_current_user, get_current_admin_user
+from app.routers.auth import get_current_user, get_current_admin_user, invalidate_principal
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/departments", tags=["Departments"])
+router = APIRouter(prefix="/departments", tags=["Departments"], route_class=ProfiledRoute)
 
 
 @router.post(
@@ -34,4 +35,5 @@ def delete_department(department_id: str, session: Session = Depends(get_session
         return {"error": "Department not found"}
     session.delete(db_dept)
     session.commit()
+    invalidate_principal()
     return {"message": "Department deleted successfully"}
@@ -1,66 +1,55 @@
+import json
 import os
 import uuid
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Query
-from fastapi.responses import FileResponse
-from sqlmodel import Session, select, func
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlmodel import Session, select
 from app.db import get_session
 from app.models.documents import Document, DocumentVersion
-from app.models.permissions import DocumentUserPermission, DocumentDepartmentPermission
 from app.models.users import User
-from app.models.tags import Tag, DocumentTagLink
 from app.schemas.documents import (
     DocumentRead, DocumentUpdate,
-    DocumentVersionRead
+    DocumentVersionRead, DocumentListItem, DocumentDetailRead,
+    BatchItemMetadata, BatchItemResult, BatchUploadResult, DocumentSearchItem
 )
 from app.routers.auth import get_current_user
+from app.utils.access_control import (
+    accessible_documents, visible_documents_clause,
+    get_accessible_document, get_accessible_document_where
+)
+from app.utils.pagination import paginate, split_page, count_rows
+from app.utils.response_cache import response_cache, visibility_class
+from app.utils.search_index import search_matches, ilike_search, index_document, remove_document, content_snippets
+from app.utils.visibility_index import refresh_visibility, remove_visibility
+from app.utils.bulk_ingest import ensure_tags, insert_documents
+from app.utils.eager_loading import LIST_OPTIONS, DETAIL_OPTIONS, document_list_item, document_detail
+from app.utils.file_handler import (
+    BLOB_DIR, PendingBlob, pending_blob, pending_blobs, store_blob, release_blob, resolve_path, serve_file,
+    start_partial_upload, partial_upload_meta, append_partial_upload, finish_partial_upload, abort_partial_upload
+)
+from app.utils.timestamps import utc_now, touch_documents
+from app.utils.document_export import export_lines
+from app.utils.change_log import record_changes, record_deletion_visibility
+from app.utils.post_upload import enqueue_post_upload
+from app.utils.text_extraction import delete_version_texts
+from app.utils.renditions import get_rendition
+from app.core.config import settings
+from app.core.events import emit, DOCUMENTS_CHANGED
+from app.core.profiling import ProfiledRoute
 
 router = APIRouter(
     prefix="/documents",
     tags=["Documents"],
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_user)],
+    route_class=ProfiledRoute
 )
 
-# Ensure upload directory exists
-UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "Documents")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-
-# ================================================================================================
-#                                        Helpers
-# ================================================================================================
-def can_access_document(user: User, document: Document, session: Session) -> bool:
-    """Check if a user can access a given document."""
-    if user.role and user.role.name.lower() == "admin":
-        return True  # admins can access everything
-
-    if document.access_level == "public":
-        return True
-
-    if document.access_level == "department":
-        if user.department_id == document.uploader.department_id:
-            return True
-        dept_perm = session.exec(
-            select(DocumentDepartmentPermission).where(
-                DocumentDepartmentPermission.document_id == document.id,
-                DocumentDepartmentPermission.department_id == user.department_id
-            )
-        ).first()
-        if dept_perm:
-            return True
-
-    if document.access_level == "private":
-        if document.uploader_id == user.id:
-            return True
-        user_perm = session.exec(
-            select(DocumentUserPermission).where(
-                DocumentUserPermission.document_id == document.id,
-                DocumentUserPermission.user_id == user.id
-            )
-        ).first()
-        if user_perm:
-            return True
-
-    return False
+# Ensure blob store exists
+os.makedirs(BLOB_DIR, exist_ok=True)
 
 
 # ================================================================================================
@@ -75,171 +64,301 @@ def create_document(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    # Create DB record first (to get UUID as ID)
-    db_doc = Document(
-        title=title,
-        description=description,
-        access_level=access_level,
-        uploader_id=current_user.id,
-        created_at=func.now(),
-    )
-    session.add(db_doc)
-    session.commit()
-    session.refresh(db_doc)
-
-    # Use doc.id as filename
+    # Store the upload once; document and first version share the same blob
     ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{db_doc.id}{ext}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-
-    # Save uploaded file
-    with open(file_path, "wb") as f:
-        f.write(file.file.read())
-
-    # Update doc with relative path
-    relative_path = f"Documents/{unique_filename}"
-    db_doc.file_path = relative_path
-    session.add(db_doc)
-    session.commit()
-    session.refresh(db_doc)
-
-    # Create first version
-    db_ver = DocumentVersion(
-        document_id=db_doc.id,
-        version_number=1,
-        title=title,
-        description=description,
-        file_path="",  # will set after saving file
-        uploaded_by=current_user.id,
-        access_level=access_level,
-        uploaded_at=func.now(),
-    )
-    session.add(db_ver)
-    session.commit()
-    session.refresh(db_ver)
-
-    # Save version file with version UUID
-    version_filename = f"{db_ver.id}{ext}"
-    version_file_path = os.path.join(UPLOAD_DIR, version_filename)
-    # Copy the original file to the version file
-    with open(file_path, "rb") as src, open(version_file_path, "wb") as dst:
-        dst.write(src.read())
-    version_relative_path = f"Documents/{version_filename}"
-    db_ver.file_path = version_relative_path
-    session.add(db_ver)
-    session.commit()
-    session.refresh(db_ver)
-
-    # Update current version pointer
-    db_doc.current_version_id = db_ver.id
-    session.add(db_doc)
-    session.commit()
-    session.refresh(db_doc)
-
-    return db_doc
-
-
-@router.get("/", response_model=list[DocumentRead])
+    blob = store_blob(file.file, ext, max_size=settings.MAX_UPLOAD_SIZE_BYTES)
+    return _create_document(session, current_user, title, description, access_level, blob)
+
+
+def _create_document(
+    session: Session, user: User, title: str, description: str, access_level: str, blob: PendingBlob
+) -> DocumentRead:
+    """Insert a document and its first version in one transaction for a freshly stored blob."""
+    now = utc_now()
+    with pending_blob(session, blob) as relative_path:
+        db_doc = Document(
+            id=str(uuid.uuid4()),
+            title=title,
+            description=description,
+            access_level=access_level,
+            file_path=relative_path,
+            uploader_id=user.id,
+            created_at=now,
+            updated_at=now,
+        )
+        db_ver = DocumentVersion(
+            id=str(uuid.uuid4()),
+            document=db_doc,
+            version_number=1,
+            file_path=relative_path,
+            uploaded_by=user.id,
+            uploaded_at=now,
+        )
+        session.add(db_ver)
+        session.flush()  # the two tables reference each other: insert both rows, then point at the version
+        db_doc.current_version_id = db_ver.id
+        index_document(session, db_doc.id)
+        refresh_visibility(session, [db_doc.id])
+        created = DocumentRead.model_validate(db_doc)  # ids and timestamps are known: no refresh after commit
+        enqueue_post_upload(session, [db_ver])
+        record_changes(session, "created", [db_doc.id], user.id)
+        session.commit()
+    emit(DOCUMENTS_CHANGED, document_ids=[created.id])
+    return created
+
+
+# Bounded so one large batch can't occupy more than a few threads copying files
+_batch_executor = ThreadPoolExecutor(max_workers=settings.BATCH_INGEST_WORKERS, thread_name_prefix="batch-ingest")
+
+
+@router.post("/batch", response_model=BatchUploadResult, status_code=status.HTTP_201_CREATED)
+def create_documents_batch(
+    files: list[UploadFile] = File(...),
+    metadata: str = Form("[]", description="JSON array of {title, description, access_level, tags}, one per file"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Create one document per file; failures are reported per item instead of failing the batch."""
+    items = _parse_batch_metadata(metadata, files)
+    results = [BatchItemResult(index=i, filename=file.filename or "", status="failed") for i, file in enumerate(files)]
+
+    stored = list(_batch_executor.map(_store_batch_file, files))
+    ready = []
+    for i, outcome in enumerate(stored):
+        if isinstance(outcome, PendingBlob):
+            ready.append(i)
+        else:
+            results[i].detail = outcome
+
+    tag_ids = ensure_tags(session, {name for i in ready for name in items[i].tags})
+    for start in range(0, len(ready), settings.BATCH_INSERT_CHUNK_SIZE):
+        chunk = ready[start:start + settings.BATCH_INSERT_CHUNK_SIZE]
+        try:
+            created = _insert_batch(session, current_user, [(items[i], stored[i]) for i in chunk], tag_ids)
+        except SQLAlchemyError:
+            for i in chunk:
+                results[i].detail = "Could not save document"
+            continue
+        for i, doc in zip(chunk, created):
+            results[i].status = "created"
+            results[i].document = doc
+    emit(DOCUMENTS_CHANGED, document_ids=[result.document.id for result in results if result.document])
+
+    created_count = sum(result.status == "created" for result in results)
+    return BatchUploadResult(created=created_count, failed=len(results) - created_count, results=results)
+
+
+def _parse_batch_metadata(metadata: str, files: list[UploadFile]) -> list[BatchItemMetadata]:
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_FILES} files per batch")
+    try:
+        raw = json.loads(metadata)
+        if not isinstance(raw, list) or len(raw) not in (0, len(files)):
+            raise ValueError
+        items = [BatchItemMetadata.model_validate(entry) for entry in raw] or [BatchItemMetadata() for _ in files]
+    except ValueError:  # also pydantic's ValidationError
+        raise HTTPException(status_code=422, detail="metadata must be a JSON array with one object per file")
+    for item, file in zip(items, files):
+        item.title = item.title or os.path.splitext(file.filename or "")[0] or "Untitled"
+        item.tags = sorted({name.strip() for name in item.tags if name.strip()})
+    return items
+
+
+def _store_batch_file(file: UploadFile):
+    """Runs on the batch executor: the stored blob, or the reason it was rejected."""
+    try:
+        return store_blob(file.file, os.path.splitext(file.filename or "")[1], max_size=settings.MAX_UPLOAD_SIZE_BYTES)
+    except HTTPException as exc:
+        return exc.detail
+    except OSError:
+        return "Could not store file"
+
+
+def _insert_batch(
+    session: Session, user: User, entries: list[tuple[BatchItemMetadata, PendingBlob]], tag_ids: dict[str, int]
+) -> list[DocumentRead]:
+    """Bulk-insert documents, first versions and tag links for one chunk in a single transaction."""
+    now = utc_now()
+    documents, versions, links = [], [], []
+    for item, blob in entries:
+        doc_id, version_id = str(uuid.uuid4()), str(uuid.uuid4())
+        documents.append(dict(
+            id=doc_id, title=item.title, description=item.description, access_level=item.access_level,
+            file_path=blob.path, uploader_id=user.id, created_at=now, updated_at=now,
+        ))
+        versions.append(dict(
+            id=version_id, document_id=doc_id, version_number=1, file_path=blob.path,
+            uploaded_by=user.id, uploaded_at=now,
+        ))
+        links.extend(dict(document_id=doc_id, tag_id=tag_ids[name]) for name in item.tags if name in tag_ids)
+
+    with pending_blobs(session, [blob for _, blob in entries]):
+        insert_documents(session, documents, versions, links)
+        session.commit()
+
+    for doc, ver in zip(documents, versions):
+        doc["current_version_id"] = ver["id"]
+    return [DocumentRead.model_validate(doc) for doc in documents]
+
+
+@router.get("/", response_model=list[DocumentListItem])
 def list_documents(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (omit for all documents)"),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor"),
+    include_total: bool = Query(False),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    docs = session.exec(select(Document)).all()
-    return [doc for doc in docs if can_access_document(current_user, doc, session)]
+    query = accessible_documents(current_user)
+    return _paged_list(session, query, limit, offset, cursor, include_total, ("list", current_user))
 
 
-@router.get("/my", response_model=list[DocumentRead])
+@router.get("/my", response_model=list[DocumentListItem])
 def list_my_documents(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (omit for all documents)"),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor"),
+    include_total: bool = Query(False),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    return session.exec(
-        select(Document).where(Document.uploader_id == current_user.id)
-    ).all()
+    query = accessible_documents(current_user).where(Document.uploader_id == current_user.id)
+    return _paged_list(session, query, limit, offset, cursor, include_total, ("my", current_user))
+
+
+def _paged_list(session, query, limit, offset, cursor, include_total, listing):
+    """
+    Plain-list endpoints keep their response shape and report paging through headers.
+    Whole responses are cached per listing, visibility class and paging parameters.
+    """
+    name, user = listing
+    count_key = (name, user.id)
+
+    def produce():
+        page = paginate(query, limit, offset, cursor).options(*LIST_OPTIONS)
+        rows, next_cursor = split_page(session.exec(page).all(), limit)
+        headers = {}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        if include_total:
+            headers["X-Total-Count"] = str(count_rows(session, query, count_key))
+        return [document_list_item(doc) for doc in rows], headers
+
+    key = (name, visibility_class(user), limit, offset, cursor, include_total)
+    return response_cache.cached_json("documents", key, produce)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {
+        "description": (
+            "Newline-delimited JSON, one object per line (DocumentExportItem): the document's fields "
+            "plus uploader_id, tags (names) and versions"
+        ),
+        "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+    }},
+)
+def export_documents(
+    updated_since: Optional[str] = Query(None, description='Only documents changed at or after this time ("YYYY-MM-DD HH:MM:SS")'),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Every visible document with its tags and versions, one JSON object per line, oldest change
+    first. For incremental sync pass the largest updated_at seen so far as `updated_since`
+    (inclusive: documents changed in that same second are sent again).
+    """
+    lines = export_lines(visible_documents_clause(current_user), updated_since, settings.EXPORT_BATCH_SIZE)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
 
 @router.get("/search")
 def search_documents(
     q: str = Query(..., description="Search query"),
-    field: str = Query("title", regex="^(title|tags|uploader)$"),
+    field: str = Query("title", regex="^(title|tags|uploader|all|content)$"),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; takes precedence over page"),
+    include_total: bool = Query(True),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    base_query = select(Document)
-
-    if field == "title":
-        base_query = base_query.where(Document.title.ilike(f"%{q}%"))
-    elif field == "uploader":
-        base_query = base_query.join(User, User.id == Document.uploader_id).where(User.username.ilike(f"%{q}%"))
-    elif field == "tags":
-        base_query = (
-            base_query.join(DocumentTagLink, DocumentTagLink.document_id == Document.id)
-            .join(Tag, Tag.id == DocumentTagLink.tag_id)
-            .where(Tag.name.ilike(f"%{q}%"))
+    matches = search_matches(session, field, q)
+    if matches is None:
+        # No full-text support on this backend: unindexed substring match
+        query = count_query = ilike_search(accessible_documents(current_user), field, q)
+        rank = None
+    else:
+        rank = matches.c.rank
+        query = (
+            select(Document, rank)
+            .join(matches, matches.c.document_id == Document.id)
+            .where(visible_documents_clause(current_user))
         )
+        count_query = accessible_documents(current_user).join(matches, matches.c.document_id == Document.id)
 
-    all_docs = session.exec(base_query).all()
-    # print("all_docs:", all_docs)
-    accessible_docs = [doc for doc in all_docs if can_access_document(current_user, doc, session)]
+    offset = 0 if cursor else (page - 1) * per_page
+    page_query = paginate(query, per_page, offset, cursor, rank).options(*LIST_OPTIONS)
+    docs, next_cursor = split_page(session.exec(page_query).all(), per_page)
+    total = None
+    if include_total:
+        total = count_rows(session, count_query, ("search", current_user.id, field, q))
 
-    total = len(accessible_docs)
-    start = (page - 1) * per_page
-    end = start + per_page
-    items = accessible_docs[start:end]
+    items = [document_list_item(doc) for doc in docs]
+    if field == "content":
+        # Where the text matched: page and highlighted excerpt of the latest version
+        snippets = content_snippets(session, [doc.id for doc in docs], q)
+        items = [DocumentSearchItem.model_validate(item, update={"match": snippets.get(item.id)}) for item in items]
 
     return {
         "items": items,
         "total": total,
         "page": page,
         "per_page": per_page,
+        "next_cursor": next_cursor,
     }
 
 @router.get("/{doc_id}/download")
 def download_document(
     doc_id: str,
+    request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    doc = session.get(Document, doc_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    doc = get_accessible_document(doc_id, current_user, session)
 
-    abs_path = os.path.join(os.path.dirname(__file__), "..", "..", doc.file_path)
-    abs_path = os.path.abspath(abs_path)
+    abs_path = resolve_path(doc.file_path)
 
     if not os.path.exists(abs_path):
         raise HTTPException(status_code=404, detail="File not found on server")
 
-    return FileResponse(
-        abs_path,
-        filename=os.path.basename(abs_path),
+    return serve_file(
+        request,
+        doc.file_path,
+        modified_at=doc.created_at,
+        filename=doc.title + os.path.splitext(abs_path)[1],
         media_type="application/octet-stream"
     )
 
 @router.get("/{doc_id}/file")
 def get_document_file(
     doc_id: str,
+    request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    doc = session.get(Document, doc_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    doc = get_accessible_document(doc_id, current_user, session)
 
-    file_path = doc.file_path
+    file_path = resolve_path(doc.file_path)
     if not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="File not found on disk")
-    return FileResponse(
-        path=file_path,
+    return serve_file(
+        request,
+        doc.file_path,
+        modified_at=doc.created_at,
         media_type="application/pdf" if file_path.endswith(".pdf") else "image/*",
-        headers={"Content-Disposition": "inline"}
+        inline=True,
     )
 
 
@@ -249,47 +368,37 @@ def get_document_by_path(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    doc = session.exec(select(Document).where(Document.file_path == path)).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found by path")
-
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    return doc
+    return get_accessible_document_where(
+        Document.file_path == path, current_user, session, not_found_detail="Document not found by path"
+    )
 
 
 @router.get("/file/{doc_id}")
-def get_file(doc_id: str, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    doc = session.get(Document, doc_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+def get_file(doc_id: str, request: Request, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    doc = get_accessible_document(doc_id, current_user, session)
 
-    file_path = doc.file_path
-    return FileResponse(
-        path=file_path,
+    file_path = resolve_path(doc.file_path)
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found on disk")
+    return serve_file(
+        request,
+        doc.file_path,
+        modified_at=doc.created_at,
         media_type="application/pdf" if file_path.endswith(".pdf") else "image/*",
-        headers={"Content-Disposition": "inline"}
+        inline=True,
     )
 
 
-@router.get("/{doc_id}", response_model=DocumentRead, status_code=status.HTTP_200_OK)
+@router.get("/{doc_id}", response_model=DocumentDetailRead, status_code=status.HTTP_200_OK)
 def get_document(
     doc_id: str,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    doc = session.get(Document, doc_id)
-    if doc is None:
-        raise HTTPException(status_code=404, detail="Document not found")
+    """Document with uploader, tags, current version and all versions inline."""
+    doc = get_accessible_document(doc_id, current_user, session, options=DETAIL_OPTIONS)
 
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    return doc
+    return document_detail(doc)
 
 
 @router.patch("/{doc_id}", response_model=DocumentRead)
@@ -299,19 +408,19 @@ def update_document(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    doc = session.get(Document, doc_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    doc = get_accessible_document(doc_id, current_user, session)
 
     for field, value in data.dict(exclude_unset=True).items():
         setattr(doc, field, value)
+    doc.updated_at = utc_now()
 
     session.add(doc)
+    index_document(session, doc.id)
+    refresh_visibility(session, [doc.id])
+    record_changes(session, "updated", [doc.id], current_user.id)
     session.commit()
     session.refresh(doc)
+    emit(DOCUMENTS_CHANGED, document_ids=[doc.id])
     return doc
 
 @router.delete("/{doc_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -320,67 +429,160 @@ def delete_document(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
-    doc = session.get(Document, doc_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    doc = get_accessible_document(doc_id, current_user, session)
 
     # Delete associated versions
     versions = session.exec(
         select(DocumentVersion).where(DocumentVersion.document_id == doc_id)
     ).all()
+    released = {doc.file_path, *(ver.file_path for ver in versions)}
+    delete_version_texts(session, [ver.id for ver in versions])
     for ver in versions:
         session.delete(ver)
 
     # Delete the document record
+    remove_document(session, doc.id)
+    record_deletion_visibility(session, doc.id)
+    remove_visibility(session, doc.id)
     session.delete(doc)
+    record_changes(session, "deleted", [doc_id], current_user.id)
     session.commit()
+    emit(DOCUMENTS_CHANGED, document_ids=[doc_id])
+
+    # Drop files nothing else references anymore
+    for path in released:
+        release_blob(session, path)
+    return
+
+# ================================================================================================
+#                                 Resumable Upload Endpoints
+# ================================================================================================
+# For very large files: POST /uploads, then PUT each chunk in order with its byte offset,
+# then POST /uploads/{id}/complete to turn the assembled file into a document or a new version.
+@router.post("/uploads", status_code=status.HTTP_201_CREATED)
+def start_upload(
+    filename: str = Form(...),
+    current_user: User = Depends(get_current_user),
+):
+    upload_id = start_partial_upload(current_user.id, filename)
+    return {
+        "upload_id": upload_id,
+        "received": 0,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE_BYTES,
+        "max_size": settings.MAX_UPLOAD_SIZE_BYTES,
+    }
+
+
+@router.get("/uploads/{upload_id}")
+def get_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    meta = partial_upload_meta(upload_id, current_user.id)
+    return {"upload_id": upload_id, "filename": meta["filename"], "received": meta["received"]}
+
+
+@router.put("/uploads/{upload_id}")
+async def put_upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk"),
+    current_user: User = Depends(get_current_user),
+):
+    # Only the body stream is read on the event loop; disk work runs in the threadpool
+    await run_in_threadpool(partial_upload_meta, upload_id, current_user.id)
+    received = await append_partial_upload(upload_id, offset, request.stream(), settings.MAX_UPLOAD_SIZE_BYTES)
+    return {"upload_id": upload_id, "received": received}
+
+
+@router.post("/uploads/{upload_id}/complete", status_code=status.HTTP_201_CREATED)
+def complete_upload(
+    upload_id: str,
+    title: str = Form(""),
+    description: str = Form(""),
+    access_level: str = Form("public"),
+    document_id: Optional[str] = Form(None, description="Add the file as a new version of this document"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    meta = partial_upload_meta(upload_id, current_user.id)
+    if document_id:
+        get_accessible_document(document_id, current_user, session)
+    elif not title:
+        raise HTTPException(status_code=422, detail="title is required for a new document")
+
+    blob = finish_partial_upload(upload_id, os.path.splitext(meta["filename"])[1])
+    if document_id:
+        return _create_version(session, document_id, current_user, blob)
+    return _create_document(session, current_user, title, description, access_level, blob)
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    partial_upload_meta(upload_id, current_user.id)
+    abort_partial_upload(upload_id)
     return
 
+
 # ================================================================================================
 #                                     Versions Endpoints
 # ================================================================================================
 @router.post("/{doc_id}/versions")
-async def upload_version(
+def upload_version(
     doc_id: str,
     file: UploadFile = File(...),
     session: Session = Depends(get_session),
     user: User = Depends(get_current_user),
 ):
-    contents = await file.read()
-    save_path = f"uploads/{doc_id}_{file.filename}"
-    with open(save_path, "wb") as f:
-        f.write(contents)
-
-    last_version = session.exec(
-        select(DocumentVersion)
-        .where(DocumentVersion.document_id == doc_id)
-        .order_by(DocumentVersion.version_number.desc())
-    ).first()
-    next_version = 1 if last_version is None else last_version.version_number + 1
-
-    version = DocumentVersion(
-        document_id=doc_id,
-        version_number=next_version,
-        file_path=save_path,
-        uploaded_by=user.id,
-        uploaded_at=func.now(),
-    )
-    session.add(version)
-    session.commit()
-    session.refresh(version)
-    return version
+    get_accessible_document(doc_id, user, session)
+    blob = store_blob(file.file, os.path.splitext(file.filename)[1], max_size=settings.MAX_UPLOAD_SIZE_BYTES)
+    return _create_version(session, doc_id, user, blob)
+
+
+VERSION_NUMBER_ATTEMPTS = 5
+VERSION_NUMBER_INDEX = "uq_document_versions_document_id_version_number"
+
+
+def _create_version(session: Session, doc_id: str, user: User, blob: PendingBlob) -> DocumentVersionRead:
+    with pending_blob(session, blob) as relative_path:
+        for attempt in range(VERSION_NUMBER_ATTEMPTS):
+            last_number = session.exec(
+                select(DocumentVersion.version_number)
+                .where(DocumentVersion.document_id == doc_id)
+                .order_by(DocumentVersion.version_number.desc())
+            ).first()
+            version = DocumentVersion(
+                id=str(uuid.uuid4()),
+                document_id=doc_id,
+                version_number=(last_number or 0) + 1,
+                file_path=relative_path,
+                uploaded_by=user.id,
+                uploaded_at=utc_now(),
+            )
+            session.add(version)
+            touch_documents(session, [doc_id])
+            created = DocumentVersionRead.model_validate(version)
+            enqueue_post_upload(session, [version])
+            record_changes(session, "version_added", [doc_id], user.id)
+            try:
+                session.commit()
+                emit(DOCUMENTS_CHANGED, document_ids=[doc_id])
+                return created
+            except IntegrityError as exc:
+                session.rollback()
+                if not _version_number_taken(exc):
+                    raise
+        raise HTTPException(status_code=409, detail="Too many concurrent uploads for this document, retry")
+
+
+def _version_number_taken(exc: IntegrityError) -> bool:
+    """Whether another upload took this version number, rather than some other constraint failing."""
+    diag = getattr(exc.orig, "diag", None)  # psycopg names the violated constraint
+    if diag is not None:
+        return diag.constraint_name == VERSION_NUMBER_INDEX
+    return "document_versions.document_id, document_versions.version_number" in str(exc.orig)
 
 
 @router.get("/{doc_id}/versions", response_model=list[DocumentVersion])
 def list_versions(doc_id: str, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    doc = session.get(Document, doc_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    get_accessible_document(doc_id, current_user, session)
     return session.exec(
         select(DocumentVersion).where(DocumentVersion.document_id == doc_id).order_by(DocumentVersion.version_number)
     ).all()
@@ -391,16 +593,12 @@ def get_version(version_id: str, session: Session = Depends(get_session), curren
     ver = session.get(DocumentVersion, version_id)
     if not ver:
         raise HTTPException(status_code=404, detail="Version not found")
-    doc = session.get(Document, ver.document_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Parent document not found")
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    get_accessible_document(ver.document_id, current_user, session, not_found_detail="Parent document not found")
     return ver
 
 
 @router.get("/{doc_id}/versions/{version_number}/download")
-def download_version(doc_id: str, version_number: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+def download_version(doc_id: str, version_number: int, request: Request, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
     version = session.exec(
         select(DocumentVersion).where(
             DocumentVersion.document_id == doc_id,
@@ -410,36 +608,71 @@ def download_version(doc_id: str, version_number: int, session: Session = Depend
     if not version:
         raise HTTPException(status_code=404, detail="Version not found")
 
-    doc = session.get(Document, doc_id)
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    doc = get_accessible_document(doc_id, current_user, session)
 
-    abs_path = os.path.join(os.path.dirname(__file__), "..", "..", version.file_path)
-    abs_path = os.path.abspath(abs_path)
+    abs_path = resolve_path(version.file_path)
     if not os.path.exists(abs_path):
         raise HTTPException(status_code=404, detail="File not found on server")
 
-    return FileResponse(abs_path, filename=os.path.basename(abs_path), media_type="application/octet-stream")
+    filename = f"{doc.title}_v{version.version_number}{os.path.splitext(abs_path)[1]}"
+    return serve_file(
+        request,
+        version.file_path,
+        modified_at=version.uploaded_at,
+        filename=filename,
+        media_type="application/octet-stream",
+        immutable=True,
+    )
 
 
 @router.get("/versions/{version_id}/file")
-def get_version_file(version_id: str, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+def get_version_file(version_id: str, request: Request, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
     ver = session.get(DocumentVersion, version_id)
     if not ver:
         raise HTTPException(status_code=404, detail="Version not found")
-    doc = session.get(Document, ver.document_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Parent document not found")
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    get_accessible_document(ver.document_id, current_user, session, not_found_detail="Parent document not found")
 
-    file_path = ver.file_path
+    file_path = resolve_path(ver.file_path)
     if not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="File not found on disk")
-    return FileResponse(
-        path=file_path,
+    return serve_file(
+        request,
+        ver.file_path,
+        modified_at=ver.uploaded_at,
         media_type="application/pdf" if file_path.endswith(".pdf") else "image/*",
-        headers={"Content-Disposition": "inline"}
+        inline=True,
+        immutable=True,
+    )
+
+@router.get("/versions/{version_id}/thumbnail")
+def get_version_thumbnail(
+    version_id: str,
+    request: Request,
+    size: int = Query(settings.RENDITION_DEFAULT_SIZE, description="Longest side in pixels"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    JPEG of the first page of a PDF, or of a downscaled image, at most `size` pixels wide and
+    high. Rendered on first request and cached (see app.utils.renditions); immutable.
+    """
+    if size not in settings.RENDITION_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {settings.RENDITION_SIZES}")
+    ver = session.get(DocumentVersion, version_id)
+    if not ver:
+        raise HTTPException(status_code=404, detail="Version not found")
+    get_accessible_document(ver.document_id, current_user, session, not_found_detail="Parent document not found")
+    session.close()  # don't hold a pooled connection while rendering
+
+    if not os.path.isfile(resolve_path(ver.file_path)):
+        raise HTTPException(status_code=404, detail="File not found on disk")
+    return serve_file(
+        request,
+        get_rendition(ver.file_path, size),
+        modified_at=ver.uploaded_at,
+        media_type="image/jpeg",
+        inline=True,
+        immutable=True,
     )
 
 @router.delete("/versions/{version_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -447,12 +680,14 @@ def delete_version(version_id: str, session: Session = Depends(get_session), cur
     ver = session.get(DocumentVersion, version_id)
     if not ver:
         raise HTTPException(status_code=404, detail="Version not found")
-    doc = session.get(Document, ver.document_id)
-    if not doc:
-        raise HTTPException(status_code=404, detail="Parent document not found")
-    if not can_access_document(current_user, doc, session):
-        raise HTTPException(status_code=403, detail="Not authorized")
+    get_accessible_document(ver.document_id, current_user, session, not_found_detail="Parent document not found")
 
+    doc_id = ver.document_id
+    delete_version_texts(session, [ver.id])
     session.delete(ver)
+    touch_documents(session, [doc_id])
+    record_changes(session, "version_deleted", [doc_id], current_user.id)
     session.commit()
+    emit(DOCUMENTS_CHANGED, document_ids=[doc_id])
+    release_blob(session, ver.file_path)
     return
\ No newline at end of file
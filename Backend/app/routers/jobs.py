@@ -0,0 +1,77 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, select, func
+from app.db import get_session
+from app.models.jobs import Job
+from app.models.users import User
+from app.schemas.jobs import JobRead, JobStats
+from app.routers.auth import get_current_user, get_current_admin_user
+from app.utils.access_control import is_admin, get_accessible_document
+from app.utils.timestamps import utc_now
+from app.core.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], dependencies=[Depends(get_current_user)], route_class=ProfiledRoute)
+
+
+@router.get("/", response_model=list[JobRead])
+def list_jobs(
+    status: Optional[str] = Query(None, pattern="^(queued|running|succeeded|failed)$"),
+    kind: Optional[str] = None,
+    document_id: Optional[str] = Query(None, description="Required for non-admins"),
+    after_id: int = Query(0, ge=0, description="Last id of the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Jobs in id order. Users can see the jobs of documents they can access."""
+    if document_id:
+        get_accessible_document(document_id, current_user, session)
+    elif not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    query = select(Job).where(Job.id > after_id).order_by(Job.id).limit(limit)
+    if status:
+        query = query.where(Job.status == status)
+    if kind:
+        query = query.where(Job.kind == kind)
+    if document_id:
+        query = query.where(Job.document_id == document_id)
+    return session.exec(query).all()
+
+
+@router.get("/stats", response_model=list[JobStats], dependencies=[Depends(get_current_admin_user)])
+def job_stats(session: Session = Depends(get_session)):
+    rows = session.exec(
+        select(Job.kind, Job.status, func.count()).group_by(Job.kind, Job.status).order_by(Job.kind, Job.status)
+    ).all()
+    return [JobStats(kind=kind, status=status, count=count) for kind, status, count in rows]
+
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(job_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    job = session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not is_admin(current_user):
+        if not job.document_id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        get_accessible_document(job.document_id, current_user, session)
+    return job
+
+
+@router.post("/{job_id}/retry", response_model=JobRead, dependencies=[Depends(get_current_admin_user)])
+def retry_job(job_id: int, session: Session = Depends(get_session)):
+    """Queue a failed job again with a fresh set of attempts."""
+    job = session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "failed":
+        raise HTTPException(status_code=409, detail="Only failed jobs can be retried")
+    job.status = "queued"
+    job.attempts = 0
+    job.run_after = utc_now()
+    job.finished_at = None
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
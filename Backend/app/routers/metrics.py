@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.metrics import render
+
+# Unauthenticated, like most scrape targets: expose it on an internal network only, or turn it
+# off with METRICS_ENABLED=false.
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """Prometheus exposition of every worker's metrics."""
+    body, content_type = render()
+    return Response(body, media_type=content_type)
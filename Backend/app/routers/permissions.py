@@ -7,16 +7,30 @@ from app.schemas.permissions import (
     DocumentDepartmentPermissionCreate, DocumentDepartmentPermissionRead,
 )
 from app.routers.auth import get_current_user, get_current_admin_user
+from app.core.events import emit, PERMISSIONS_CHANGED
+from app.core.profiling import ProfiledRoute
+from app.utils.visibility_index import refresh_visibility
+from app.utils.timestamps import touch_documents
+from app.utils.change_log import record_changes
+from app.models.users import User
 
-router = APIRouter(prefix="/permissions", tags=["Permissions"], dependencies=[Depends(get_current_user)])
+router = APIRouter(prefix="/permissions", tags=["Permissions"], dependencies=[Depends(get_current_user)], route_class=ProfiledRoute)
 
 
 @router.post("/users", response_model=DocumentUserPermissionRead, status_code=201)
-def add_user_permission(perm: DocumentUserPermissionCreate, session: Session = Depends(get_session)):
+def add_user_permission(
+    perm: DocumentUserPermissionCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
     db_perm = DocumentUserPermission(**perm.dict())
     session.add(db_perm)
+    refresh_visibility(session, [db_perm.document_id])
+    touch_documents(session, [db_perm.document_id])  # newly visible documents reach incremental exports
+    record_changes(session, "permissions_changed", [db_perm.document_id], current_user.id)
     session.commit()
     session.refresh(db_perm)
+    emit(PERMISSIONS_CHANGED, document_ids=[db_perm.document_id])
     return db_perm
 
 
@@ -26,11 +40,19 @@ def list_user_permissions(session: Session = Depends(get_session)):
 
 
 @router.post("/departments", response_model=DocumentDepartmentPermissionRead, status_code=201)
-def add_department_permission(perm: DocumentDepartmentPermissionCreate, session: Session = Depends(get_session)):
+def add_department_permission(
+    perm: DocumentDepartmentPermissionCreate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
     db_perm = DocumentDepartmentPermission(**perm.dict())
     session.add(db_perm)
+    refresh_visibility(session, [db_perm.document_id])
+    touch_documents(session, [db_perm.document_id])  # newly visible documents reach incremental exports
+    record_changes(session, "permissions_changed", [db_perm.document_id], current_user.id)
     session.commit()
     session.refresh(db_perm)
+    emit(PERMISSIONS_CHANGED, document_ids=[db_perm.document_id])
     return db_perm
 
 
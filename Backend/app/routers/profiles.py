@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from app.core.profiling import list_profiles, profile_path
+from app.routers.auth import get_current_admin_user
+
+# Only included with PROFILING_ENABLED. Profiles hold SQL parameters and paths: admins only.
+router = APIRouter(prefix="/profiles", tags=["Profiles"], dependencies=[Depends(get_current_admin_user)])
+
+
+@router.get("/")
+def get_profiles(limit: int = Query(50, ge=1, le=1000)):
+    """The newest request profiles: route, status and where the time went."""
+    return list_profiles(limit)
+
+
+@router.get("/{profile_id}")
+def get_profile(profile_id: str):
+    """One profile with its SQL timeline, repeated statements and slowest functions."""
+    path = profile_path(profile_id, ".json")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json")
+
+
+@router.get("/{profile_id}/pstats")
+def download_pstats(profile_id: str):
+    """The full cProfile data, for `python -m pstats`, snakeviz and the like (sync routes only)."""
+    path = profile_path(profile_id, ".prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail="No cProfile data for this profile")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
@@ -3,9 +3,10 @@ from sqlmodel import Session, select
 from app.db import get_session
 from app.models.roles import Role
 from app.schemas.roles import RoleCreate, RoleRead
-from app.routers.auth import get_current_user, get_current_admin_user
+from app.routers.auth import get_current_user, get_current_admin_user, invalidate_principal
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/roles", tags=["Roles"], dependencies=[Depends(get_current_user)])
+router = APIRouter(prefix="/roles", tags=["Roles"], dependencies=[Depends(get_current_user)], route_class=ProfiledRoute)
 
 
 @router.post("/", response_model=RoleRead, status_code=201, dependencies=[Depends(get_current_admin_user)])
@@ -28,4 +29,5 @@ def delete_role(role_id: int, session: Session = Depends(get_session)):
         return {"error": "Role not found"}
     session.delete(db_role)
     session.commit()
+    invalidate_principal()
     return {"message": "Role deleted successfully"}
@@ -5,11 +5,19 @@ from app.models.tags import Tag, DocumentTagLink
 from app.models.documents import Document
 from app.schemas.tags import TagCreate, TagRead
 from app.routers.auth import get_current_user
+from app.utils.search_index import index_document
+from app.utils.response_cache import response_cache
+from app.core.events import emit, TAGS_CHANGED
+from app.core.profiling import ProfiledRoute
+from app.utils.timestamps import touch_documents
+from app.utils.change_log import record_changes
+from app.models.users import User
 
 router = APIRouter(
     prefix="/tags",
     tags=["Tags"],
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_user)],
+    route_class=ProfiledRoute
 )
 
 
@@ -24,12 +32,16 @@ def create_tag(tag: TagCreate, session: Session = Depends(get_session)):
     session.add(db_tag)
     session.commit()
     session.refresh(db_tag)
+    emit(TAGS_CHANGED, document_ids=[])
     return db_tag
 
 
 @router.get("/", response_model=list[TagRead])
 def list_tags(session: Session = Depends(get_session)):
-    return session.exec(select(Tag)).all()
+    # Every user sees the same tag list
+    return response_cache.cached_json(
+        "tags", ("list", "all"), lambda: ([TagRead.model_validate(tag) for tag in session.exec(select(Tag)).all()], {})
+    )
 
 
 # Attach a tag to a document (create tag if not exists)
@@ -37,7 +49,8 @@ def list_tags(session: Session = Depends(get_session)):
 def attach_tag_to_document(
     document_id: str,
     tag: TagCreate,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
 ):
     # Find the document
     document = session.exec(select(Document).where(Document.id == document_id)).first()
@@ -51,6 +64,7 @@ def attach_tag_to_document(
         session.add(db_tag)
         session.commit()
         session.refresh(db_tag)
+        emit(TAGS_CHANGED, document_ids=[])
 
     # Check if already attached
     existing_link = session.exec(
@@ -62,7 +76,11 @@ def attach_tag_to_document(
     if not existing_link:
         link = DocumentTagLink(document_id=document_id, tag_id=db_tag.id)
         session.add(link)
+        index_document(session, document_id)
+        touch_documents(session, [document_id])
+        record_changes(session, "tags_changed", [document_id], current_user.id)
         session.commit()
+        emit(TAGS_CHANGED, document_ids=[document_id])
 
     return db_tag
 
@@ -70,20 +88,25 @@ def attach_tag_to_document(
 # Get all tags for a document
 @router.get("/document/{document_id}", response_model=list[TagRead])
 def get_document_tags(document_id: str, session: Session = Depends(get_session)):
-    document = session.exec(select(Document).where(Document.id == document_id)).first()
+    document = session.exec(select(Document.id).where(Document.id == document_id)).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Collect tags via the relationship
-    tags = [link.tag for link in document.tags]
-    return tags
+    # One join instead of loading each link's tag separately
+    return session.exec(
+        select(Tag)
+        .join(DocumentTagLink, DocumentTagLink.tag_id == Tag.id)
+        .where(DocumentTagLink.document_id == document_id)
+        .order_by(Tag.name)
+    ).all()
 
 # Remove a tag from a document
 @router.delete("/detach/{document_id}/{tag_id}", status_code=204)
 def detach_tag_from_document(
     document_id: str,
     tag_id: int,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
 ):
     link = session.exec(
         select(DocumentTagLink).where(
@@ -95,5 +118,9 @@ def detach_tag_from_document(
         raise HTTPException(status_code=404, detail="Tag not associated with document")
 
     session.delete(link)
+    index_document(session, document_id)
+    touch_documents(session, [document_id])
+    record_changes(session, "tags_changed", [document_id], current_user.id)
     session.commit()
+    emit(TAGS_CHANGED, document_ids=[document_id])
     return {"message": "Tag detached from document successfully"}
@@ -1,12 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 from app.db import get_session
+from app.models.permissions import DocumentUserPermission
 from app.models.users import User
 from app.schemas.users import UserCreate, UserRead, UserUpdate
 from app.utils.security import hash_password
-from app.routers.auth import get_current_user, get_current_admin_user
+from app.routers.auth import get_current_user, get_current_admin_user, invalidate_principal
+from app.utils.access_control import is_admin
+from app.utils.search_index import reindex_uploader
+from app.utils.visibility_index import refresh_uploader_visibility, refresh_visibility
+from app.utils.timestamps import touch_documents
+from app.utils.change_log import record_changes
+from app.utils.refresh_tokens import delete_user_refresh_tokens
+from app.core.events import emit, PERMISSIONS_CHANGED, USERS_CHANGED
+from app.core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/users", tags=["Users"], dependencies=[Depends(get_current_user)])
+router = APIRouter(prefix="/users", tags=["Users"], dependencies=[Depends(get_current_user)], route_class=ProfiledRoute)
 
 
 @router.post("/", response_model=UserRead, status_code=201)
@@ -38,22 +47,55 @@ def get_user(user_id: str, session: Session = Depends(get_session)):
 
 
 @router.patch("/{user_id}", response_model=UserRead)
-def update_user(user_id: str, data: UserUpdate, session: Session = Depends(get_session)):
+def update_user(
+    user_id: str,
+    data: UserUpdate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
     user = session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    moved = data.department_id is not None and data.department_id != user.department_id
+    if moved and not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Only admins can move users between departments")
     for field, value in data.dict(exclude_unset=True).items():
         setattr(user, field, value)
     session.add(user)
+    if data.full_name is not None:
+        reindex_uploader(session, user)
+    if moved:
+        document_ids = refresh_uploader_visibility(session, user)
+        touch_documents(session, document_ids)
+        record_changes(session, "permissions_changed", document_ids, current_user.id)
     session.commit()
+    invalidate_principal(user_id)
+    emit(USERS_CHANGED, user_ids=[user_id])
     session.refresh(user)
     return user
 
 @router.delete("/{user_id}", status_code=204, dependencies=[Depends(get_current_admin_user)])
-def delete_user(user_id: str, session: Session = Depends(get_session)):
+def delete_user(
+    user_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
     db_user = session.get(User, user_id)
     if not db_user:
         return {"error": "User not found"}
+    # Documents shared with the user lose that grant
+    grants = session.exec(select(DocumentUserPermission).where(DocumentUserPermission.user_id == user_id)).all()
+    document_ids = sorted({grant.document_id for grant in grants})
+    for grant in grants:
+        session.delete(grant)
+    delete_user_refresh_tokens(session, user_id)
     session.delete(db_user)
+    refresh_visibility(session, document_ids)
+    touch_documents(session, document_ids)
+    record_changes(session, "permissions_changed", document_ids, current_user.id)
     session.commit()
+    invalidate_principal(user_id)
+    emit(USERS_CHANGED, user_ids=[user_id])
+    if document_ids:
+        emit(PERMISSIONS_CHANGED, document_ids=document_ids)
     return {"message": "User deleted successfully"}
\ No newline at end of file
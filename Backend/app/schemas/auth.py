@@ -4,6 +4,12 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: int  # seconds the access token is valid; then trade refresh_token for a new pair
+    refresh_token: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -0,0 +1,15 @@
+from typing import Optional
+from sqlmodel import SQLModel
+
+
+class ChangeRead(SQLModel):
+    seq: int
+    document_id: str
+    kind: str
+    changed_at: str
+    changed_by: Optional[str] = None
+
+
+class ChangeFeed(SQLModel):
+    changes: list[ChangeRead]
+    next_since: int  # pass as `since` on the next call
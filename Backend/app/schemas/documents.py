@@ -2,6 +2,8 @@ from typing import Optional
 from sqlmodel import SQLModel, Field
 from fastapi import UploadFile, Form
 
+from app.schemas.tags import TagRead
+
 
 class DocumentBase(SQLModel):
     title: str
@@ -18,6 +20,7 @@ class DocumentRead(DocumentBase):
     id: str
     current_version_id: Optional[str] = None
     created_at: Optional[str] = None  # ISO format datetime string
+    updated_at: Optional[str] = None
 
 
 class DocumentUpdate(SQLModel):
@@ -26,6 +29,29 @@ class DocumentUpdate(SQLModel):
     access_level: Optional[str] = None
 
 
+# Batch upload
+class BatchItemMetadata(SQLModel):
+    """Per-file metadata for POST /documents/batch; title defaults to the file name."""
+    title: Optional[str] = None
+    description: str = ""
+    access_level: str = "public"
+    tags: list[str] = []
+
+
+class BatchItemResult(SQLModel):
+    index: int
+    filename: str
+    status: str  # created | failed
+    document: Optional[DocumentRead] = None
+    detail: Optional[str] = None
+
+
+class BatchUploadResult(SQLModel):
+    created: int
+    failed: int
+    results: list[BatchItemResult]
+
+
 # Versions
 class DocumentVersionBase(SQLModel):
     file_path: str
@@ -44,6 +70,46 @@ class DocumentVersionRead(DocumentVersionBase):
     uploaded_at: Optional[str] = None
 
 
+# Expanded reads (built by app.utils.eager_loading from eagerly loaded documents)
+class DocumentListItem(DocumentRead):
+    uploader_name: Optional[str] = None
+    tags: list[str] = []
+
+
+class ContentMatch(SQLModel):
+    """Where a field=content search matched; snippet is HTML-escaped with <mark> around hits."""
+    version_id: str
+    page: int  # 1-based
+    snippet: str
+
+
+class DocumentSearchItem(DocumentListItem):
+    match: Optional[ContentMatch] = None
+
+
+class UploaderRead(SQLModel):
+    id: str
+    full_name: str
+    email: str
+    department_id: int
+    department_name: Optional[str] = None
+
+
+class DocumentDetailRead(DocumentRead):
+    """Everything the document page shows, in one response."""
+    uploader: Optional[UploaderRead] = None
+    tags: list[TagRead] = []
+    current_version: Optional[DocumentVersionRead] = None
+    versions: list[DocumentVersionRead] = []
+
+
+class DocumentExportItem(DocumentRead):
+    """One line of GET /documents/export."""
+    uploader_id: str
+    tags: list[str] = []
+    versions: list[DocumentVersionRead] = []
+
+
 # Use this for FastAPI form parsing
 def as_form(file: UploadFile = Form(...)):
     return {"file": file}
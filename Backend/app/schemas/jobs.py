@@ -0,0 +1,24 @@
+from typing import Optional
+from sqlmodel import SQLModel
+
+
+class JobRead(SQLModel):
+    id: int
+    kind: str
+    payload: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_after: str
+    document_id: Optional[str] = None
+    locked_by: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: str
+    finished_at: Optional[str] = None
+
+
+class JobStats(SQLModel):
+    kind: str
+    status: str
+    count: int
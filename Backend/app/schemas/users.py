@@ -22,3 +22,4 @@ class UserRead(UserBase):
 class UserUpdate(SQLModel):
     full_name: Optional[str] = None
     password: Optional[str] = None
+    department_id: Optional[int] = None  # admins only
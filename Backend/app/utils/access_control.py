@@ -0,0 +1,118 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, exists, or_, true
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.models.documents import Document
+from app.models.permissions import DocumentUserPermission, DocumentDepartmentPermission
+from app.models.users import User
+from app.core.config import settings
+from app.utils.visibility_index import materialized_visibility_clause
+
+
+def is_admin(user: User) -> bool:
+    """Admins can access every document."""
+    return bool(user.role and user.role.name.lower() == "admin")
+
+
+def can_access_document(user: User, document: Document, session: Session) -> bool:
+    """Check if a user can access a given document."""
+    if is_admin(user):
+        return True  # admins can access everything
+
+    if document.access_level == "public":
+        return True
+
+    if document.access_level == "department":
+        if user.department_id == document.uploader.department_id:
+            return True
+        dept_perm = session.exec(
+            select(DocumentDepartmentPermission).where(
+                DocumentDepartmentPermission.document_id == document.id,
+                DocumentDepartmentPermission.department_id == user.department_id
+            )
+        ).first()
+        if dept_perm:
+            return True
+
+    if document.access_level == "private":
+        if document.uploader_id == user.id:
+            return True
+        user_perm = session.exec(
+            select(DocumentUserPermission).where(
+                DocumentUserPermission.document_id == document.id,
+                DocumentUserPermission.user_id == user.id
+            )
+        ).first()
+        if user_perm:
+            return True
+
+    return False
+
+
+def visible_documents_clause(user: User):
+    """
+    SQL form of `can_access_document`, usable in any query selecting from `Document`.
+    Must be kept in sync with the Python rules above (and with app.utils.visibility_index).
+    """
+    if is_admin(user):
+        return true()
+    if settings.MATERIALIZED_ACL:
+        return materialized_visibility_clause(user)
+
+    uploader = aliased(User)
+    same_department = exists(
+        select(uploader.id).where(
+            uploader.id == Document.uploader_id,
+            uploader.department_id == user.department_id,
+        )
+    )
+    department_grant = exists(
+        select(DocumentDepartmentPermission.id).where(
+            DocumentDepartmentPermission.document_id == Document.id,
+            DocumentDepartmentPermission.department_id == user.department_id,
+        )
+    )
+    user_grant = exists(
+        select(DocumentUserPermission.id).where(
+            DocumentUserPermission.document_id == Document.id,
+            DocumentUserPermission.user_id == user.id,
+        )
+    )
+
+    return or_(
+        Document.access_level == "public",
+        and_(Document.access_level == "department", or_(same_department, department_grant)),
+        and_(Document.access_level == "private", or_(Document.uploader_id == user.id, user_grant)),
+    )
+
+
+def accessible_documents(user: User):
+    """Base `select(Document)` restricted to what the user may see."""
+    return select(Document).where(visible_documents_clause(user))
+
+
+def get_accessible_document(
+    doc_id: str, user: User, session: Session, not_found_detail: str = "Document not found", options=()
+) -> Document:
+    """
+    Load a document and check access in a single query.
+    Raises 404 if the document doesn't exist and 403 if the user can't see it.
+    `options` are loader options (see app.utils.eager_loading) applied to the lookup.
+    """
+    return get_accessible_document_where(Document.id == doc_id, user, session, not_found_detail, options)
+
+
+def get_accessible_document_where(
+    criterion, user: User, session: Session, not_found_detail: str = "Document not found", options=()
+) -> Document:
+    """Same as `get_accessible_document` for an arbitrary lookup criterion."""
+    row = session.exec(
+        select(Document, visible_documents_clause(user).label("visible")).where(criterion).options(*options)
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+    doc, visible = row
+    if not visible:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return doc
@@ -0,0 +1,64 @@
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.models.documents import Document, DocumentVersion
+from app.models.tags import Tag, DocumentTagLink
+from app.utils.search_index import index_documents
+from app.utils.timestamps import utc_now
+from app.utils.change_log import record_changes
+from app.utils.post_upload import enqueue_post_upload
+from app.utils.visibility_index import refresh_visibility
+
+
+# Shared by POST /documents/batch and the offline import tool (app/db/bulk_transfer.py).
+# Rows are plain dicts so they go through executemany without building ORM objects.
+def ensure_tags(session: Session, names: set[str]) -> dict[str, int]:
+    """Tag ids by name, creating the missing tags with one bulk insert (commits)."""
+    if not names:
+        return {}
+    existing = dict(session.exec(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    missing = names - existing.keys()
+    if missing:
+        try:
+            session.exec(insert(Tag), params=[{"name": name} for name in sorted(missing)])
+            session.commit()
+        except IntegrityError:
+            session.rollback()  # some were created concurrently; the select below picks them up
+        existing = dict(session.exec(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    return existing
+
+
+def insert_documents(session: Session, documents: list[dict], versions: list[dict], links: list[dict]):
+    """
+    Bulk-insert documents, their versions and tag links, point each document at its highest
+    version, update the search and visibility indexes, queue post-upload processing and log the
+    creations. Ids must be set by the caller. Doesn't commit; the caller should commit right
+    after (see record_changes).
+    """
+    if not documents:
+        return
+    now = utc_now()
+    session.exec(insert(Document), params=[
+        {"updated_at": now, **doc, "current_version_id": None} for doc in documents
+    ])
+    if versions:
+        session.exec(insert(DocumentVersion), params=versions)
+        current = {}
+        for ver in versions:
+            if ver["version_number"] >= current.get(ver["document_id"], ver)["version_number"]:
+                current[ver["document_id"]] = ver
+        # documents and document_versions reference each other: the pointer is set after both exist
+        session.exec(update(Document), params=[
+            {"id": document_id, "current_version_id": ver["id"]} for document_id, ver in current.items()
+        ])
+    if links:
+        session.exec(insert(DocumentTagLink), params=links)
+    index_documents(session, [doc["id"] for doc in documents])
+    refresh_visibility(session, [doc["id"] for doc in documents])
+    enqueue_post_upload(session, versions)
+    by_uploader = {}
+    for doc in documents:
+        by_uploader.setdefault(doc["uploader_id"], []).append(doc["id"])
+    for uploader_id, document_ids in by_uploader.items():
+        record_changes(session, "created", document_ids, uploader_id)
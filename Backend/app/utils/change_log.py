@@ -0,0 +1,47 @@
+from typing import Optional
+
+from sqlalchemy import func, insert, text
+from sqlmodel import Session, select
+
+from app.models.changes import DeletedDocumentVisibility, DocumentChange
+from app.models.documents import Document
+from app.utils.timestamps import utc_now
+from app.utils.visibility_index import visibility_rows
+
+# Sequence numbers must become visible in order, or a reader that already moved past seq 11
+# would never see seq 10 committing late. SQLite has one writer at a time, so that holds
+# already; Postgres hands out sequence values before commit, so writers of change rows are
+# serialized with a transaction-scoped advisory lock (released at commit / rollback).
+CHANGE_LOG_LOCK_KEY = 0x6368616E  # "chan"
+
+
+def record_changes(session: Session, kind: str, document_ids: list[str], user_id: Optional[str] = None):
+    """
+    Append one change per document. Call as the last step before commit: on Postgres it takes
+    the change log lock until the transaction ends.
+    """
+    if not document_ids:
+        return
+    if session.get_bind().dialect.name == "postgresql":
+        session.exec(text("SELECT pg_advisory_xact_lock(:key)").bindparams(key=CHANGE_LOG_LOCK_KEY))
+    now = utc_now()
+    session.exec(insert(DocumentChange), params=[
+        {"document_id": document_id, "kind": kind, "changed_at": now, "changed_by": user_id}
+        for document_id in document_ids
+    ])
+
+
+def record_deletion_visibility(session: Session, document_id: str):
+    """
+    Keep who can see a document for its "deleted" change. Call while the document and its
+    permissions still exist, before deleting them.
+    """
+    session.exec(
+        insert(DeletedDocumentVisibility).from_select(
+            ["document_id", "principal"], visibility_rows(Document.id == document_id)
+        )
+    )
+
+
+def latest_seq(session: Session) -> int:
+    return session.exec(select(func.max(DocumentChange.seq))).one() or 0
@@ -0,0 +1,48 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.documents import Document
+from app.models.tags import DocumentTagLink
+from app.models.users import User
+from app.schemas.documents import DocumentListItem, DocumentDetailRead, DocumentVersionRead, UploaderRead
+from app.schemas.tags import TagRead
+
+
+# Loader options per response shape. Relationships are lazy by default, so serializing a
+# document's uploader or tags without these costs one query per document (or per tag).
+# Many-to-one: joinedload (same query). Collections: selectinload (one extra query per page).
+LIST_OPTIONS = (
+    joinedload(Document.uploader),
+    selectinload(Document.tags).joinedload(DocumentTagLink.tag),
+)
+DETAIL_OPTIONS = (
+    joinedload(Document.uploader).joinedload(User.department),
+    selectinload(Document.tags).joinedload(DocumentTagLink.tag),
+    selectinload(Document.versions),
+)
+
+
+def document_list_item(doc: Document) -> DocumentListItem:
+    """Expects LIST_OPTIONS (or DETAIL_OPTIONS) to have been applied."""
+    return DocumentListItem.model_validate(doc, update={
+        "uploader_name": doc.uploader.full_name if doc.uploader else None,
+        "tags": sorted(link.tag.name for link in doc.tags),
+    })
+
+
+def document_detail(doc: Document) -> DocumentDetailRead:
+    """Expects DETAIL_OPTIONS to have been applied."""
+    uploader = doc.uploader
+    versions = sorted(doc.versions, key=lambda ver: ver.version_number)
+    current = next((ver for ver in versions if ver.id == doc.current_version_id), versions[-1] if versions else None)
+    return DocumentDetailRead.model_validate(doc, update={
+        "uploader": uploader and UploaderRead(
+            id=uploader.id,
+            full_name=uploader.full_name,
+            email=uploader.email,
+            department_id=uploader.department_id,
+            department_name=uploader.department.name if uploader.department else None,
+        ),
+        "tags": sorted((TagRead(id=link.tag.id, name=link.tag.name) for link in doc.tags), key=lambda tag: tag.name),
+        "current_version": current and DocumentVersionRead.model_validate(current),
+        "versions": [DocumentVersionRead.model_validate(ver) for ver in versions],
+    })
@@ -0,0 +1,367 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import AsyncIterator, BinaryIO, Optional
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from sqlmodel import Session, select, func
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import UPLOAD_SIZE
+from app.models.documents import Document, DocumentVersion
+
+
+# Paths stored on Document/DocumentVersion are relative to the storage root (Backend/ by default)
+STORAGE_ROOT = os.path.abspath(settings.STORAGE_ROOT)
+BLOB_PREFIX = "Documents/blobs"
+BLOB_DIR = os.path.join(STORAGE_ROOT, BLOB_PREFIX)
+PARTIAL_DIR = os.path.join(BLOB_DIR, "partial")
+CHUNK_SIZE = 1024 * 1024
+
+
+def resolve_path(relative_path: str) -> str:
+    """Absolute on-disk location of a stored file path."""
+    return os.path.abspath(os.path.join(STORAGE_ROOT, relative_path))
+
+
+# ================================================================================================
+#                                  Content-addressed blobs
+# ================================================================================================
+# Files are stored once per (sha256, extension) under Documents/blobs/<aa>/<bb>/<sha256><ext>.
+# Documents and versions reference a blob through their file_path, so the reference count of a
+# blob is simply the number of rows pointing at it; nothing else needs to be kept in sync.
+def blob_path(digest: str, ext: str = "") -> str:
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+
+def is_blob_path(relative_path: str) -> bool:
+    return relative_path.startswith(BLOB_PREFIX + "/")
+
+
+def blob_digest(relative_path: str) -> str:
+    """sha256 of a blob, recovered from its path."""
+    return os.path.splitext(os.path.basename(relative_path))[0]
+
+
+class PendingBlob:
+    """
+    A blob placed in the store whose referencing rows are not committed yet (two-phase write).
+
+    Placing the file is phase one: it is hard-linked to its content address while a second
+    link ("hold") stays in tmp/. The caller then inserts the rows and commits (phase two) and
+    calls `keep()`, or `discard()` if the transaction failed. The hold restores the blob if a
+    concurrent delete released it in between; after a crash, the leftover hold and the
+    unreferenced blob are both swept by `collect_garbage`.
+    """
+
+    def __init__(self, path: str, sha256: str, size: int, hold_path: str):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self._hold_path = hold_path
+
+    def keep(self):
+        final_path = resolve_path(self.path)
+        if os.path.exists(final_path):
+            os.remove(self._hold_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(self._hold_path, final_path)
+
+    def discard(self, session: Session):
+        if os.path.exists(self._hold_path):
+            os.remove(self._hold_path)
+        release_blob(session, self.path)
+
+
+@contextmanager
+def pending_blob(session: Session, blob: PendingBlob):
+    """
+    Commit the rows referencing `blob` inside this block; the file is kept only if that worked.
+        with pending_blob(session, blob) as path:
+            session.add(Document(file_path=path, ...))
+            session.commit()
+    """
+    with pending_blobs(session, [blob]) as paths:
+        yield paths[0]
+
+
+@contextmanager
+def pending_blobs(session: Session, blobs: list[PendingBlob]):
+    """`pending_blob` for several blobs committed by the same transaction."""
+    try:
+        yield [blob.path for blob in blobs]
+    except BaseException:
+        session.rollback()
+        for blob in blobs:
+            blob.discard(session)
+        raise
+    for blob in blobs:
+        blob.keep()
+
+
+def store_blob(src: BinaryIO, ext: str = "", max_size: Optional[int] = None) -> PendingBlob:
+    """
+    Copy `src` into the blob store in fixed-size chunks, hashing and counting as it goes.
+    Identical content is stored only once. Raises 413 as soon as more than `max_size`
+    bytes have been read.
+    """
+    os.makedirs(os.path.join(BLOB_DIR, "tmp"), exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.join(BLOB_DIR, "tmp"))
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise HTTPException(status_code=413, detail="File too large")
+                digest.update(chunk)
+                dst.write(chunk)
+        relative_path = _place_blob(tmp_path, digest.hexdigest(), ext)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    UPLOAD_SIZE.observe(size)
+    return PendingBlob(relative_path, digest.hexdigest(), size, tmp_path)
+
+
+def _place_blob(tmp_path: str, digest: str, ext: str) -> str:
+    """Link a fully written temp file to its content address, keeping the temp file as the hold."""
+    relative_path = blob_path(digest, ext)
+    final_path = resolve_path(relative_path)
+    if not os.path.exists(final_path):
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        try:
+            os.link(tmp_path, final_path)
+        except FileExistsError:
+            pass  # stored concurrently
+        except OSError:
+            # No hard links on this filesystem: place a copy
+            shutil.copyfile(tmp_path, final_path + ".part")
+            os.replace(final_path + ".part", final_path)
+    return relative_path
+
+
+# ================================================================================================
+#                                  Serving with validators
+# ================================================================================================
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def file_etag(relative_path: str, abs_path: str) -> str:
+    """Strong ETag from the content hash for blobs; weak size/mtime tag for legacy files."""
+    if is_blob_path(relative_path):
+        return f'"{blob_digest(relative_path)}"'
+    stat = os.stat(abs_path)
+    return f'W/"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def _http_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a stored timestamp ("YYYY-MM-DD HH:MM:SS", UTC) to a second-precision datetime."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.replace(microsecond=0)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def serve_file(
+    request: Request,
+    relative_path: str,
+    modified_at: Optional[str] = None,
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None,
+    inline: bool = False,
+    immutable: bool = False,
+) -> Response:
+    """
+    FileResponse with ETag / Last-Modified validators, 304 handling and Cache-Control.
+    Byte ranges (206, If-Range) are handled by FileResponse using these same validators.
+    """
+    abs_path = resolve_path(relative_path)
+    etag = file_etag(relative_path, abs_path)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
+    last_modified = _http_date(modified_at)
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None and (if_modified_since := request.headers.get("if-modified-since")):
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and since.tzinfo is not None and last_modified <= since:
+            return Response(status_code=304, headers=headers)
+
+    if inline:
+        headers["Content-Disposition"] = "inline"
+    return FileResponse(abs_path, media_type=media_type, filename=filename, headers=headers)
+
+
+def blob_references(session: Session, relative_path: str) -> int:
+    documents = session.exec(select(func.count(Document.id)).where(Document.file_path == relative_path)).one()
+    versions = session.exec(
+        select(func.count(DocumentVersion.id)).where(DocumentVersion.file_path == relative_path)
+    ).one()
+    return documents + versions
+
+
+def release_blob(session: Session, relative_path: str) -> bool:
+    """
+    Delete a blob once no document or version references it.
+    Call after the deleting transaction has committed. Returns True if the file was removed.
+    """
+    if not is_blob_path(relative_path) or blob_references(session, relative_path):
+        return False
+    try:
+        os.remove(resolve_path(relative_path))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def collect_garbage(session: Session, min_age_seconds: int = 3600) -> list[str]:
+    """
+    Sweep the whole store for unreferenced blobs and stale temp files (e.g. left by a crash).
+    Files younger than `min_age_seconds` are skipped: they may belong to an upload whose
+    transaction hasn't committed yet.
+    """
+    referenced = set(session.exec(select(Document.file_path)).all())
+    referenced.update(session.exec(select(DocumentVersion.file_path)).all())
+    cutoff = time.time() - min_age_seconds
+    removed = []
+    for root, dirs, files in os.walk(BLOB_DIR):
+        if root == BLOB_DIR:
+            # Resumable uploads expire separately; renditions are bounded by their own quota
+            dirs[:] = [d for d in dirs if d not in ("partial", "renditions")]
+        for name in files:
+            full_path = os.path.join(root, name)
+            relative_path = os.path.relpath(full_path, STORAGE_ROOT).replace(os.sep, "/")
+            if relative_path in referenced or os.path.getmtime(full_path) > cutoff:
+                continue
+            os.remove(full_path)
+            removed.append(relative_path)
+
+    session_cutoff = time.time() - settings.UPLOAD_SESSION_TTL_SECONDS
+    if os.path.isdir(PARTIAL_DIR):
+        for upload_id in os.listdir(PARTIAL_DIR):
+            if os.path.getmtime(os.path.join(PARTIAL_DIR, upload_id)) < session_cutoff:
+                abort_partial_upload(upload_id)
+                removed.append(f"{BLOB_PREFIX}/partial/{upload_id}")
+    return removed
+
+
+# ================================================================================================
+#                                    Resumable uploads
+# ================================================================================================
+# A resumable upload is a directory under Documents/blobs/partial/<upload_id> holding the bytes
+# received so far and a small meta.json. Chunks must arrive in order; a client that lost its
+# connection asks for the received size and continues from there.
+def _partial_dir(upload_id: str) -> str:
+    try:
+        uuid.UUID(upload_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return os.path.join(PARTIAL_DIR, upload_id)
+
+
+def start_partial_upload(owner_id: str, filename: str) -> str:
+    upload_id = str(uuid.uuid4())
+    directory = _partial_dir(upload_id)
+    os.makedirs(directory)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({"owner_id": owner_id, "filename": filename}, f)
+    open(os.path.join(directory, "data"), "wb").close()
+    return upload_id
+
+
+def partial_upload_meta(upload_id: str, owner_id: str) -> dict:
+    """Metadata of an upload session; 404 if it doesn't exist or belongs to someone else."""
+    try:
+        with open(os.path.join(_partial_dir(upload_id), "meta.json")) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if meta["owner_id"] != owner_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    meta["received"] = os.path.getsize(os.path.join(_partial_dir(upload_id), "data"))
+    return meta
+
+
+async def append_partial_upload(
+    upload_id: str, offset: int, chunks: AsyncIterator[bytes], max_size: int
+) -> int:
+    """
+    Append a streamed chunk at `offset` (must equal the bytes received so far).
+    Called from an async route: every file operation is pushed to the threadpool.
+    """
+    data_path = os.path.join(_partial_dir(upload_id), "data")
+    received = await run_in_threadpool(os.path.getsize, data_path)
+    if offset != received:
+        raise HTTPException(status_code=409, detail=f"Expected offset {received}")
+    await run_in_threadpool(os.utime, os.path.dirname(data_path))  # keeps an active session from expiring
+    dst = await run_in_threadpool(open, data_path, "ab")
+    try:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_size:
+                await run_in_threadpool(dst.truncate, offset)
+                raise HTTPException(status_code=413, detail="File too large")
+            await run_in_threadpool(dst.write, chunk)
+    finally:
+        await run_in_threadpool(dst.close)
+    return received
+
+
+def finish_partial_upload(upload_id: str, ext: str) -> PendingBlob:
+    """Hash the assembled file and place it in the blob store, like store_blob."""
+    directory = _partial_dir(upload_id)
+    data_path = os.path.join(directory, "data")
+    digest = hashlib.sha256()
+    with open(data_path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    size = os.path.getsize(data_path)
+    os.makedirs(os.path.join(BLOB_DIR, "tmp"), exist_ok=True)
+    hold_path = os.path.join(BLOB_DIR, "tmp", f"partial-{upload_id}")
+    os.replace(data_path, hold_path)
+    shutil.rmtree(directory, ignore_errors=True)
+    relative_path = _place_blob(hold_path, digest.hexdigest(), ext)
+    UPLOAD_SIZE.observe(size)
+    return PendingBlob(relative_path, digest.hexdigest(), size, hold_path)
+
+
+def abort_partial_upload(upload_id: str):
+    shutil.rmtree(_partial_dir(upload_id), ignore_errors=True)
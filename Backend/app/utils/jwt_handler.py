@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from app.core.config import settings
@@ -7,8 +8,9 @@ from typing import Optional
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -19,3 +21,42 @@ def decode_access_token(token: str):
         return payload
     except JWTError:
         return None
+
+
+# ================================================================================================
+#                                       Claims
+# ================================================================================================
+@dataclass(frozen=True)
+class ClaimedRole:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """
+    The user an access token was issued to, as its claims describe them: what access control
+    reads (id, role, department) and nothing else. Stands in for the `User` row on requests.
+    """
+    id: str
+    role_id: int
+    department_id: int
+    role: Optional[ClaimedRole]
+
+
+def user_claims(user) -> dict:
+    """Access token claims for `user` (role loaded)."""
+    return {
+        "sub": user.id,
+        "role_id": user.role_id,
+        "role": user.role.name if user.role else None,
+        "department_id": user.department_id,
+    }
+
+
+def principal_from_claims(payload: dict) -> Optional[TokenPrincipal]:
+    """None for tokens issued without the role and department claims."""
+    if "role_id" not in payload or "department_id" not in payload:
+        return None
+    role = ClaimedRole(payload["role_id"], payload["role"]) if payload.get("role") is not None else None
+    return TokenPrincipal(payload["sub"], payload["role_id"], payload["department_id"], role)
@@ -0,0 +1,115 @@
+import base64
+import json
+import time
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.engine import Row
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.core.events import subscribe, DOCUMENTS_CHANGED, PERMISSIONS_CHANGED, USERS_CHANGED
+from app.models.documents import Document
+
+
+# ================================================================================================
+#                                      Keyset cursors
+# ================================================================================================
+def encode_cursor(doc: Document, rank: Optional[float] = None) -> str:
+    """Opaque cursor pointing just after `doc` in ([rank,] created_at, id) order."""
+    key = [doc.created_at, doc.id] if rank is None else [doc.created_at, doc.id, rank]
+    raw = json.dumps(key).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, list) or len(key) not in (2, 3):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def newest_first(query):
+    """Stable ordering used by every paginated document listing."""
+    return query.order_by(Document.created_at.desc(), Document.id.desc())
+
+
+def paginate(query, limit: Optional[int], offset: int = 0, cursor: Optional[str] = None, rank=None):
+    """
+    Apply ordering plus either keyset (`cursor`) or LIMIT/OFFSET pagination.
+    With `rank` (lower is better) results are ordered by relevance first.
+    One extra row is fetched so callers can tell whether a next page exists.
+    """
+    if rank is not None:
+        query = query.order_by(rank.asc())
+    query = newest_first(query)
+    if cursor:
+        key = decode_cursor(cursor)
+        if (rank is not None) != (len(key) == 3):
+            raise HTTPException(status_code=400, detail="Cursor does not match this query")
+        after = tuple_(Document.created_at, Document.id) < tuple_(key[0], key[1])
+        if rank is not None:
+            after = or_(rank > key[2], and_(rank == key[2], after))
+        query = query.where(after)
+    elif offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def split_page(rows: list, limit: Optional[int]) -> tuple[list, Optional[str]]:
+    """
+    Trim the look-ahead row and build the cursor for the next page.
+    Rows are documents, or (document, rank) pairs for ranked queries.
+    """
+    more = limit is not None and len(rows) > limit
+    if more:
+        rows = rows[:limit]
+    ranked = bool(rows) and isinstance(rows[0], Row)
+    docs = [row[0] for row in rows] if ranked else list(rows)
+    if not more:
+        return docs, None
+    return docs, encode_cursor(docs[-1], rows[-1][1] if ranked else None)
+
+
+# ================================================================================================
+#                                        Totals
+# ================================================================================================
+_count_cache: dict[tuple, tuple[float, int]] = {}
+
+
+def count_rows(session: Session, query, cache_key: Optional[tuple] = None) -> int:
+    """
+    Run a separate COUNT over `query`, optionally memoized for COUNT_CACHE_TTL_SECONDS.
+    Totals are informational, so a briefly stale value is acceptable.
+    """
+    now = time.monotonic()
+    if cache_key is not None:
+        hit = _count_cache.get(cache_key)
+        if hit and hit[0] > now:
+            return hit[1]
+
+    total = session.exec(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    ).one()
+
+    if cache_key is not None and settings.COUNT_CACHE_TTL_SECONDS > 0:
+        if len(_count_cache) >= settings.COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.clear()
+        _count_cache[cache_key] = (now + settings.COUNT_CACHE_TTL_SECONDS, total)
+    return total
+
+
+@subscribe(DOCUMENTS_CHANGED, PERMISSIONS_CHANGED, USERS_CHANGED)
+def invalidate_counts(event=None, **payload):
+    """
+    Drop memoized totals after documents are created, deleted or shared, and when users change
+    (a department move or deletion changes what is visible); the same events as the response cache.
+    """
+    _count_cache.clear()
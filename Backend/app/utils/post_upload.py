@@ -0,0 +1,73 @@
+import hashlib
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.jobs import PRIORITY_LOW, PRIORITY_NORMAL, enqueue, job_handler
+from app.db import engine
+from app.models.documents import DocumentVersion
+from app.utils.file_handler import blob_digest, is_blob_path, resolve_path
+from app.utils.text_extraction import extract_version
+
+# Processing that follows every new version (checksums, text extraction, and later thumbnails...)
+# runs as background jobs so uploads return as soon as the bytes are stored. Stages register
+# with @post_upload_stage; the upload paths call enqueue_post_upload in their transaction.
+_stages: list[tuple[str, int]] = []
+
+
+def post_upload_stage(kind: str, priority: int, enabled: bool = True):
+    """Register a job handler that runs once for every new version, with payload
+    {"document_id", "version_id", "file_path"}. Disabled stages aren't queued, but jobs already
+    queued still run."""
+    def register(handler):
+        if enabled:
+            _stages.append((kind, priority))
+        return job_handler(kind)(handler)
+    return register
+
+
+def enqueue_post_upload(session: Session, versions: list[dict]):
+    """Queue every stage for the given version rows (dicts or DocumentVersion). Doesn't commit."""
+    payloads = [
+        {"document_id": ver["document_id"], "version_id": ver["id"], "file_path": ver["file_path"]}
+        for ver in (ver if isinstance(ver, dict) else ver.model_dump() for ver in versions)
+    ]
+    for kind, priority in _stages:
+        enqueue(session, kind, payloads, priority)
+
+
+def _current_version(payload: dict) -> bool:
+    """Stages skip versions deleted before they got to run."""
+    with Session(engine) as session:
+        return session.get(DocumentVersion, payload["version_id"]) is not None
+
+
+# ================================================================================================
+#                                         Stages
+# ================================================================================================
+@post_upload_stage("blob.verify", PRIORITY_LOW, enabled=settings.VERIFY_UPLOADED_BLOBS)
+def verify_blob(payload: dict):
+    """
+    Re-read a stored blob and check it still matches the checksum in its name. A second full read
+    of every upload (store_blob hashed it while writing), so only queued with VERIFY_UPLOADED_BLOBS.
+    """
+    path = payload["file_path"]
+    if not is_blob_path(path) or not _current_version(payload):
+        return
+    digest = hashlib.sha256()
+    with open(resolve_path(path), "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    if digest.hexdigest() != blob_digest(path):
+        raise ValueError(f"{path} does not match its checksum")
+
+
+@post_upload_stage("text.extract", PRIORITY_NORMAL)
+def extract_version_text(payload: dict):
+    """Index the version's text for field=content search (see app.utils.text_extraction)."""
+    if not _current_version(payload):
+        return
+    version = {"id": payload["version_id"], "document_id": payload["document_id"], "file_path": payload["file_path"]}
+    with Session(engine) as session:
+        extract_version(session, version)
+        session.commit()
@@ -0,0 +1,96 @@
+import hashlib
+import secrets
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.metrics import AUTH_FAILURES
+from app.models.refresh_tokens import RefreshToken
+from app.utils.timestamps import utc_in, utc_now
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _new_token(user_id: str, family_id: str) -> tuple[RefreshToken, str]:
+    token = secrets.token_urlsafe(32)
+    row = RefreshToken(
+        id=str(uuid.uuid4()),
+        token_hash=_digest(token),
+        user_id=user_id,
+        family_id=family_id,
+        created_at=utc_now(),
+        expires_at=utc_in(settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60),
+    )
+    return row, token
+
+
+def _invalid() -> HTTPException:
+    AUTH_FAILURES.labels("invalid_refresh_token").inc()
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+
+def issue_refresh_token(session: Session, user_id: str) -> str:
+    """
+    Start a new family (a login) with its first refresh token; commit to keep it. The user's
+    expired tokens are dropped on the way.
+    """
+    session.exec(delete(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.expires_at <= utc_now()))
+    row, token = _new_token(user_id, str(uuid.uuid4()))
+    session.add(row)
+    return token
+
+
+def rotate_refresh_token(session: Session, token: str) -> tuple[str, str]:
+    """
+    Spend a refresh token: returns (user id, the token replacing it); commit to keep it. Unknown,
+    expired and revoked tokens get 401. A token that was already spent has been copied, and
+    there's no telling which holder is legitimate, so its whole family is revoked.
+    """
+    row = session.exec(select(RefreshToken).where(RefreshToken.token_hash == _digest(token))).first()
+    if row is None or row.revoked_at is not None or row.expires_at <= utc_now():
+        raise _invalid()
+
+    replacement, new_token = _new_token(row.user_id, row.family_id)
+    # Conditional, so of two requests racing with the same token only one gets a replacement
+    spent = session.exec(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.replaced_by.is_(None))
+        .values(replaced_by=replacement.id)
+    )
+    if spent.rowcount != 1:
+        _revoke_family(session, row.family_id)
+        session.commit()
+        AUTH_FAILURES.labels("refresh_token_reused").inc()
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    session.add(replacement)
+    return row.user_id, new_token
+
+
+def revoke_refresh_token(session: Session, token: str) -> bool:
+    """Revoke the family of `token` (logout); commit to keep it. False if the token is unknown."""
+    family_id: Optional[str] = session.exec(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == _digest(token))
+    ).first()
+    if family_id is None:
+        return False
+    _revoke_family(session, family_id)
+    return True
+
+
+def delete_user_refresh_tokens(session: Session, user_id: str):
+    """Before deleting a user."""
+    session.exec(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+
+
+def _revoke_family(session: Session, family_id: str):
+    session.exec(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=utc_now())
+    )
@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.utils.file_handler import BLOB_DIR, BLOB_PREFIX, blob_digest, is_blob_path, resolve_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: generation is single-flight per process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Thumbnails and previews: the first page of a PDF or a downscaled image, as JPEG. Renditions are
+# content-addressed like blobs (Documents/blobs/renditions/<aa>/<bb>/<sha256>-<size>.jpg, keyed by
+# the source blob), so they never go stale and are served as immutable. They are made on first
+# request, once per key even when many requests ask at the same time, and the least recently used
+# are deleted when the directory grows past RENDITION_CACHE_MAX_BYTES.
+RENDITION_PREFIX = f"{BLOB_PREFIX}/renditions"
+RENDITION_DIR = os.path.join(BLOB_DIR, "renditions")
+LOCK_DIR = os.path.join(RENDITION_DIR, "locks")
+IMAGE_TYPES = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+TOUCH_INTERVAL_SECONDS = 3600  # recency is tracked with mtime, updated at most this often
+
+_flights: dict[str, list] = {}  # key -> [lock, users]
+_flights_lock = threading.Lock()
+_usage_lock = threading.Lock()
+_usage = {"bytes": None, "scanned_at": 0.0}
+
+
+def can_render(file_path: str) -> bool:
+    ext = os.path.splitext(file_path)[1].lower()
+    return ext == ".pdf" or ext in IMAGE_TYPES
+
+
+def rendition_path(file_path: str, size: int) -> str:
+    if is_blob_path(file_path):
+        key = blob_digest(file_path)
+    else:
+        # Files stored before the blob store: key on path, size and mtime instead of content
+        stat = os.stat(resolve_path(file_path))
+        key = hashlib.sha256(f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+    return f"{RENDITION_PREFIX}/{key[:2]}/{key[2:4]}/{key}-{size}.jpg"
+
+
+def get_rendition(file_path: str, size: int) -> str:
+    """
+    Stored path of the `size` rendition of a document file, rendering it first if needed.
+    Raises 404 for file types without previews and 422 when the file can't be rendered.
+    """
+    if not can_render(file_path):
+        raise HTTPException(status_code=404, detail="No preview for this file type")
+    path = rendition_path(file_path, size)
+    abs_path = resolve_path(path)
+    if _touch(abs_path):
+        return path
+    with _single_flight(path):
+        if os.path.exists(abs_path):  # made by whoever held the key before us
+            return path
+        _render(resolve_path(file_path), abs_path, size)
+    _account(os.path.getsize(abs_path))
+    return path
+
+
+def _touch(abs_path: str) -> bool:
+    """Mark a rendition as recently used; False if it doesn't exist."""
+    try:
+        modified = os.stat(abs_path).st_mtime
+    except FileNotFoundError:
+        return False
+    if time.time() - modified > TOUCH_INTERVAL_SECONDS:
+        try:
+            os.utime(abs_path)
+        except FileNotFoundError:  # evicted meanwhile
+            return False
+    return True
+
+
+@contextmanager
+def _single_flight(key: str):
+    """Serialize work on `key`: between threads with a lock, between workers with a lock file."""
+    with _flights_lock:
+        flight = _flights.setdefault(key, [threading.Lock(), 0])
+        flight[1] += 1
+    try:
+        with flight[0]:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(LOCK_DIR, exist_ok=True)
+            lock_path = os.path.join(LOCK_DIR, os.path.basename(key) + ".lock")
+            with open(lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    # A worker still waiting on the unlinked file renders again at worst
+                    os.remove(lock_path)
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    finally:
+        with _flights_lock:
+            flight[1] -= 1
+            if not flight[1]:
+                del _flights[key]
+
+
+# ================================================================================================
+#                                        Rendering
+# ================================================================================================
+def _render(src: str, dst: str, size: int):
+    try:
+        from PIL import Image, ImageOps  # optional dependency, only needed for previews
+    except ImportError:
+        raise HTTPException(status_code=404, detail="Previews need the Pillow package")
+    try:
+        if src.lower().endswith(".pdf"):
+            image = _pdf_first_page(src, size)
+        else:
+            image = Image.open(src)
+            image.draft("RGB", (size, size))  # JPEG: let the decoder downscale
+            image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        if image.mode != "RGB":
+            # Transparent images go onto white; JPEG has no alpha
+            background = Image.new("RGB", image.size, "white")
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, "JPEG", quality=settings.RENDITION_JPEG_QUALITY, optimize=True)
+            os.replace(tmp_path, dst)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.warning("Rendering %s failed: %s", src, exc)
+        raise HTTPException(status_code=422, detail="Preview could not be generated")
+
+
+def _pdf_first_page(src: str, size: int):
+    try:
+        import pypdfium2  # optional dependency, only needed for PDF previews
+    except ImportError:
+        raise HTTPException(status_code=404, detail="PDF previews need the pypdfium2 package")
+    pdf = pypdfium2.PdfDocument(src)
+    try:
+        page = pdf[0]
+        width, height = page.get_size()
+        # Render just large enough for the requested size (PDF units are 1/72 inch)
+        bitmap = page.render(scale=size / max(width, height, 1))
+        return bitmap.to_pil()
+    finally:
+        pdf.close()
+
+
+# ================================================================================================
+#                                       Disk quota
+# ================================================================================================
+def _account(added: int):
+    """Track the directory size and evict least recently used renditions past the quota."""
+    with _usage_lock:
+        # Other workers write too: rescan now and then rather than trusting this process's count
+        if _usage["bytes"] is None or time.time() - _usage["scanned_at"] > 300:
+            _usage["bytes"], _usage["scanned_at"] = _scan_size(), time.time()
+        else:
+            _usage["bytes"] += added
+        if _usage["bytes"] > settings.RENDITION_CACHE_MAX_BYTES:
+            _usage["bytes"] = evict_renditions(int(settings.RENDITION_CACHE_MAX_BYTES * 0.9))
+            _usage["scanned_at"] = time.time()
+
+
+def _renditions() -> list[tuple[float, int, str]]:
+    """(mtime, size, path) of every stored rendition."""
+    found = []
+    for root, dirs, files in os.walk(RENDITION_DIR):
+        if root == RENDITION_DIR and "locks" in dirs:
+            dirs.remove("locks")
+        for name in files:
+            if name.endswith(".jpg"):
+                full_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(full_path)
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime, stat.st_size, full_path))
+    return found
+
+
+def _scan_size() -> int:
+    return sum(size for _, size, _ in _renditions())
+
+
+def evict_renditions(target_bytes: int) -> int:
+    """Delete least recently used renditions until at most `target_bytes` remain; returns the total left."""
+    renditions = sorted(_renditions())
+    total = sum(size for _, size, _ in renditions)
+    for _, size, full_path in renditions:
+        if total <= target_bytes:
+            break
+        try:
+            os.remove(full_path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
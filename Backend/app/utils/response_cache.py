@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.core.events import subscribe, DOCUMENTS_CHANGED, TAGS_CHANGED, PERMISSIONS_CHANGED, USERS_CHANGED
+from app.models.users import User
+from app.utils.access_control import is_admin
+
+KEY_PREFIX = "response-cache:"
+
+
+# ================================================================================================
+#                                        Backends
+# ================================================================================================
+# The cache talks to its store with three Redis commands: GET, SET (with EX) and INCR. A
+# redis.Redis client shares entries between workers; InMemoryRedis keeps them in-process
+# and doubles as the fake for tests.
+class InMemoryRedis:
+    """The subset of the Redis client API used here, as a thread-safe LRU with expiry."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[Optional[float], bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.monotonic():
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return entry[1]
+
+    def set(self, name: str, value, ex: Optional[int] = None):
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            self._entries[name] = (time.monotonic() + ex if ex else None, value)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            entry = self._entries.get(name)
+            value = int(entry[1]) + amount if entry else amount
+            self._entries[name] = (None, str(value).encode())
+            return value
+
+    def flushdb(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _default_client():
+    if settings.RESPONSE_CACHE_URL:
+        import redis  # optional dependency, only needed for a shared cache
+        return redis.Redis.from_url(settings.RESPONSE_CACHE_URL)
+    return InMemoryRedis(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+# ================================================================================================
+#                                      Response cache
+# ================================================================================================
+class ResponseCache:
+    """
+    JSON response cache. Every namespace ("documents", "tags") has a generation number
+    stored in the backend and part of each key; invalidating bumps it, which orphans the
+    old entries (they age out) and works across workers when the backend is shared.
+    """
+
+    def __init__(self, client, ttl: int):
+        self.client = client
+        self.ttl = ttl
+        self.hits: dict[str, int] = defaultdict(int)
+        self.misses: dict[str, int] = defaultdict(int)
+
+    def _generation(self, namespace: str) -> int:
+        return int(self.client.get(f"{KEY_PREFIX}generation:{namespace}") or 0)
+
+    def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            self.client.incr(f"{KEY_PREFIX}generation:{namespace}")
+
+    def cached_json(self, namespace: str, key: tuple, produce: Callable[[], tuple[Any, dict]]) -> Response:
+        """
+        Return the cached JSON response for `key`, or call `produce()` -> (body, headers),
+        store its JSON encoding and return it.
+        """
+        if self.ttl <= 0:
+            body, headers = produce()
+            return Response(json.dumps(jsonable_encoder(body)), media_type="application/json", headers=headers)
+
+        name = f"{KEY_PREFIX}{namespace}:{self._generation(namespace)}:{json.dumps(key, default=str)}"
+        cached = self.client.get(name)
+        if cached is not None:
+            self.hits[namespace] += 1
+            entry = json.loads(cached)
+            return Response(entry["body"], media_type="application/json", headers={**entry["headers"], "X-Cache": "hit"})
+
+        self.misses[namespace] += 1
+        body, headers = produce()
+        encoded = json.dumps(jsonable_encoder(body))
+        self.client.set(name, json.dumps({"body": encoded, "headers": headers}), ex=self.ttl)
+        return Response(encoded, media_type="application/json", headers={**headers, "X-Cache": "miss"})
+
+    def stats(self) -> dict:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {
+            namespace: {"hits": self.hits[namespace], "misses": self.misses[namespace]}
+            for namespace in namespaces
+        }
+
+
+def visibility_class(user: User) -> str:
+    """
+    Users who see the same documents share cache entries. Admins all see everything;
+    anyone else also sees their own and explicitly shared private documents, so their
+    class is per user (and department, which decides the department-level documents).
+    """
+    if is_admin(user):
+        return "admin"
+    return f"user:{user.id}:department:{user.department_id}"
+
+
+response_cache = ResponseCache(_default_client(), settings.RESPONSE_CACHE_TTL_SECONDS)
+
+
+def configure_response_cache(client, ttl: Optional[int] = None):
+    """Swap the backend, e.g. InMemoryRedis() in tests or a redis.Redis in a deployment."""
+    response_cache.client = client
+    if ttl is not None:
+        response_cache.ttl = ttl
+
+
+@subscribe(DOCUMENTS_CHANGED, PERMISSIONS_CHANGED, USERS_CHANGED)
+def _invalidate_documents(event, **payload):
+    response_cache.invalidate("documents")
+
+
+@subscribe(TAGS_CHANGED)
+def _invalidate_tags(event, **payload):
+    # Listing items carry their tag names
+    response_cache.invalidate("tags", "documents")
@@ -0,0 +1,378 @@
+import html
+import json
+import re
+from bisect import bisect_right
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    Column, MetaData, String, Table, Text, case, delete, exists, false, insert, literal, literal_column, text, update
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select, func, or_
+
+from app.models.documents import Document, DocumentVersion
+from app.models.tags import Tag, DocumentTagLink
+from app.models.texts import VersionText
+from app.models.users import User
+
+
+SEARCH_FIELDS = ("title", "tags", "uploader", "all", "content")
+
+# Full-text index over title, description, tag names and uploader name/email.
+# SQLite: FTS5 virtual table. Postgres: table with a weighted generated tsvector + GIN index.
+# Kept out of SQLModel.metadata so create_all / drop_all never try to manage it; the routers
+# keep it current by calling index_document / remove_document before they commit.
+search_metadata = MetaData()
+documents_fts = Table(
+    "documents_fts",
+    search_metadata,
+    Column("document_id", String),
+    Column("title", Text),
+    Column("description", Text),
+    Column("tags", Text),
+    Column("uploader", Text),
+)
+# Extracted file text, one row per document version (see app.utils.text_extraction). Searched
+# separately from the metadata above: field=content matches a document's latest version.
+version_text_fts = Table(
+    "version_text_fts",
+    search_metadata,
+    Column("document_id", String),
+    Column("version_id", String),
+    Column("content", Text),
+)
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        document_id UNINDEXED, title, description, tags, uploader,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS version_text_fts USING fts5(
+        document_id UNINDEXED, version_id UNINDEXED, content,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+_POSTGRES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS documents_fts (
+        document_id VARCHAR PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        tags TEXT,
+        uploader TEXT,
+        search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(tags, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(uploader, '')), 'C') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'D')
+        ) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_documents_fts_vector ON documents_fts USING GIN (search_vector)",
+    """
+    CREATE TABLE IF NOT EXISTS version_text_fts (
+        version_id VARCHAR PRIMARY KEY,
+        document_id VARCHAR,
+        content TEXT,
+        search_vector tsvector GENERATED ALWAYS AS (to_tsvector('simple', coalesce(content, ''))) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_version_text_fts_vector ON version_text_fts USING GIN (search_vector)",
+]
+
+# FTS5 column filters and bm25 weights (document_id is unindexed and weighted 0)
+_SQLITE_COLUMNS = {
+    "title": "{title}",
+    "tags": "{tags}",
+    "uploader": "{uploader}",
+    "all": "{title description tags uploader}",
+}
+_SQLITE_BM25 = "bm25(documents_fts, 0.0, 10.0, 2.0, 5.0, 3.0)"
+
+# tsvector weights assigned in _POSTGRES_DDL
+_POSTGRES_WEIGHTS = {"title": "A", "tags": "B", "uploader": "C", "all": ""}
+
+SNIPPET_CHARS = 240  # length of the excerpt returned with content matches
+
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def supports_full_text(bind) -> bool:
+    return _dialect(bind) in ("sqlite", "postgresql")
+
+
+def _terms(q: str) -> list[str]:
+    return re.findall(r"\w+", q.lower())
+
+
+# ================================================================================================
+#                                        Schema
+# ================================================================================================
+def create_search_index(engine: Engine):
+    """Create the index if missing and backfill it for databases created before it existed."""
+    if not supports_full_text(engine):
+        return
+    ddl = _SQLITE_DDL if _dialect(engine) == "sqlite" else _POSTGRES_DDL
+    with Session(engine) as session:
+        for statement in ddl:
+            session.exec(text(statement))
+        indexed = session.exec(select(func.count()).select_from(documents_fts)).one()
+        if not indexed and session.exec(select(func.count(Document.id))).one():
+            rebuild_search_index(session)
+        session.commit()
+
+
+def rebuild_search_index(session: Session):
+    """Repopulate the whole index with one INSERT ... SELECT."""
+    session.exec(delete(documents_fts))
+    session.exec(
+        insert(documents_fts).from_select(
+            ["document_id", "title", "description", "tags", "uploader"],
+            _index_rows(session),
+        )
+    )
+
+
+def _index_rows(session: Session, *criteria):
+    if _dialect(session.get_bind()) == "postgresql":
+        tag_names = func.string_agg(Tag.name, " ")
+    else:
+        tag_names = func.group_concat(Tag.name, " ")
+    tags = (
+        select(tag_names)
+        .join(DocumentTagLink, DocumentTagLink.tag_id == Tag.id)
+        .where(DocumentTagLink.document_id == Document.id)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Document.id,
+            Document.title,
+            Document.description,
+            tags,
+            User.full_name + " " + User.email,
+        )
+        .join(User, User.id == Document.uploader_id)
+        .where(*criteria)
+    )
+
+
+# ================================================================================================
+#                                      Maintenance
+# ================================================================================================
+def index_document(session: Session, document_id: str):
+    """(Re)index one document. Call after its title/description/tags change, before commit."""
+    index_documents(session, [document_id])
+
+
+def index_documents(session: Session, document_ids: list[str]):
+    """(Re)index several documents with one DELETE and one INSERT ... SELECT."""
+    if not supports_full_text(session.get_bind()) or not document_ids:
+        return
+    session.flush()
+    session.exec(delete(documents_fts).where(documents_fts.c.document_id.in_(document_ids)))
+    session.exec(
+        insert(documents_fts).from_select(
+            ["document_id", "title", "description", "tags", "uploader"],
+            _index_rows(session, Document.id.in_(document_ids)),
+        )
+    )
+
+
+def remove_document(session: Session, document_id: str):
+    if not supports_full_text(session.get_bind()):
+        return
+    session.exec(delete(documents_fts).where(documents_fts.c.document_id == document_id))
+
+
+def reindex_uploader(session: Session, user: User):
+    """Refresh the uploader column for every document uploaded by `user`."""
+    if not supports_full_text(session.get_bind()):
+        return
+    session.exec(
+        update(documents_fts)
+        .where(documents_fts.c.document_id.in_(select(Document.id).where(Document.uploader_id == user.id)))
+        .values(uploader=f"{user.full_name} {user.email}")
+    )
+
+
+def index_version_texts(session: Session, rows: list[dict]):
+    """Add extracted text, rows of {"document_id", "version_id", "content"}, with one INSERT."""
+    if not supports_full_text(session.get_bind()) or not rows:
+        return
+    session.exec(insert(version_text_fts), params=rows)
+
+
+def copy_version_text(session: Session, source_version_id: str, document_id: str, version_id: str):
+    """Index `version_id` with the text already extracted for another version of the same file."""
+    if not supports_full_text(session.get_bind()):
+        return
+    session.exec(
+        insert(version_text_fts).from_select(
+            ["document_id", "version_id", "content"],
+            select(literal(document_id), literal(version_id), version_text_fts.c.content)
+            .where(version_text_fts.c.version_id == source_version_id),
+        )
+    )
+
+
+def remove_version_texts(session: Session, version_ids: list[str]):
+    if not supports_full_text(session.get_bind()) or not version_ids:
+        return
+    session.exec(delete(version_text_fts).where(version_text_fts.c.version_id.in_(version_ids)))
+
+
+# ================================================================================================
+#                                         Query
+# ================================================================================================
+def _latest_version():
+    """Only a document's latest version is searched: that's the file a reader opens."""
+    newer = aliased(DocumentVersion)
+    return ~exists().where(
+        newer.document_id == DocumentVersion.document_id,
+        newer.version_number > DocumentVersion.version_number,
+    )
+
+
+def _content_match(bind, terms: list[str]):
+    """(WHERE clause, rank) matching every term as a prefix in version_text_fts."""
+    if _dialect(bind) == "sqlite":
+        expression = " AND ".join(f'"{t}"*' for t in terms)
+        return (
+            literal_column("version_text_fts").op("MATCH")(expression),
+            literal_column("bm25(version_text_fts, 0.0, 0.0, 1.0)"),
+        )
+    tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+    vector = literal_column("version_text_fts.search_vector")
+    return vector.op("@@")(tsquery), -func.ts_rank(vector, tsquery)
+
+
+def search_matches(session: Session, field: str, q: str):
+    """
+    Subquery of (document_id, rank) for documents matching every term of `q` as a prefix.
+    Lower rank is more relevant. Returns None when the backend has no full-text support.
+    """
+    bind = session.get_bind()
+    if not supports_full_text(bind):
+        return None
+    terms = _terms(q)
+    if not terms:
+        # Nothing searchable (e.g. only punctuation): match nothing
+        return select(documents_fts.c.document_id, literal_column("0.0").label("rank")).where(false()).subquery()
+
+    if field == "content":
+        match, rank = _content_match(bind, terms)
+        return (
+            select(version_text_fts.c.document_id, rank.label("rank"))
+            .join(DocumentVersion, DocumentVersion.id == version_text_fts.c.version_id)
+            .where(match, _latest_version())
+            .subquery()
+        )
+
+    if _dialect(bind) == "sqlite":
+        expression = "%s : (%s)" % (_SQLITE_COLUMNS[field], " AND ".join(f'"{t}"*' for t in terms))
+        return (
+            select(documents_fts.c.document_id, literal_column(_SQLITE_BM25).label("rank"))
+            .where(literal_column("documents_fts").op("MATCH")(expression))
+            .subquery()
+        )
+
+    weight = _POSTGRES_WEIGHTS[field]
+    tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*{weight}" for t in terms))
+    vector = literal_column("documents_fts.search_vector")
+    return (
+        select(documents_fts.c.document_id, (-func.ts_rank(vector, tsquery)).label("rank"))
+        .where(vector.op("@@")(tsquery))
+        .subquery()
+    )
+
+
+def content_snippets(session: Session, document_ids: list[str], q: str) -> dict[str, dict]:
+    """
+    For documents found by a content search: {document_id: {"version_id", "page", "snippet"}},
+    where snippet is an HTML-escaped excerpt around the first occurrence of the longest term of
+    `q` with matching words wrapped in <mark>, and page (1-based) is where that occurrence is.
+    """
+    bind = session.get_bind()
+    terms = _terms(q)
+    if not supports_full_text(bind) or not terms or not document_ids:
+        return {}
+    # The MATCH keeps SQLite on the full-text index (document_id is not indexed there)
+    match, _ = _content_match(bind, terms)
+    content = version_text_fts.c.content
+    find = func.strpos if _dialect(bind) == "postgresql" else func.instr
+    position = find(func.lower(content), max(terms, key=len))
+    lead = SNIPPET_CHARS // 3
+    start = case((position > lead, position - lead), else_=1)
+    rows = session.exec(
+        select(
+            version_text_fts.c.document_id,
+            version_text_fts.c.version_id,
+            position,
+            start,
+            func.substr(content, start, SNIPPET_CHARS),
+            VersionText.page_offsets,
+        )
+        .join(VersionText, VersionText.version_id == version_text_fts.c.version_id)
+        .join(DocumentVersion, DocumentVersion.id == version_text_fts.c.version_id)
+        .where(match, version_text_fts.c.document_id.in_(document_ids), _latest_version())
+    ).all()
+
+    snippets = {}
+    for document_id, version_id, position, start, window, page_offsets in rows:
+        # position is 0 when the term isn't found verbatim (e.g. matched without its diacritics)
+        offsets = json.loads(page_offsets)
+        window = window or ""
+        snippets[document_id] = {
+            "version_id": version_id,
+            "page": bisect_right(offsets, position - 1) if position and offsets else 1,
+            "snippet": _highlight(window, terms, cut_start=start > 1, cut_end=len(window) == SNIPPET_CHARS),
+        }
+    return snippets
+
+
+def _highlight(window: str, terms: list[str], cut_start: bool, cut_end: bool) -> str:
+    # Drop words cut in half by the window, then collapse whitespace (page breaks, layout)
+    words = window.split()
+    if cut_start and words and not window[:1].isspace():
+        words = words[1:]
+    if cut_end and words and not window[-1:].isspace():
+        words = words[:-1]
+    excerpt = " ".join(words)
+    pattern = re.compile(r"\b(?:%s)\w*" % "|".join(map(re.escape, terms)), re.IGNORECASE)
+    parts, last = [], 0
+    for found in pattern.finditer(excerpt):
+        parts.append(html.escape(excerpt[last:found.start()]))
+        parts.append(f"<mark>{html.escape(found.group())}</mark>")
+        last = found.end()
+    parts.append(html.escape(excerpt[last:]))
+    return ("…" if cut_start else "") + "".join(parts) + ("…" if cut_end else "")
+
+
+def ilike_search(query, field: str, q: str):
+    """Unindexed substring search; fallback for backends without full-text support."""
+    pattern = f"%{q}%"
+    uploader = select(User.id).where(or_(User.full_name.ilike(pattern), User.email.ilike(pattern)))
+    tagged = (
+        select(DocumentTagLink.document_id)
+        .join(Tag, Tag.id == DocumentTagLink.tag_id)
+        .where(Tag.name.ilike(pattern))
+    )
+    conditions = {
+        "title": Document.title.ilike(pattern),
+        "uploader": Document.uploader_id.in_(uploader),
+        "tags": Document.id.in_(tagged),
+    }
+    if field == "content":
+        raise HTTPException(status_code=400, detail="Content search needs full-text support (SQLite or PostgreSQL)")
+    if field == "all":
+        return query.where(or_(Document.description.ilike(pattern), *conditions.values()))
+    return query.where(conditions[field])
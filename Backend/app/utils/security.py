@@ -1,6 +1,26 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
+
+# Hashes of the other schemes still verify; they are "deprecated" and so get rehashed with the
+# configured scheme and rounds at their owner's next login (see verify_and_update_password).
+KNOWN_SCHEMES = ["bcrypt", "pbkdf2_sha256", "argon2"]
+
+pwd_context = CryptContext(
+    schemes=[settings.PASSWORD_HASH_SCHEME] + [s for s in KNOWN_SCHEMES if s != settings.PASSWORD_HASH_SCHEME],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    pbkdf2_sha256__rounds=settings.PASSWORD_PBKDF2_ROUNDS,
+)
+
+# A hash takes a couple of hundred milliseconds of CPU by design. Logins and registrations hash
+# here rather than on the request threadpool, so a burst of them can't starve document requests,
+# and at most PASSWORD_HASH_WORKERS run at once whatever the load (bcrypt releases the GIL).
+_hash_executor = ThreadPoolExecutor(settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 
 def hash_password(password: str) -> str:
@@ -9,3 +29,18 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the password executor."""
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, hash_password, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Check a password on the password executor. Returns (valid, new hash): the new hash is set
+    when the stored one uses an older scheme or other rounds and should replace it.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
@@ -0,0 +1,250 @@
+import json
+import os
+import re
+import zipfile
+from typing import NamedTuple, Optional
+from xml.etree import ElementTree
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.documents import DocumentVersion
+from app.models.texts import VersionText
+from app.utils.file_handler import resolve_path
+from app.utils.search_index import copy_version_text, index_version_texts, remove_version_texts
+from app.utils.timestamps import utc_now
+
+# Text of uploaded files, for field=content search. Extraction runs per version as a post-upload
+# job ("text.extract" in app.utils.post_upload) or in bulk with `python -m app.db.text_index
+# backfill`; both only process versions without a VersionText row, and a blob shared by several
+# versions is extracted once. Office formats are read with the standard library; PDFs need pypdf.
+
+
+class ExtractedText(NamedTuple):
+    extractor: str  # see VersionText.extractor
+    pages: list[str]
+    truncated: bool = False
+
+
+_OOXML_TEXT = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DRAWING = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_SHEET = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_ODF_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+_PLAIN_TEXT = {".txt", ".text", ".md", ".csv", ".tsv", ".json", ".xml", ".html", ".htm", ".log", ".rst", ".yaml", ".yml"}
+_MAX_XML_BYTES = 256 * 1024 ** 2  # decompressed size of one archive member (zip bombs)
+
+
+# ================================================================================================
+#                                       Extraction
+# ================================================================================================
+def extract_text(path: str, max_chars: Optional[int] = None) -> ExtractedText:
+    """
+    Pages of text from the file at `path` (absolute), chosen by extension. Formats without
+    pages (plain text, spreadsheets...) use form feeds, sheets or slides as page breaks.
+    Stops after `max_chars` characters (default TEXT_EXTRACTION_MAX_CHARS).
+    Raises on unreadable files; unknown types give extractor "none" and no pages.
+    """
+    max_chars = max_chars or settings.TEXT_EXTRACTION_MAX_CHARS
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        extractor, pages = "pdf", _pdf_pages(path)
+    elif ext == ".docx":
+        extractor, pages = "docx", _docx_pages(path)
+    elif ext == ".pptx":
+        extractor, pages = "pptx", _pptx_pages(path)
+    elif ext == ".xlsx":
+        extractor, pages = "xlsx", _xlsx_pages(path)
+    elif ext in (".odt", ".ods", ".odp"):
+        extractor, pages = "odf", _odf_pages(path)
+    elif ext in _PLAIN_TEXT:
+        extractor, pages = "text", _plain_pages(path, max_chars)
+    else:
+        return ExtractedText("none", [])
+
+    kept, total = [], 0
+    for page in pages:  # generators: stop reading once the limit is reached
+        page = _clean(page)
+        if total + len(page) > max_chars:
+            kept.append(page[:max_chars - total])
+            return ExtractedText(extractor, kept, truncated=True)
+        kept.append(page)
+        total += len(page)
+    return ExtractedText(extractor, kept)
+
+
+def join_pages(pages: list[str]) -> tuple[str, list[int]]:
+    """The indexed text and the offset at which each page starts in it."""
+    offsets, position = [], 0
+    for page in pages:
+        offsets.append(position)
+        position += len(page) + 2
+    return "\n\n".join(pages), offsets
+
+
+def _clean(page: str) -> str:
+    # Trailing spaces and runs of blank lines are layout, not content
+    page = re.sub(r"[ \t\r\f\v]+\n", "\n", page.replace("\x00", ""))
+    return re.sub(r"\n{3,}", "\n\n", page).strip()
+
+
+def _pdf_pages(path: str):
+    try:
+        from pypdf import PdfReader  # optional dependency, only needed for PDFs
+    except ImportError:
+        raise RuntimeError("PDF text extraction needs the pypdf package")
+    reader = PdfReader(path)
+    if reader.is_encrypted:
+        reader.decrypt("")  # many PDFs are "encrypted" with an empty user password
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def _plain_pages(path: str, max_chars: int):
+    with open(path, "rb") as f:
+        raw = f.read(max_chars * 4 + 4)  # UTF-8 takes at most 4 bytes per character
+    yield from raw.decode("utf-8", errors="replace").split("\f")
+
+
+def _read_xml(archive: zipfile.ZipFile, name: str) -> ElementTree.Element:
+    if archive.getinfo(name).file_size > _MAX_XML_BYTES:
+        raise ValueError(f"{name} is too large to extract")
+    return ElementTree.fromstring(archive.read(name))
+
+
+def _numbered(archive: zipfile.ZipFile, pattern: str) -> list[str]:
+    """Archive members like ppt/slides/slide12.xml, in numeric order."""
+    found = [(int(m.group(1)), name) for name in archive.namelist() if (m := re.fullmatch(pattern, name))]
+    return [name for _, name in sorted(found)]
+
+
+def _docx_pages(path: str):
+    with zipfile.ZipFile(path) as archive:
+        body = _read_xml(archive, "word/document.xml")
+    page = []
+    for element in body.iter():
+        if element.tag == f"{_OOXML_TEXT}p":
+            page.append("\n")
+        elif element.tag == f"{_OOXML_TEXT}t":
+            page.append(element.text or "")
+        elif element.tag == f"{_OOXML_TEXT}tab":
+            page.append("\t")
+        elif element.tag == f"{_OOXML_TEXT}br":
+            if element.get(f"{_OOXML_TEXT}type") == "page":
+                yield "".join(page)
+                page = []
+            else:
+                page.append("\n")
+    yield "".join(page)
+
+
+def _pptx_pages(path: str):
+    with zipfile.ZipFile(path) as archive:
+        for name in _numbered(archive, r"ppt/slides/slide(\d+)\.xml"):
+            slide = _read_xml(archive, name)
+            paragraphs = slide.iter(f"{_DRAWING}p")
+            yield "\n".join("".join(t.text or "" for t in p.iter(f"{_DRAWING}t")) for p in paragraphs)
+
+
+def _xlsx_pages(path: str):
+    with zipfile.ZipFile(path) as archive:
+        shared = []
+        if "xl/sharedStrings.xml" in archive.namelist():
+            strings = _read_xml(archive, "xl/sharedStrings.xml")
+            shared = ["".join(t.text or "" for t in si.iter(f"{_SHEET}t")) for si in strings.iter(f"{_SHEET}si")]
+        for name in _numbered(archive, r"xl/worksheets/sheet(\d+)\.xml"):
+            lines = []
+            for row in _read_xml(archive, name).iter(f"{_SHEET}row"):
+                cells = []
+                for cell in row.iter(f"{_SHEET}c"):
+                    value = cell.find(f"{_SHEET}v")
+                    if cell.get("t") == "s" and value is not None:
+                        cells.append(shared[int(value.text)])
+                    elif cell.get("t") == "inlineStr":
+                        cells.append("".join(t.text or "" for t in cell.iter(f"{_SHEET}t")))
+                    elif value is not None:
+                        cells.append(value.text or "")
+                lines.append("\t".join(cells))
+            yield "\n".join(lines)
+
+
+def _odf_pages(path: str):
+    with zipfile.ZipFile(path) as archive:
+        content = _read_xml(archive, "content.xml")
+    blocks = (p for p in content.iter() if p.tag in (f"{_ODF_TEXT}p", f"{_ODF_TEXT}h"))
+    yield "\n".join("".join(block.itertext()) for block in blocks)
+
+
+# ================================================================================================
+#                                        Storage
+# ================================================================================================
+def store_version_texts(session: Session, results: list[tuple[dict, ExtractedText]]):
+    """
+    Record extracted text for versions, given (version row, ExtractedText) pairs where the row
+    has "id", "document_id" and "file_path". One INSERT per table; doesn't commit.
+    """
+    if not results:
+        return
+    now = utc_now()
+    texts, rows = [], []
+    for version, extracted in results:
+        content, offsets = join_pages(extracted.pages)
+        texts.append({"document_id": version["document_id"], "version_id": version["id"], "content": content})
+        rows.append({
+            "version_id": version["id"],
+            "document_id": version["document_id"],
+            "file_path": version["file_path"],
+            "extractor": extracted.extractor,
+            "page_offsets": json.dumps(offsets),
+            "characters": len(content),
+            "truncated": extracted.truncated,
+            "extracted_at": now,
+        })
+    session.exec(insert(VersionText), params=rows)
+    index_version_texts(session, [text for text in texts if text["content"]])
+
+
+def reuse_version_text(session: Session, version: dict) -> bool:
+    """
+    Index a version with the text of another version of the same blob, if one was extracted.
+    Returns False when the file still has to be read. Doesn't commit.
+    """
+    source = session.exec(
+        select(VersionText).where(VersionText.file_path == version["file_path"]).limit(1)
+    ).first()
+    if source is None:
+        return False
+    session.exec(insert(VersionText), params=[{
+        **source.model_dump(),
+        "version_id": version["id"],
+        "document_id": version["document_id"],
+        "extracted_at": utc_now(),
+    }])
+    if source.characters:
+        copy_version_text(session, source.version_id, version["document_id"], version["id"])
+    return True
+
+
+def extract_version(session: Session, version: dict):
+    """Extract and store the text of one version unless it's done already. Doesn't commit."""
+    if session.get(VersionText, version["id"]) is not None or reuse_version_text(session, version):
+        return
+    extracted = extract_text(resolve_path(version["file_path"]))
+    store_version_texts(session, [(version, extracted)])
+
+
+def delete_version_texts(session: Session, version_ids: list[str]):
+    """Forget the text of deleted versions. Call before commit, next to the version delete."""
+    if not version_ids:
+        return
+    session.exec(delete(VersionText).where(VersionText.version_id.in_(version_ids)))
+    remove_version_texts(session, version_ids)
+
+
+def prune_version_texts(session: Session) -> int:
+    """Drop text left behind by versions deleted while their extraction was running."""
+    orphans = session.exec(
+        select(VersionText.version_id).where(VersionText.version_id.not_in(select(DocumentVersion.id)))
+    ).all()
+    delete_version_texts(session, list(orphans))
+    return len(orphans)
@@ -0,0 +1,40 @@
+import threading
+from contextlib import contextmanager
+from typing import Hashable
+
+from fastapi import HTTPException, status
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` requests in flight per key (an account, a client address). Requests over
+    the limit are refused with 429 rather than queued, so a flood can't pile up work. Counts
+    are per process; 0 disables the limit.
+    """
+
+    def __init__(self, limit: int, detail: str):
+        self.limit = limit
+        self.detail = detail
+        self._active: dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key: Hashable):
+        if not self.limit:
+            yield
+            return
+        with self._lock:
+            active = self._active.get(key, 0)
+            if active >= self.limit:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=self.detail, headers={"Retry-After": "1"}
+                )
+            self._active[key] = active + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._active[key] == 1:
+                    del self._active[key]  # only keys with requests in flight are kept
+                else:
+                    self._active[key] -= 1
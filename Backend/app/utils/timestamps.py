@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.models.documents import Document
+
+
+def utc_now() -> str:
+    """Current UTC time as stored in created_at / uploaded_at ("YYYY-MM-DD HH:MM:SS", like SQL now())."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def utc_in(seconds: float) -> str:
+    """utc_now() shifted by `seconds` (negative for the past)."""
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def touch_documents(session: Session, document_ids: list[str]):
+    """
+    Bump updated_at after anything in a document's export representation changed (metadata,
+    versions, tags, permissions). Call before commit.
+    """
+    if document_ids:
+        session.exec(update(Document).where(Document.id.in_(document_ids)).values(updated_at=utc_now()))
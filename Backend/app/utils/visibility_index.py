@@ -0,0 +1,94 @@
+from sqlalchemy import String, cast, delete, insert, literal, or_, union
+from sqlmodel import Session, select
+
+from app.models.documents import Document
+from app.models.permissions import DocumentUserPermission, DocumentDepartmentPermission, DocumentVisibility
+from app.models.users import User
+
+# Materialized form of the rules in app.utils.access_control: every document gets one row per
+# principal that may see it ("public", "department:<id>", "user:<id>"). A user sees a document
+# when one of their principals has a row, so listings become one indexed lookup instead of
+# re-evaluating uploader departments and permission rows per document.
+# Like the search index, the routers keep it current by calling refresh_visibility /
+# remove_visibility before they commit; app/db/visibility.py rebuilds and checks it.
+
+
+def principals(user: User) -> list[str]:
+    """Principals a non-admin user acts as."""
+    return ["public", f"department:{user.department_id}", f"user:{user.id}"]
+
+
+def materialized_visibility_clause(user: User):
+    """
+    `visible_documents_clause` for non-admins, answered from document_visibility.
+    Public documents are recognised by their column (that principal covers most of the table);
+    the user's department and user principals match few rows, read through the principal index.
+    """
+    granted = select(DocumentVisibility.document_id).where(DocumentVisibility.principal.in_(principals(user)[1:]))
+    return or_(Document.access_level == "public", Document.id.in_(granted))
+
+
+def visibility_rows(*criteria):
+    """SELECT of (document_id, principal) for the documents matching `criteria`, without duplicates."""
+    public = select(Document.id, literal("public")).where(Document.access_level == "public", *criteria)
+    uploader_department = (
+        select(Document.id, literal("department:") + cast(User.department_id, String))
+        .join(User, User.id == Document.uploader_id)
+        .where(Document.access_level == "department", *criteria)
+    )
+    granted_departments = (
+        select(Document.id, literal("department:") + cast(DocumentDepartmentPermission.department_id, String))
+        .join(DocumentDepartmentPermission, DocumentDepartmentPermission.document_id == Document.id)
+        .where(Document.access_level == "department", *criteria)
+    )
+    uploader = select(Document.id, literal("user:") + Document.uploader_id).where(
+        Document.access_level == "private", *criteria
+    )
+    granted_users = (
+        select(Document.id, literal("user:") + DocumentUserPermission.user_id)
+        .join(DocumentUserPermission, DocumentUserPermission.document_id == Document.id)
+        .where(Document.access_level == "private", *criteria)
+    )
+    return union(public, uploader_department, granted_departments, uploader, granted_users)
+
+
+# ================================================================================================
+#                                      Maintenance
+# ================================================================================================
+def refresh_visibility(session: Session, document_ids: list[str]):
+    """
+    Recompute the rows of some documents with one DELETE and one INSERT ... SELECT.
+    Call after their access level or permissions change, before commit.
+    """
+    if not document_ids:
+        return
+    session.flush()
+    session.exec(delete(DocumentVisibility).where(DocumentVisibility.document_id.in_(document_ids)))
+    session.exec(
+        insert(DocumentVisibility).from_select(
+            ["document_id", "principal"], visibility_rows(Document.id.in_(document_ids))
+        )
+    )
+
+
+def refresh_uploader_visibility(session: Session, user: User) -> list[str]:
+    """
+    Department-level documents follow their uploader when they move to another department.
+    Returns the affected document ids.
+    """
+    session.flush()
+    document_ids = session.exec(
+        select(Document.id).where(Document.uploader_id == user.id, Document.access_level == "department")
+    ).all()
+    refresh_visibility(session, list(document_ids))
+    return list(document_ids)
+
+
+def remove_visibility(session: Session, document_id: str):
+    session.exec(delete(DocumentVisibility).where(DocumentVisibility.document_id == document_id))
+
+
+def rebuild_visibility(session: Session):
+    """Repopulate the whole table with one INSERT ... SELECT."""
+    session.exec(delete(DocumentVisibility))
+    session.exec(insert(DocumentVisibility).from_select(["document_id", "principal"], visibility_rows()))
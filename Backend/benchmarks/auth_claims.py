@@ -0,0 +1,125 @@
+"""
+Cost of authorizing a request: loading the user per request, the principal cache, and the
+role/department claims carried by access tokens (ACCESS_TOKEN_CLAIMS).
+
+    cd Backend && python -m benchmarks.auth_claims --iterations 20000 --clients 8 --seconds 10
+
+First `get_current_user` alone, in this process on a scratch database: microseconds per call
+with a token holding only `sub` (the user is loaded, from the database or the cache) and with
+one carrying the claims (decoded, nothing loaded). Then requests per second on GET
+/documents/{id} for each mode, as a non-admin so the access rules run; --seconds 0 skips that.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.server import multipart, request, running_server
+
+SERVER_MODES = [
+    ("database", {"ACCESS_TOKEN_CLAIMS": "false", "PRINCIPAL_CACHE_TTL_SECONDS": "0"}),
+    ("principal cache", {"ACCESS_TOKEN_CLAIMS": "false", "PRINCIPAL_CACHE_TTL_SECONDS": "30"}),
+    ("token claims", {"ACCESS_TOKEN_CLAIMS": "true", "PRINCIPAL_CACHE_TTL_SECONDS": "0"}),
+]
+
+
+def dependency_cost(iterations: int) -> dict[str, float]:
+    """Median microseconds per get_current_user call in each mode (batches of iterations / 20)."""
+    workdir = tempfile.mkdtemp()
+    scratch = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'database.db')}",
+        "STORAGE_ROOT": workdir,
+        "SLOW_QUERY_MS": "0",
+    }
+    saved = {name: os.environ.get(name) for name in scratch}
+    os.environ.update(scratch)
+    try:
+        from sqlmodel import Session
+
+        from app.db.session import engine, init_db
+        from app.models import Department, Role, User
+        from app.routers.auth import get_current_user, principal_cache
+        from app.utils.jwt_handler import create_access_token, user_claims
+    finally:
+        # Settings are read at import; the servers started later get their own
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name)
+            else:
+                os.environ[name] = value
+
+    init_db()
+    with Session(engine) as session:
+        session.add_all([Role(id=1, name="admin"), Role(id=2, name="user"), Department(id=1, name="bench")])
+        user = User(email="bench@example.com", full_name="Bench", hashed_password="-", department_id=1, role_id=2)
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        sub_only = create_access_token(data={"sub": user.id})
+        with_claims = create_access_token(data=user_claims(user))
+
+    def per_call(token: str, clear_cache: bool) -> float:
+        batch, samples = max(1, iterations // 20), []
+        with Session(engine) as session:
+            for _ in range(20):
+                start = time.perf_counter()
+                for _ in range(batch):
+                    if clear_cache:
+                        principal_cache.clear()
+                    get_current_user(token, session)
+                samples.append((time.perf_counter() - start) / batch * 1e6)
+        return statistics.median(samples)
+
+    per_call(with_claims, False)  # warm up
+    return {
+        "database": per_call(sub_only, True),
+        "principal cache": per_call(sub_only, False),
+        "token claims": per_call(with_claims, False),
+    }
+
+
+def hammer(port, path, headers, clients, seconds) -> float:
+    counts = [0] * clients
+    deadline = time.perf_counter() + seconds
+
+    def client(index):
+        while time.perf_counter() < deadline:
+            request(port, "GET", path, headers=headers)
+            counts[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000, help="get_current_user calls per mode")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10, help="per mode; 0 skips the server runs")
+    args = parser.parse_args()
+
+    print("get_current_user")
+    for label, micros in dependency_cost(args.iterations).items():
+        print(f"  {label:<16} {micros:8.1f} us/call")
+
+    if not args.seconds:
+        return
+    print("GET /documents/{id}")
+    for label, env in SERVER_MODES:
+        with running_server(env) as (port, _pid, token):
+            auth = {"Authorization": f"Bearer {token}"}
+            body, headers = multipart({"title": "target"}, "target.pdf", [b"%PDF-1.4"], 8)
+            doc_id = request(port, "POST", "/documents/", body, {**auth, **headers})["id"]
+            hammer(port, f"/documents/{doc_id}", auth, args.clients, 1)  # warm up
+            rps = hammer(port, f"/documents/{doc_id}", auth, args.clients, args.seconds)
+            print(f"  {label:<16} {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Requests per second on GET /documents/{id}, with and without the principal cache.
+
+    cd Backend && python -m benchmarks.auth_rps --clients 8 --seconds 10
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.server import multipart, request, running_server
+
+
+def hammer(port, path, headers, clients, seconds) -> float:
+    counts = [0] * clients
+    deadline = time.perf_counter() + seconds
+
+    def client(index):
+        while time.perf_counter() < deadline:
+            request(port, "GET", path, headers=headers)
+            counts[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    for label, ttl in [("cache disabled", "0"), ("cache enabled", "30")]:
+        with running_server({"PRINCIPAL_CACHE_TTL_SECONDS": ttl}) as (port, _pid, token):
+            auth = {"Authorization": f"Bearer {token}"}
+            body, headers = multipart({"title": "target"}, "target.pdf", [b"%PDF-1.4"], 8)
+            doc_id = request(port, "POST", "/documents/", body, {**auth, **headers})["id"]
+            hammer(port, f"/documents/{doc_id}", auth, args.clients, 1)  # warm up
+            rps = hammer(port, f"/documents/{doc_id}", auth, args.clients, args.seconds)
+            print(f"{label:<15} {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
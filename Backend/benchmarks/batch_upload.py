@@ -0,0 +1,80 @@
+"""
+Files per second: POST /documents/ one file at a time vs. POST /documents/batch.
+
+    cd Backend && python -m benchmarks.batch_upload --files 1000 --size-kb 4 --batch-size 250
+
+Both runs use a fresh server. The single-file run uses `--clients` concurrent clients.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+
+from benchmarks.server import multipart, request, running_server
+
+
+def batch_body(files: list[bytes], tags: list[str]):
+    boundary = uuid.uuid4().hex
+    metadata = json.dumps([{"title": f"batch {i}", "tags": tags} for i in range(len(files))])
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="metadata"\r\n\r\n{metadata}\r\n'.encode()]
+    for i, content in enumerate(files):
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="f{i}.pdf"\r\n'
+            f"Content-Type: application/pdf\r\n\r\n".encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def run_single(port, auth, files, clients):
+    queue = list(enumerate(files))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not queue:
+                    return
+                i, content = queue.pop()
+            body, headers = multipart({"title": f"single {i}"}, f"f{i}.pdf", [content], len(content))
+            request(port, "POST", "/documents/", body, {**auth, **headers})
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_batch(port, auth, files, batch_size):
+    for start in range(0, len(files), batch_size):
+        body, headers = batch_body(files[start:start + batch_size], ["bench", "migration"])
+        result = request(port, "POST", "/documents/batch", body, {**auth, **headers})
+        assert result["failed"] == 0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--size-kb", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=250)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+    files = [os.urandom(args.size_kb * 1024) for _ in range(args.files)]
+
+    runs = [
+        (f"single x{args.clients} clients", lambda port, auth: run_single(port, auth, files, args.clients)),
+        (f"batch of {args.batch_size}", lambda port, auth: run_batch(port, auth, files, args.batch_size)),
+    ]
+    for label, run in runs:
+        with running_server() as (port, _pid, token):
+            start = time.perf_counter()
+            run(port, {"Authorization": f"Bearer {token}"})
+            elapsed = time.perf_counter() - start
+            print(f"{label:<20} {args.files} files in {elapsed:6.2f}s  {args.files / elapsed:8.1f} files/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Seeded synthetic corpora for benchmarks.suite: a database and blob store shaped like a real
+deployment (versions, tags, departments, access levels and grants), written with bulk SQL so
+a million documents take minutes instead of a day of uploads.
+
+    cd Backend && python -m benchmarks.corpus --documents 100000 --out /tmp/corpus-100k
+
+The same options and --seed always give the same corpus, ids included. Besides database.db
+and Documents/, the directory gets corpus.json: the options, row counts, and what the suite
+needs to build requests (the bench user, document ids it can see, search terms).
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import NamedTuple
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench"
+CHUNK_DOCUMENTS = 20_000  # documents generated and written per transaction
+SAMPLE_IDS = 2000  # visible document ids kept in corpus.json for get/download/version requests
+START = 1_600_000_000  # created_at of the oldest document (September 2020), in epoch seconds
+
+
+class CorpusSpec(NamedTuple):
+    documents: int = 1000
+    versions: float = 3.0  # mean versions per document (at least 1; the rest are exponentially spread)
+    users: int = 500
+    departments: int = 10
+    tags: int = 200  # tag vocabulary; popularity follows Zipf's law
+    tags_per_document: float = 2.0  # mean before duplicate picks of popular tags are dropped
+    public: float = 0.6  # access level shares; the rest are private
+    department: float = 0.25
+    department_grants: float = 0.2  # share of department documents also shared with another department
+    user_grants: float = 0.3  # share of private documents shared with 1-3 users
+    blobs: int = 200  # distinct files, shared by all versions
+    seed: int = 42
+
+    def key(self) -> str:
+        """Stable name for a corpus built from these options (used for caching)."""
+        digest = hashlib.sha256(json.dumps(self._asdict(), sort_keys=True).encode()).hexdigest()
+        return f"{self.documents}-{digest[:12]}"
+
+
+def _id(rnd: random.Random) -> str:
+    # uuid4 draws from os.urandom; seeded ids keep the corpus reproducible
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+
+def _timestamp(seconds: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+
+
+def _write_blobs(spec: CorpusSpec, rnd: random.Random, storage_root: str) -> list[str]:
+    from app.utils.file_handler import blob_path
+
+    paths = []
+    for i in range(spec.blobs):
+        ext = rnd.choice([".pdf", ".pdf", ".docx", ".txt", ".png"])
+        content = rnd.randbytes(rnd.choice([4, 16, 64, 256]) * 1024)
+        relative_path = blob_path(hashlib.sha256(content).hexdigest(), ext)
+        full_path = os.path.join(storage_root, relative_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(content)
+        paths.append(relative_path)
+    return paths
+
+
+def build(spec: CorpusSpec, out: str) -> dict:
+    """Create the corpus in `out` (a new directory) and return its manifest."""
+    os.makedirs(os.path.join(out, "Documents"), exist_ok=True)
+    # app.db connects on import: point it at the corpus first (benchmarks.search_fts imports app too)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(out, 'database.db')}"
+    os.environ["STORAGE_ROOT"] = out
+    os.environ["SLOW_QUERY_MS"] = "0"  # the bulk index rebuilds are slow by design
+    if "app.db" in sys.modules:
+        raise RuntimeError("build() must run before anything imports app.db; use `python -m benchmarks.corpus`")
+    from sqlmodel import Session
+    from benchmarks.search_fts import vocabulary
+    from app.db import engine
+    from app.db.session import init_db
+    from app.utils.search_index import rebuild_search_index
+    from app.utils.security import hash_password
+    from app.utils.visibility_index import rebuild_visibility
+
+    started = time.perf_counter()
+    init_db()
+    rnd = random.Random(spec.seed)
+    words, weights = vocabulary(rnd)
+    weights = list(itertools.accumulate(weights))  # choices() would redo this on every call
+    blobs = _write_blobs(spec, rnd, out)
+    hashed = hash_password(BENCH_PASSWORD)  # every user shares it: bcrypt per user would dominate
+
+    departments = list(range(1, spec.departments + 1))
+    users = [(_id(rnd), BENCH_EMAIL if i == 0 else f"user{i}@example.com", f"{words[i % len(words)].title()} User{i}",
+              hashed, 1 if i == 0 else rnd.choice(departments), 2) for i in range(spec.users)]
+    department_of = {user[0]: user[4] for user in users}
+    user_ids = [user[0] for user in users]
+    uploader_weights = list(itertools.accumulate(  # a few heavy uploaders
+        1 / (rank + 1) for rank in rnd.sample(range(len(users)), len(users))
+    ))
+    tag_names = sorted({rnd.choice(words) + "-" + rnd.choice(words) for _ in range(spec.tags * 2)})[:spec.tags]
+    tag_ids = list(range(1, len(tag_names) + 1))
+    tag_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(tag_names))))
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO roles (id, name) VALUES (1, 'admin'), (2, 'user')")
+        conn.exec_driver_sql("INSERT INTO departments (id, name) VALUES (?, ?)", [(d, f"Department {d}") for d in departments])
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email, full_name, hashed_password, department_id, role_id) VALUES (?, ?, ?, ?, ?, ?)",
+            users,
+        )
+        conn.exec_driver_sql("INSERT INTO tags (id, name) VALUES (?, ?)", list(enumerate(tag_names, start=1)))
+
+    bench_id, bench_department = user_ids[0], 1
+    sample, counts = [], dict.fromkeys(["documents", "versions", "document_tags", "department_grants", "user_grants"], 0)
+    step = 3 * 365 * 24 * 3600 // max(spec.documents, 1)  # documents spread over three years
+    for start in range(0, spec.documents, CHUNK_DOCUMENTS):
+        documents, versions, links, department_grants, user_grants = [], [], [], [], []
+        for i in range(start, min(start + CHUNK_DOCUMENTS, spec.documents)):
+            doc_id, uploader = _id(rnd), rnd.choices(user_ids, cum_weights=uploader_weights)[0]
+            created = START + i * step + rnd.randrange(max(step, 1))
+            roll = rnd.random()
+            access_level = "public" if roll < spec.public else "department" if roll < spec.public + spec.department else "private"
+            # int() of an exponential averages half a unit below its mean
+            version_count = 1 + min(int(rnd.expovariate(1 / (spec.versions - 0.5))) if spec.versions > 1 else 0, 50)
+            first_version = len(versions)
+            uploaded = created
+            for number in range(1, version_count + 1):
+                versions.append((_id(rnd), doc_id, number, rnd.choice(blobs), uploader, _timestamp(uploaded)))
+                uploaded += rnd.randrange(3600, 90 * 24 * 3600)
+            # Like uploads: the document keeps its first file and version id, updated_at follows new versions
+            documents.append((
+                doc_id,
+                " ".join(rnd.choices(words, cum_weights=weights, k=rnd.randint(3, 8))).capitalize(),
+                " ".join(rnd.choices(words, cum_weights=weights, k=rnd.randint(10, 40))),
+                access_level,
+                versions[first_version][3],
+                uploader,
+                versions[first_version][0],
+                _timestamp(created),
+                versions[-1][5],
+            ))
+            tag_count = min(int(rnd.expovariate(1 / (spec.tags_per_document + 0.5))), 8) if spec.tags_per_document else 0
+            links += [(doc_id, tag) for tag in set(rnd.choices(tag_ids, cum_weights=tag_weights, k=tag_count))]
+            granted_department = granted_users = None
+            if access_level == "department" and rnd.random() < spec.department_grants:
+                granted_department = rnd.choice(departments)
+                department_grants.append((_id(rnd), doc_id, granted_department, "view"))
+            elif access_level == "private" and rnd.random() < spec.user_grants:
+                granted_users = rnd.sample(user_ids, k=min(rnd.randint(1, 3), len(user_ids)))
+                user_grants += [(_id(rnd), doc_id, user_id, rnd.choice(["view", "view", "edit"])) for user_id in granted_users]
+            visible = (
+                access_level == "public"
+                or uploader == bench_id
+                or access_level == "department" and bench_department in (department_of[uploader], granted_department)
+                or access_level == "private" and bench_id in (granted_users or [])
+            )
+            if visible and len(sample) < SAMPLE_IDS and rnd.random() < 0.5:
+                sample.append(doc_id)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO documents (id, title, description, access_level, file_path, uploader_id, "
+                "current_version_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                documents,
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO document_versions (id, document_id, version_number, file_path, uploaded_by, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                versions,
+            )
+            conn.exec_driver_sql("INSERT INTO document_tags (document_id, tag_id) VALUES (?, ?)", links)
+            if department_grants:
+                conn.exec_driver_sql(
+                    "INSERT INTO document_department_permissions (id, document_id, department_id, permission) VALUES (?, ?, ?, ?)",
+                    department_grants,
+                )
+            if user_grants:
+                conn.exec_driver_sql(
+                    "INSERT INTO document_user_permissions (id, document_id, user_id, permission) VALUES (?, ?, ?, ?)",
+                    user_grants,
+                )
+        counts["documents"] += len(documents)
+        counts["versions"] += len(versions)
+        counts["document_tags"] += len(links)
+        counts["department_grants"] += len(department_grants)
+        counts["user_grants"] += len(user_grants)
+        print(f"  {counts['documents']}/{spec.documents} documents", file=sys.stderr)
+
+    with Session(engine) as session:
+        rebuild_search_index(session)
+        rebuild_visibility(session)
+        session.commit()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+    manifest = {
+        "spec": spec._asdict(),
+        "counts": counts,
+        "build_seconds": round(time.perf_counter() - started, 1),
+        "bench_user": {"email": BENCH_EMAIL, "password": BENCH_PASSWORD},
+        "document_ids": sample,
+        # Search terms by popularity: a few very common words, then a long tail
+        "search_terms": words[:20] + words[100:120] + words[1000:1020],
+        "tags": tag_names[:20],
+    }
+    with open(os.path.join(out, "corpus.json"), "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for name, default in CorpusSpec()._asdict().items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    parser.add_argument("--out", required=True, help="directory to create (must not exist)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} already exists")
+    spec = CorpusSpec(**{name: getattr(args, name) for name in CorpusSpec._fields})
+    manifest = build(spec, args.out)
+    print(json.dumps({"out": args.out, "counts": manifest["counts"], "build_seconds": manifest["build_seconds"]}))
+
+
+if __name__ == "__main__":
+    main()
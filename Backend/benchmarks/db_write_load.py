@@ -0,0 +1,74 @@
+"""
+Write throughput of POST /documents/ under concurrency, legacy vs. tuned engine settings.
+
+    cd Backend && python -m benchmarks.db_write_load --writers 8 --readers 4 --seconds 10
+
+"legacy" reproduces the old engine (rollback journal, synchronous=FULL, no busy timeout,
+SQL echo on); "tuned" uses the defaults from app/core/config.py. Errors are requests that
+failed, typically "database is locked".
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.server import multipart, request, running_server
+
+PROFILES = {
+    "legacy": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_BUSY_TIMEOUT_MS": "0",
+        "DATABASE_ECHO": "true",
+    },
+    "tuned": {},
+}
+
+
+def run(port, token, writers, readers, seconds):
+    auth = {"Authorization": f"Bearer {token}"}
+    created, reads, errors = [0] * writers, [0] * readers, [0]
+    deadline = time.perf_counter() + seconds
+
+    def writer(index):
+        while time.perf_counter() < deadline:
+            body, headers = multipart({"title": f"load {index}"}, "load.pdf", [os.urandom(2048)], 2048)
+            try:
+                request(port, "POST", "/documents/", body, {**auth, **headers})
+                created[index] += 1
+            except (RuntimeError, OSError):
+                errors[0] += 1
+
+    def reader(index):
+        while time.perf_counter() < deadline:
+            try:
+                request(port, "GET", "/documents/?limit=20", headers=auth)
+                reads[index] += 1
+            except (RuntimeError, OSError):
+                errors[0] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(created) / seconds, sum(reads) / seconds, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    for name, env in PROFILES.items():
+        with running_server(env, workers=args.workers) as (port, _pid, token):
+            writes, reads, errors = run(port, token, args.writers, args.readers, args.seconds)
+            print(f"{name:<7} {writes:7.1f} docs/s  {reads:7.1f} list req/s  {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Latency of GET /documents/{id} during a burst of logins, which hash passwords on their own
+executor rather than on the request threadpool.
+
+    cd Backend && python -m benchmarks.login_burst --login-clients 32 --seconds 10
+
+Every login client has its own account; they all come from 127.0.0.1, so the per-address
+limit is raised above --login-clients to measure the executor alone. Reads keep their
+threadpool workers however small --threadpool-size is; what they still compete with is the
+CPU the hashes use, which --hash-workers (PASSWORD_HASH_WORKERS) bounds: keep it below the
+number of cores.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.parse
+
+from benchmarks.server import multipart, request, running_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--login-clients", type=int, default=32)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--threadpool-size", type=int, default=40)
+    parser.add_argument("--hash-workers", type=int, default=1, help="PASSWORD_HASH_WORKERS")
+    args = parser.parse_args()
+
+    env = {
+        "THREADPOOL_SIZE": str(args.threadpool_size),
+        "PASSWORD_HASH_WORKERS": str(args.hash_workers),
+        "LOGIN_MAX_CONCURRENT_PER_IP": str(args.login_clients + 1),
+        "PRINCIPAL_CACHE_TTL_SECONDS": "30",
+    }
+    with running_server(env) as (port, _pid, token):
+        auth = {"Authorization": f"Bearer {token}"}
+        body, headers = multipart({"title": "target"}, "target.pdf", [b"%PDF-1.4"], 8)
+        doc_id = request(port, "POST", "/documents/", body, {**auth, **headers})["id"]
+        for i in range(args.login_clients):
+            request(port, "POST", "/auth/register", json.dumps({
+                "email": f"burst{i}@example.com", "password": "burst", "full_name": f"Burst {i}", "department_id": 1,
+            }), {"Content-Type": "application/json"})
+
+        def read_latencies(seconds) -> list[float]:
+            samples, deadline = [], time.perf_counter() + seconds
+
+            def reader():
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    request(port, "GET", f"/documents/{doc_id}", headers=auth)
+                    samples.append((time.perf_counter() - start) * 1000)
+
+            threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return sorted(samples)
+
+        def report(label, samples, logins=None):
+            p99 = statistics.quantiles(samples, n=100)[98]
+            extra = f"  {logins / args.seconds:6.1f} logins/s" if logins is not None else ""
+            print(f"{label:<12} reads p50 {statistics.median(samples):7.2f} ms  p99 {p99:8.2f} ms{extra}")
+
+        report("idle", read_latencies(args.seconds))
+
+        logins, stop = [0], threading.Event()
+
+        def login_client(index):
+            form = urllib.parse.urlencode({"username": f"burst{index}@example.com", "password": "burst"})
+            while not stop.is_set():
+                request(port, "POST", "/auth/login", form, {"Content-Type": "application/x-www-form-urlencoded"})
+                logins[0] += 1
+
+        burst = [threading.Thread(target=login_client, args=(i,)) for i in range(args.login_clients)]
+        for thread in burst:
+            thread.start()
+        samples = read_latencies(args.seconds)
+        stop.set()
+        for thread in burst:
+            thread.join()
+        report("login burst", samples, logins[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compare the FTS5 search index with the old ilike path.
+
+    cd Backend && python -m benchmarks.search_fts --documents 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from app import models  # noqa: F401  (registers tables)
+from app.models.documents import Document
+from app.utils.pagination import count_rows, paginate
+from app.utils.search_index import create_search_index, ilike_search, search_matches
+
+SYLLABLES = ["ba", "ko", "ri", "fen", "tal", "mu", "dor", "si", "pla", "nex", "vo", "gra", "lu", "zen", "qua"]
+TAGS = ["finance", "hr", "legal", "engineering", "sales", "ops", "ai", "testing"]
+
+
+def vocabulary(rnd: random.Random, size: int = 5000):
+    """Pseudo-words with Zipf-like frequencies, roughly how words spread in real titles."""
+    words = sorted({"".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))) for _ in range(size * 2)})[:size]
+    rnd.shuffle(words)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+
+def seed(engine, documents: int, rnd: random.Random):
+    words, weights = vocabulary(rnd)
+    users = [(str(uuid.uuid4()), f"user{i}@example.com", f"{rnd.choice(words).title()} User{i}") for i in range(200)]
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO roles (id, name) VALUES (1, 'admin'), (2, 'user')")
+        conn.exec_driver_sql("INSERT INTO departments (id, name) VALUES (1, 'd1'), (2, 'd2')")
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email, full_name, hashed_password, department_id, role_id) VALUES (?, ?, ?, 'x', 1, 2)",
+            users,
+        )
+        conn.exec_driver_sql("INSERT INTO tags (id, name) VALUES " + ", ".join(f"({i + 1}, '{t}')" for i, t in enumerate(TAGS)))
+        docs, links = [], []
+        for i in range(documents):
+            doc_id = str(uuid.uuid4())
+            title = " ".join(rnd.choices(words, weights, k=4))
+            description = " ".join(rnd.choices(words, weights, k=20))
+            docs.append((doc_id, title, description, "public", "", rnd.choice(users)[0], f"2025-01-01 00:00:{i % 60:02d}"))
+            links += [(doc_id, t) for t in rnd.sample(range(1, len(TAGS) + 1), k=2)]
+        conn.exec_driver_sql(
+            "INSERT INTO documents (id, title, description, access_level, file_path, uploader_id, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            docs,
+        )
+        conn.exec_driver_sql("INSERT INTO document_tags (document_id, tag_id) VALUES (?, ?)", links)
+    return words
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 2), "max_ms": round(max(samples), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    rnd = random.Random(args.seed)
+    words = seed(engine, args.documents, rnd)
+
+    start = time.perf_counter()
+    create_search_index(engine)
+    print(f"indexed {args.documents} documents in {time.perf_counter() - start:.1f}s")
+
+    # Each run fetches one page plus the total, like GET /documents/search does
+    with Session(engine) as session:
+        base = select(Document).where(Document.access_level == "public")
+        queries = [
+            ("title", words[0]),  # most frequent word
+            ("title", words[50]),
+            ("tags", "finance"),
+            ("uploader", "user123"),
+            ("all", f"{words[10]} {words[200]}"),
+        ]
+        for field, q in queries:
+            def ilike():
+                query = ilike_search(base, field, q)
+                session.exec(paginate(query, 10)).all()
+                count_rows(session, query)
+
+            def fts():
+                matches = search_matches(session, field, q)
+                joined = select(Document, matches.c.rank).join(matches, matches.c.document_id == Document.id)
+                session.exec(paginate(joined.where(Document.access_level == "public"), 10, rank=matches.c.rank)).all()
+                count_rows(session, base.join(matches, matches.c.document_id == Document.id))
+
+            print(f"{field:>8} {q!r:>18}  ilike {timed(ilike, args.repeat)}  fts {timed(fts, args.repeat)}")
+
+if __name__ == "__main__":
+    main()
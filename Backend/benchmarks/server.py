@@ -0,0 +1,111 @@
+"""Helpers for benchmarks that drive a real uvicorn process over HTTP."""
+import contextlib
+import http.client
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import uuid
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    payload = response.read()
+    conn.close()
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path} -> {response.status} {payload[:200]!r}")
+    return json.loads(payload) if payload and response.getheader("content-type") == "application/json" else payload
+
+
+def multipart(fields: dict, filename: str, chunks, size: int):
+    """(body iterator, headers) for a streamed multipart/form-data upload of `size` bytes."""
+    boundary = uuid.uuid4().hex
+    head = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    )
+    head += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    def body():
+        yield head
+        yield from chunks
+        yield tail
+
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Content-Length": str(len(head) + size + len(tail)),
+    }
+    return body(), headers
+
+
+@contextlib.contextmanager
+def running_server(env: dict = None, workers: int = 1, workdir: str = None, login: tuple = None):
+    """
+    Start uvicorn on a scratch database and storage root; yields (port, pid, bearer token).
+    With `workdir` and `login` (email, password), serve the database and files already there
+    (see benchmarks.corpus) and log in instead of registering.
+    """
+    workdir = workdir or tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, "Documents"), exist_ok=True)
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir,
+        env=dict(os.environ, PYTHONPATH=BACKEND_DIR, STORAGE_ROOT=workdir, **(env or {})),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(200):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        if login:
+            email, password = login
+            token = request(port, "POST", "/auth/login", urllib.parse.urlencode({
+                "username": email, "password": password,
+            }), {"Content-Type": "application/x-www-form-urlencoded"})["access_token"]
+        else:
+            db = sqlite3.connect(os.path.join(workdir, "database.db"))
+            db.execute("INSERT INTO roles (id, name) VALUES (1, 'admin'), (2, 'user')")
+            db.execute("INSERT INTO departments (id, name) VALUES (1, 'bench')")
+            db.commit()
+            db.close()
+            token = request(port, "POST", "/auth/register", json.dumps({
+                "email": "bench@example.com", "password": "bench", "full_name": "Bench", "department_id": 1,
+            }), {"Content-Type": "application/json"})["access_token"]
+        yield port, server.pid, token
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,268 @@
+"""
+Throughput and latency of the main routes on seeded corpora (see benchmarks.corpus), saved as
+JSON so runs can be compared.
+
+    cd Backend
+    python -m benchmarks.suite run --scenario 1k --out before.json
+    python -m benchmarks.suite run --scenario 100k --clients 8 --seconds 20 --env RESPONSE_CACHE_TTL_SECONDS=0
+    python -m benchmarks.suite compare before.json after.json
+
+Scenarios 1k, 100k and 1m differ in corpus size (users, departments and tags grow with it).
+A corpus is built once per spec and cached in --corpus-dir (1m takes a while and a few GB);
+each run serves a fresh copy, so uploads never leak into the next run. Every operation runs
+for --seconds on --clients keep-alive connections after a warm-up, as the corpus's bench user,
+a non-admin, so access rules are exercised. The clients share the machine with the server:
+only compare results from the same host.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from benchmarks.corpus import CorpusSpec
+from benchmarks.server import BACKEND_DIR, multipart, running_server
+
+SCENARIOS = {
+    "1k": CorpusSpec(documents=1_000, users=50, departments=5, tags=50),
+    "100k": CorpusSpec(documents=100_000, users=2_000, departments=20, tags=500),
+    "1m": CorpusSpec(documents=1_000_000, users=20_000, departments=50, tags=2_000),
+}
+UPLOAD_BYTES = 16 * 1024
+
+
+# ================================================================================================
+#                                       Operations
+# ================================================================================================
+# Each builds one request from a client's random generator: (method, path, body, headers).
+# Writes come last so the reads see the corpus as it was built.
+def list_documents(rnd, corpus):
+    return "GET", "/documents/?limit=20", None, {}
+
+
+def search_title(rnd, corpus):
+    q = urllib.parse.quote(rnd.choice(corpus["search_terms"]))
+    return "GET", f"/documents/search?q={q}&field=title&per_page=10", None, {}
+
+
+def search_tags(rnd, corpus):
+    q = urllib.parse.quote(rnd.choice(corpus["tags"]))
+    return "GET", f"/documents/search?q={q}&field=tags&per_page=10", None, {}
+
+
+def get_document(rnd, corpus):
+    return "GET", f"/documents/{rnd.choice(corpus['document_ids'])}", None, {}
+
+
+def download(rnd, corpus):
+    return "GET", f"/documents/{rnd.choice(corpus['document_ids'])}/download", None, {}
+
+
+def upload(rnd, corpus):
+    fields = {"title": f"bench upload {rnd.getrandbits(32)}", "access_level": rnd.choice(["public", "department", "private"])}
+    body, headers = multipart(fields, "upload.pdf", [rnd.randbytes(UPLOAD_BYTES)], UPLOAD_BYTES)
+    return "POST", "/documents/", b"".join(body), headers
+
+
+def upload_version(rnd, corpus):
+    body, headers = multipart({}, "version.pdf", [rnd.randbytes(UPLOAD_BYTES)], UPLOAD_BYTES)
+    return "POST", f"/documents/{rnd.choice(corpus['document_ids'])}/versions", b"".join(body), headers
+
+
+OPERATIONS = {
+    "list": list_documents,
+    "search": search_title,
+    "search_tags": search_tags,
+    "get": get_document,
+    "download": download,
+    "upload": upload,
+    "version_upload": upload_version,
+}
+
+
+# ================================================================================================
+#                                        Running
+# ================================================================================================
+def ensure_corpus(spec: CorpusSpec, corpus_dir: str) -> str:
+    """Directory of the corpus for `spec`, built on first use."""
+    path = os.path.join(corpus_dir, spec.key())
+    if os.path.exists(os.path.join(path, "corpus.json")):
+        return path
+    shutil.rmtree(path, ignore_errors=True)  # an interrupted build
+    print(f"building corpus {path} ...", file=sys.stderr)
+    options = [item for name, value in spec._asdict().items() for item in (f"--{name.replace('_', '-')}", str(value))]
+    subprocess.run([sys.executable, "-m", "benchmarks.corpus", *options, "--out", path], cwd=BACKEND_DIR, check=True)
+    return path
+
+
+def measure(port, token, corpus, operation, clients, seconds, warmup, seed) -> dict:
+    """Closed loop: each client sends its next request as soon as the last one is answered."""
+    latencies, errors = [[] for _ in range(clients)], [0] * clients
+    started = time.perf_counter()
+    measure_from, deadline = started + warmup, started + warmup + seconds
+
+    def client(index):
+        rnd = random.Random(seed * 1000 + index)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+        while True:
+            method, path, body, headers = operation(rnd, corpus)
+            sent = time.perf_counter()
+            if sent >= deadline:
+                break
+            try:
+                conn.request(method, path, body=body, headers={"Authorization": f"Bearer {token}", **headers})
+                response = conn.getresponse()
+                response.read()
+                failed = response.status >= 400
+            except (OSError, http.client.HTTPException):
+                conn.close()  # reconnects on the next request
+                failed = True
+            if sent >= measure_from:
+                latencies[index].append(time.perf_counter() - sent)
+                errors[index] += failed
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = sorted(latency * 1000 for client_latencies in latencies for latency in client_latencies)
+    result = {"requests": len(samples), "errors": sum(errors), "rps": round(len(samples) / seconds, 1)}
+    if len(samples) >= 2:
+        percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+        result.update(
+            mean_ms=round(statistics.fmean(samples), 2),
+            p50_ms=round(percentiles[49], 2),
+            p90_ms=round(percentiles[89], 2),
+            p99_ms=round(percentiles[98], 2),
+            max_ms=round(samples[-1], 2),
+        )
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    spec = SCENARIOS[args.scenario]._replace(seed=args.seed)
+    corpus_path = ensure_corpus(spec, args.corpus_dir)
+    with open(os.path.join(corpus_path, "corpus.json")) as f:
+        corpus = json.load(f)
+    env = dict(item.split("=", 1) for item in args.env)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        shutil.copyfile(os.path.join(corpus_path, "database.db"), os.path.join(workdir, "database.db"))
+        shutil.copytree(os.path.join(corpus_path, "Documents"), os.path.join(workdir, "Documents"))
+        login = (corpus["bench_user"]["email"], corpus["bench_user"]["password"])
+        results = {}
+        with running_server(env, workers=args.workers, workdir=workdir, login=login) as (port, _pid, token):
+            for name in args.operations:
+                results[name] = measure(
+                    port, token, corpus, OPERATIONS[name], args.clients, args.seconds, args.warmup, args.seed
+                )
+                print(f"{name:<15} {_summary(results[name])}", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "scenario": args.scenario,
+        "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+        "commit": _git_commit(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "corpus": {"spec": corpus["spec"], "counts": corpus["counts"]},
+        "options": {
+            "clients": args.clients, "seconds": args.seconds, "warmup": args.warmup,
+            "workers": args.workers, "seed": args.seed, "env": env,
+        },
+        "operations": results,
+    }
+
+
+def _summary(result: dict) -> str:
+    if not result["requests"]:
+        return "no requests"
+    return (f"{result['rps']:8.1f} req/s  p50 {result.get('p50_ms', 0):8.2f} ms  "
+            f"p99 {result.get('p99_ms', 0):8.2f} ms  {result['errors']} errors")
+
+
+# ================================================================================================
+#                                       Comparing
+# ================================================================================================
+def compare(before: dict, after: dict, threshold: float) -> int:
+    """Print the change per operation; returns the number of regressions beyond `threshold` (%)."""
+    if before.get("scenario") != after.get("scenario") or before.get("options") != after.get("options"):
+        print("warning: the runs used different scenarios or options", file=sys.stderr)
+    regressions = 0
+    print(f"{'operation':<15} {'req/s':>22} {'p50 ms':>22} {'p99 ms':>22}")
+    for name, new in after["operations"].items():
+        old = before["operations"].get(name)
+        if old is None or not old["requests"] or not new["requests"]:
+            continue
+        changes = {
+            "rps": (new["rps"] - old["rps"]) / old["rps"] * 100,
+            "p50_ms": (new["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100,
+            "p99_ms": (new["p99_ms"] - old["p99_ms"]) / old["p99_ms"] * 100,
+        }
+        # Fewer requests per second or a slower median is a regression; p99 is too noisy to gate on
+        regressed = changes["rps"] < -threshold or changes["p50_ms"] > threshold or new["errors"] > old["errors"]
+        regressions += regressed
+        columns = " ".join(f"{old[key]:>9} -> {new[key]:<9}{changes[key]:+4.0f}%" for key in ("rps", "p50_ms", "p99_ms"))
+        print(f"{name:<15} {columns}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    runner = commands.add_parser("run", help="benchmark one scenario")
+    runner.add_argument("--scenario", choices=SCENARIOS, default="1k")
+    runner.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    runner.add_argument("--clients", type=int, default=4, help="concurrent connections")
+    runner.add_argument("--seconds", type=float, default=10, help="measured time per operation")
+    runner.add_argument("--warmup", type=float, default=2, help="unmeasured time before each operation")
+    runner.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    runner.add_argument("--seed", type=int, default=42, help="corpus and request generator seed")
+    runner.add_argument("--env", nargs="*", default=[], metavar="NAME=VALUE", help="server settings")
+    runner.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "dms-benchmark-corpora"))
+    runner.add_argument("--out", help="results file (default bench-<scenario>-<time>.json)")
+    comparer = commands.add_parser("compare", help="compare two results files")
+    comparer.add_argument("before")
+    comparer.add_argument("after")
+    comparer.add_argument("--threshold", type=float, default=10, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.before) as f:
+            before = json.load(f)
+        with open(args.after) as f:
+            after = json.load(f)
+        return 1 if compare(before, after, args.threshold) else 0
+
+    results = run(args)
+    out = args.out or f"bench-{args.scenario}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
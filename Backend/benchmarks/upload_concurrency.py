@@ -0,0 +1,78 @@
+"""
+Read latency while uploads are in flight.
+
+    cd Backend && python -m benchmarks.upload_concurrency --uploaders 4 --size-mb 32 --seconds 15
+
+Measures GET /documents/{id} latency on a single uvicorn worker, first idle and then while
+`--uploaders` threads keep posting new versions to POST /documents/{id}/versions.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from benchmarks.server import multipart, request, running_server
+
+BLOCK = os.urandom(1024 * 1024)
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def measure_reads(port, auth, doc_id, seconds):
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        request(port, "GET", f"/documents/{doc_id}", headers=auth)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(
+        f"{label:<18} n={len(samples):>5}  p50 {statistics.median(samples):7.1f} ms"
+        f"  p99 {percentile(samples, 99):7.1f} ms  max {max(samples):7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploaders", type=int, default=4)
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=15)
+    args = parser.parse_args()
+
+    with running_server() as (port, _pid, token):
+        auth = {"Authorization": f"Bearer {token}"}
+        body, headers = multipart({"title": "target"}, "target.pdf", [b"%PDF-1.4"], 8)
+        doc_id = request(port, "POST", "/documents/", body, {**auth, **headers})["id"]
+
+        report("idle", measure_reads(port, auth, doc_id, args.seconds / 3))
+
+        stop = threading.Event()
+        uploads = []
+
+        def uploader():
+            while not stop.is_set():
+                chunks = [BLOCK] * (args.size_mb - 1) + [os.urandom(len(BLOCK))]  # unique content
+                body, headers = multipart({}, "version.pdf", chunks, args.size_mb * len(BLOCK))
+                request(port, "POST", f"/documents/{doc_id}/versions", body, {**auth, **headers})
+                uploads.append(1)
+
+        threads = [threading.Thread(target=uploader, daemon=True) for _ in range(args.uploaders)]
+        for thread in threads:
+            thread.start()
+        samples = measure_reads(port, auth, doc_id, args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        report(f"{args.uploaders} uploaders", samples)
+        print(f"uploads completed: {len(uploads)} x {args.size_mb} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Peak server memory while uploading increasingly large files (Linux only, reads /proc).
+
+    cd Backend && python -m benchmarks.upload_memory --sizes-mb 16 128 512
+
+Starts uvicorn in a scratch directory, uploads each size through POST /documents/ and
+through the resumable upload API, and prints the server's peak RSS (VmHWM) after each one.
+With streaming ingest the peak should stay flat as the file size grows.
+"""
+import argparse
+import os
+import time
+
+from benchmarks.server import multipart, peak_rss_mb, request, running_server
+
+BLOCK = os.urandom(1024 * 1024)
+
+
+def file_chunks(size_mb: int):
+    for _ in range(size_mb):
+        yield BLOCK
+
+
+def upload_multipart(port, token, size_mb):
+    body, headers = multipart({"title": f"bench {size_mb}MB"}, "bench.pdf", file_chunks(size_mb), size_mb * len(BLOCK))
+    request(port, "POST", "/documents/", body, {"Authorization": f"Bearer {token}", **headers})
+
+
+def upload_resumable(port, token, size_mb, chunk_mb=8):
+    auth = {"Authorization": f"Bearer {token}"}
+    form = {"Content-Type": "application/x-www-form-urlencoded", **auth}
+    upload_id = request(port, "POST", "/documents/uploads", "filename=bench.pdf", form)["upload_id"]
+    offset = 0
+    for start in range(0, size_mb, chunk_mb):
+        blocks = min(chunk_mb, size_mb - start)
+        length = blocks * len(BLOCK)
+        request(port, "PUT", f"/documents/uploads/{upload_id}?offset={offset}", file_chunks(blocks), {
+            "Content-Length": str(length), **auth,
+        })
+        offset += length
+    request(port, "POST", f"/documents/uploads/{upload_id}/complete", f"title=resumable+{size_mb}MB", form)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[16, 128, 512])
+    args = parser.parse_args()
+
+    env = {"MAX_UPLOAD_SIZE_BYTES": str((max(args.sizes_mb) + 1) * 1024 * 1024)}
+    with running_server(env) as (port, pid, token):
+        print(f"baseline peak RSS: {peak_rss_mb(pid):.1f} MB")
+        for size_mb in args.sizes_mb:
+            start = time.perf_counter()
+            upload_multipart(port, token, size_mb)
+            single = (time.perf_counter() - start, peak_rss_mb(pid))
+            start = time.perf_counter()
+            upload_resumable(port, token, size_mb)
+            chunked = (time.perf_counter() - start, peak_rss_mb(pid))
+            print(
+                f"{size_mb:>6} MB  multipart {single[0]:6.2f}s peak {single[1]:7.1f} MB"
+                f"  |  resumable {chunked[0]:6.2f}s peak {chunked[1]:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Baseline: the schema previously created by SQLModel.metadata.create_all
+
+Databases created before migrations existed are stamped at this revision by init_db.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # documents and document_versions reference each other. SQLite doesn't check that a
+    # foreign key target exists yet, but can't add the constraint afterwards; Postgres is
+    # the other way around.
+    inline_cycle = op.get_bind().dialect.name == "sqlite"
+
+    op.create_table(
+        "roles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_roles_name", "roles", ["name"], unique=True)
+
+    op.create_table(
+        "departments",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_departments_name", "departments", ["name"], unique=True)
+
+    op.create_table(
+        "tags",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tags_name", "tags", ["name"], unique=True)
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("department_id", sa.Integer(), nullable=False),
+        sa.Column("role_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["department_id"], ["departments.id"]),
+        sa.ForeignKeyConstraint(["role_id"], ["roles.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "documents",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("access_level", sa.String(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("uploader_id", sa.String(), nullable=False),
+        sa.Column("current_version_id", sa.String(), nullable=True),
+        sa.Column("created_at", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["uploader_id"], ["users.id"]),
+        *([sa.ForeignKeyConstraint(["current_version_id"], ["document_versions.id"])] if inline_cycle else []),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_documents_id", "documents", ["id"])
+
+    op.create_table(
+        "document_versions",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("version_number", sa.Integer(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("uploaded_by", sa.String(), nullable=False),
+        sa.Column("uploaded_at", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["document_id"], ["documents.id"]),
+        sa.ForeignKeyConstraint(["uploaded_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_document_versions_id", "document_versions", ["id"])
+    if not inline_cycle:
+        op.create_foreign_key(
+            "documents_current_version_id_fkey", "documents", "document_versions",
+            ["current_version_id"], ["id"],
+        )
+
+    op.create_table(
+        "document_department_permissions",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("department_id", sa.Integer(), nullable=False),
+        sa.Column("permission", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["document_id"], ["documents.id"]),
+        sa.ForeignKeyConstraint(["department_id"], ["departments.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_document_department_permissions_id", "document_department_permissions", ["id"])
+
+    op.create_table(
+        "document_user_permissions",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("permission", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["document_id"], ["documents.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_document_user_permissions_id", "document_user_permissions", ["id"])
+
+    op.create_table(
+        "document_tags",
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["document_id"], ["documents.id"]),
+        sa.ForeignKeyConstraint(["tag_id"], ["tags.id"]),
+        sa.PrimaryKeyConstraint("document_id", "tag_id"),
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint("documents_current_version_id_fkey", "documents", type_="foreignkey")
+    for table in (
+        "document_tags",
+        "document_user_permissions",
+        "document_department_permissions",
+        "document_versions",
+        "documents",
+        "users",
+        "tags",
+        "departments",
+        "roles",
+    ):
+        op.drop_table(table)
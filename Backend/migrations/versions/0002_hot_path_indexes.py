@@ -0,0 +1,69 @@
+"""Indexes for the hot lookup paths and unique (document_id, version_number)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    _renumber_duplicate_versions()
+
+    op.create_index(
+        "uq_document_versions_document_id_version_number",
+        "document_versions", ["document_id", "version_number"], unique=True,
+    )
+    op.create_index("ix_document_versions_file_path", "document_versions", ["file_path"])
+    op.create_index("ix_documents_file_path", "documents", ["file_path"])
+    op.create_index("ix_documents_created_at_id", "documents", ["created_at", "id"])
+    op.create_index("ix_documents_uploader_id_created_at", "documents", ["uploader_id", "created_at"])
+    op.create_index(
+        "ix_document_user_permissions_document_id_user_id",
+        "document_user_permissions", ["document_id", "user_id"],
+    )
+    op.create_index(
+        "ix_document_department_permissions_document_id_department_id",
+        "document_department_permissions", ["document_id", "department_id"],
+    )
+    op.create_index("ix_document_tags_tag_id", "document_tags", ["tag_id"])
+
+
+def downgrade():
+    op.drop_index("ix_document_tags_tag_id", "document_tags")
+    op.drop_index("ix_document_department_permissions_document_id_department_id", "document_department_permissions")
+    op.drop_index("ix_document_user_permissions_document_id_user_id", "document_user_permissions")
+    op.drop_index("ix_documents_uploader_id_created_at", "documents")
+    op.drop_index("ix_documents_created_at_id", "documents")
+    op.drop_index("ix_documents_file_path", "documents")
+    op.drop_index("ix_document_versions_file_path", "document_versions")
+    op.drop_index("uq_document_versions_document_id_version_number", "document_versions")
+
+
+def _renumber_duplicate_versions():
+    """Concurrent uploads could previously get the same version number; renumber those documents."""
+    bind = op.get_bind()
+    duplicated = bind.execute(sa.text(
+        "SELECT DISTINCT document_id FROM document_versions "
+        "GROUP BY document_id, version_number HAVING COUNT(*) > 1"
+    )).scalars().all()
+    for document_id in duplicated:
+        version_ids = bind.execute(
+            sa.text(
+                "SELECT id FROM document_versions WHERE document_id = :document_id "
+                "ORDER BY version_number, uploaded_at, id"
+            ),
+            {"document_id": document_id},
+        ).scalars().all()
+        for number, version_id in enumerate(version_ids, start=1):
+            bind.execute(
+                sa.text("UPDATE document_versions SET version_number = :number WHERE id = :id"),
+                {"number": number, "id": version_id},
+            )
@@ -0,0 +1,46 @@
+"""Materialized document visibility (document_id, principal)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Same rows as app.utils.visibility_index.visibility_rows()
+BACKFILL = """
+INSERT INTO document_visibility (document_id, principal)
+SELECT id, 'public' FROM documents WHERE access_level = 'public'
+UNION
+SELECT d.id, 'department:' || CAST(u.department_id AS VARCHAR)
+FROM documents d JOIN users u ON u.id = d.uploader_id WHERE d.access_level = 'department'
+UNION
+SELECT d.id, 'department:' || CAST(p.department_id AS VARCHAR)
+FROM documents d JOIN document_department_permissions p ON p.document_id = d.id WHERE d.access_level = 'department'
+UNION
+SELECT id, 'user:' || uploader_id FROM documents WHERE access_level = 'private'
+UNION
+SELECT d.id, 'user:' || p.user_id
+FROM documents d JOIN document_user_permissions p ON p.document_id = d.id WHERE d.access_level = 'private'
+"""
+
+
+def upgrade():
+    op.create_table(
+        "document_visibility",
+        sa.Column("document_id", sa.String(), sa.ForeignKey("documents.id"), primary_key=True),
+        sa.Column("principal", sa.String(), primary_key=True),
+    )
+    op.create_index("ix_document_visibility_principal_document_id", "document_visibility", ["principal", "document_id"])
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    op.drop_index("ix_document_visibility_principal_document_id", "document_visibility")
+    op.drop_table("document_visibility")
@@ -0,0 +1,30 @@
+"""documents.updated_at for incremental export
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("documents", sa.Column("updated_at", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE documents SET updated_at = COALESCE("
+        "(SELECT MAX(uploaded_at) FROM document_versions WHERE document_versions.document_id = documents.id), "
+        "created_at)"
+    )
+    op.create_index("ix_documents_updated_at_id", "documents", ["updated_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_documents_updated_at_id", "documents")
+    with op.batch_alter_table("documents") as batch:
+        batch.drop_column("updated_at")
@@ -0,0 +1,32 @@
+"""Append-only document change log
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "document_changes",
+        sa.Column("seq", sa.Integer(), primary_key=True),
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("changed_at", sa.String(), nullable=False),
+        sa.Column("changed_by", sa.String(), nullable=True),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_document_changes_document_id", "document_changes", ["document_id"])
+
+
+def downgrade():
+    op.drop_index("ix_document_changes_document_id", "document_changes")
+    op.drop_table("document_changes")
@@ -0,0 +1,42 @@
+"""Durable background job table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("payload", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_after", sa.String(), nullable=False),
+        sa.Column("document_id", sa.String(), nullable=True),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_at", sa.String(), nullable=True),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.String(), nullable=False),
+        sa.Column("finished_at", sa.String(), nullable=True),
+    )
+    op.create_index("ix_jobs_status_priority_run_after", "jobs", ["status", "priority", "run_after"])
+    op.create_index("ix_jobs_document_id", "jobs", ["document_id"])
+
+
+def downgrade():
+    op.drop_index("ix_jobs_document_id", "jobs")
+    op.drop_index("ix_jobs_status_priority_run_after", "jobs")
+    op.drop_table("jobs")
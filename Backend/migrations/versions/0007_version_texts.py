@@ -0,0 +1,39 @@
+"""Extracted text bookkeeping per document version
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+The text itself goes into the version_text_fts full-text table, which (like documents_fts)
+is created outside migrations by app.utils.search_index.create_search_index.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "version_texts",
+        sa.Column("version_id", sa.String(), sa.ForeignKey("document_versions.id"), primary_key=True),
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("extractor", sa.String(), nullable=False),
+        sa.Column("page_offsets", sa.String(), nullable=False),
+        sa.Column("characters", sa.Integer(), nullable=False),
+        sa.Column("truncated", sa.Boolean(), nullable=False),
+        sa.Column("extracted_at", sa.String(), nullable=False),
+    )
+    op.create_index("ix_version_texts_document_id", "version_texts", ["document_id"])
+    op.create_index("ix_version_texts_file_path", "version_texts", ["file_path"])
+
+
+def downgrade():
+    op.drop_index("ix_version_texts_file_path", "version_texts")
+    op.drop_index("ix_version_texts_document_id", "version_texts")
+    op.drop_table("version_texts")
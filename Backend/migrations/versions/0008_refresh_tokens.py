@@ -0,0 +1,38 @@
+"""Refresh tokens
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("token_hash", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("family_id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.String(), nullable=False),
+        sa.Column("replaced_by", sa.String(), nullable=True),
+        sa.Column("revoked_at", sa.String(), nullable=True),
+    )
+    op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True)
+    op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"])
+    op.create_index("ix_refresh_tokens_family_id", "refresh_tokens", ["family_id"])
+
+
+def downgrade():
+    op.drop_index("ix_refresh_tokens_family_id", "refresh_tokens")
+    op.drop_index("ix_refresh_tokens_user_id", "refresh_tokens")
+    op.drop_index("ix_refresh_tokens_token_hash", "refresh_tokens")
+    op.drop_table("refresh_tokens")
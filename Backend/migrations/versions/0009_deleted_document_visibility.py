@@ -0,0 +1,27 @@
+"""Visibility of deleted documents
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Deletions logged before this revision have no rows, so only admins see them in GET /changes
+    op.create_table(
+        "deleted_document_visibility",
+        sa.Column("document_id", sa.String(), primary_key=True),
+        sa.Column("principal", sa.String(), primary_key=True),
+    )
+
+
+def downgrade():
+    op.drop_table("deleted_document_visibility")
@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+# Settings are read when app modules are imported: point the app at a scratch database and
+# storage directory first, so the tests never touch DATABASE_URL or the real uploads.
+# TEST_DATABASE_URL runs the tests on the app's engine against another (empty) database, e.g. Postgres
+_scratch = tempfile.mkdtemp(prefix="dms-tests-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ["STORAGE_ROOT"] = _scratch
+os.environ["SLOW_QUERY_MS"] = "0"
+os.environ["PROFILING_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+
+from tests.helpers import create_scratch_engine  # noqa: E402
+
+
+@pytest.fixture
+def scratch_engine(tmp_path):
+    """A new SQLite database with every table (and the full-text index), dropped after the test."""
+    engine = create_scratch_engine(tmp_path / "scratch.db")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def migrated_engine():
+    """The app's engine, on the test database, with all migrations applied."""
+    from app.db.session import engine, init_db
+
+    init_db()
+    return engine
@@ -0,0 +1,48 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, create_engine
+
+from app.utils.search_index import create_search_index
+
+
+def create_scratch_engine(path):
+    """Engine on a new SQLite file with every table and the full-text index (not migrated)."""
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    create_search_index(engine)
+    return engine
+
+
+class QueryCount:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(bind):
+    """Record every SQL statement executed on `bind` inside the block."""
+    counter = QueryCount()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        yield counter
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+
+
+@contextmanager
+def assert_max_queries(limit: int, bind):
+    """Fail if the block runs more than `limit` statements (catches N+1 regressions)."""
+    with count_queries(bind) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(f"{counter.count} queries, expected at most {limit}:\n{listing}")
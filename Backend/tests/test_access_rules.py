@@ -0,0 +1,79 @@
+"""
+The SQL visibility predicate must agree with the Python access rules.
+
+Each seed fills a scratch database with random departments, users (some admins, under
+differently cased role names), documents of every access level and user/department grants.
+Then, for every user, the documents `can_access_document` allows are compared with those
+`visible_documents_clause` selects: evaluating the rules and with MATERIALIZED_ACL, for the
+`User` row and for the principal built from its token claims.
+"""
+import random
+import uuid
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import Department, Document, DocumentDepartmentPermission, DocumentUserPermission, Role, User
+from app.utils.access_control import can_access_document, visible_documents_clause
+from app.utils.jwt_handler import principal_from_claims, user_claims
+from app.utils.visibility_index import rebuild_visibility
+
+ACCESS_LEVELS = ["public", "department", "private"]
+SEEDS = range(20)
+USERS = 15
+DOCUMENTS = 200
+
+
+def seed(session: Session, rnd: random.Random, users: int, documents: int):
+    """Random departments, users, documents and grants."""
+    session.add_all([Role(id=1, name=rnd.choice(["admin", "Admin", "ADMIN"])), Role(id=2, name="user")])
+    departments = rnd.randint(1, 6)
+    session.add_all([Department(id=d, name=f"department {d}") for d in range(1, departments + 1)])
+    people = [
+        User(
+            id=str(uuid.UUID(int=rnd.getrandbits(128))),
+            email=f"user{i}@example.com",
+            full_name=f"User {i}",
+            hashed_password="-",
+            department_id=rnd.randint(1, departments),
+            role_id=1 if rnd.random() < 0.1 else 2,
+        )
+        for i in range(users)
+    ]
+    docs = [
+        Document(
+            id=str(uuid.UUID(int=rnd.getrandbits(128))),
+            title=f"document {i}",
+            access_level=rnd.choice(ACCESS_LEVELS),
+            file_path=f"Documents/{i}.pdf",
+            uploader_id=rnd.choice(people).id,
+        )
+        for i in range(documents)
+    ]
+    session.add_all(people + docs)
+    session.flush()
+    user_grants = {(rnd.choice(docs).id, rnd.choice(people).id) for _ in range(documents // 2)}
+    department_grants = {(rnd.choice(docs).id, rnd.randint(1, departments)) for _ in range(documents // 2)}
+    session.add_all([DocumentUserPermission(document_id=d, user_id=u) for d, u in user_grants])
+    session.add_all([DocumentDepartmentPermission(document_id=d, department_id=p) for d, p in department_grants])
+    rebuild_visibility(session)
+    session.commit()
+
+
+@pytest.mark.parametrize("seed_value", SEEDS)
+def test_visibility_clause_matches_rules(seed_value, scratch_engine, monkeypatch):
+    mismatches = []
+    with Session(scratch_engine) as session:
+        seed(session, random.Random(seed_value), USERS, DOCUMENTS)
+        docs = session.exec(select(Document)).all()
+        for user in session.exec(select(User)).all():
+            expected = {doc.id for doc in docs if can_access_document(user, doc, session)}
+            for principal_kind, principal in (("user", user), ("claims", principal_from_claims(user_claims(user)))):
+                for mode in ("rules", "materialized"):
+                    monkeypatch.setattr(settings, "MATERIALIZED_ACL", mode == "materialized")
+                    actual = set(session.exec(select(Document.id).where(visible_documents_clause(principal))).all())
+                    if actual != expected:
+                        mismatches.append(f"{user.email} ({user.role.name}, {principal_kind}, {mode}): "
+                                          f"{len(actual - expected)} extra, {len(expected - actual)} missing")
+    assert not mismatches, "\n".join(mismatches)
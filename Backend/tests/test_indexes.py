@@ -0,0 +1,70 @@
+"""
+EXPLAIN the hot queries on the migrated schema and fail if any of them scans a table instead of
+using an index. Supports SQLite and Postgres (TEST_DATABASE_URL).
+"""
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session, select, func
+
+from app.models import Document, DocumentVersion, User
+from app.utils.access_control import accessible_documents
+from app.utils.pagination import paginate
+from app.utils.visibility_index import materialized_visibility_clause
+
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def hot_queries():
+    """(name, statement, tables that must be read through an index)."""
+    user = User(id=SAMPLE_ID, email="", full_name="", hashed_password="", department_id=1, role_id=2)
+    versions = select(DocumentVersion).where(DocumentVersion.document_id == SAMPLE_ID)
+    return [
+        ("list_versions", versions.order_by(DocumentVersion.version_number), ["document_versions"]),
+        ("last version number", versions.order_by(DocumentVersion.version_number.desc()).limit(1), ["document_versions"]),
+        ("version by number", versions.where(DocumentVersion.version_number == 1), ["document_versions"]),
+        ("get_document_by_path", select(Document).where(Document.file_path == "Documents/x.pdf"), ["documents"]),
+        ("blob references (versions)", select(func.count(DocumentVersion.id)).where(DocumentVersion.file_path == "x"), ["document_versions"]),
+        ("list_my_documents", paginate(select(Document).where(Document.uploader_id == SAMPLE_ID), 20), ["documents"]),
+        ("list_documents page", paginate(select(Document), 20), ["documents"]),
+        (
+            "access check",
+            accessible_documents(user).where(Document.id == SAMPLE_ID),
+            ["documents", "users", "document_user_permissions", "document_department_permissions"],
+        ),
+        (
+            "access check (MATERIALIZED_ACL)",
+            select(Document).where(materialized_visibility_clause(user), Document.id == SAMPLE_ID),
+            ["documents", "document_visibility"],
+        ),
+    ]
+
+
+def _plan(session: Session, statement) -> list[str]:
+    dialect = session.get_bind().dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        return [row[-1] for row in session.exec(text(f"EXPLAIN QUERY PLAN {sql}")).all()]
+    session.exec(text("SET LOCAL enable_seqscan = off"))  # tiny tables: make the planner show its index choice
+    return [row[0] for row in session.exec(text(f"EXPLAIN {sql}")).all()]
+
+
+def _scanned_tables(dialect_name: str, plan: list[str], tables: list[str]) -> list[str]:
+    scanned = []
+    for table in tables:
+        if dialect_name == "sqlite":
+            # "SEARCH t USING INDEX ..." / "SCAN t USING INDEX ..." are fine, a bare "SCAN t" is not
+            bad = any(line.split()[:2] == ["SCAN", table] and "INDEX" not in line for line in plan)
+        else:
+            bad = any(f"Seq Scan on {table}" in line for line in plan)
+        if bad:
+            scanned.append(table)
+    return scanned
+
+
+@pytest.mark.parametrize("name, statement, tables", hot_queries(), ids=[name for name, *_ in hot_queries()])
+def test_hot_query_uses_indexes(name, statement, tables, migrated_engine):
+    with Session(migrated_engine) as session:
+        plan = _plan(session, statement)
+        session.rollback()
+    scanned = _scanned_tables(migrated_engine.dialect.name, plan, tables)
+    assert not scanned, f"full scan of {', '.join(scanned)}:\n" + "\n".join(f"  {line}" for line in plan)
@@ -0,0 +1,121 @@
+"""
+Query budgets for the document read endpoints, so N+1 regressions fail the tests.
+
+Each endpoint is called with a session on a database holding a few documents and on one holding
+many, and the response is built like FastAPI would. Its query count must not grow with the
+number of documents nor exceed its budget.
+"""
+import uuid
+
+import pytest
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, select
+
+from app.core.events import emit, DOCUMENTS_CHANGED
+from app.models import Department, Role, User
+from app.routers import documents, tags
+from app.utils.bulk_ingest import ensure_tags, insert_documents
+from app.utils.response_cache import InMemoryRedis, configure_response_cache
+from app.utils.text_extraction import ExtractedText, store_version_texts
+from app.utils.timestamps import utc_now
+from tests.helpers import assert_max_queries, count_queries, create_scratch_engine
+
+# endpoint -> maximum number of statements per request
+BUDGETS = {
+    "GET /documents/": 2,  # page (uploader joined) + tags
+    "GET /documents/my": 2,
+    "GET /documents/search": 3,  # page + tags + total
+    "GET /documents/search?field=content": 4,  # page + tags + total + snippets
+    "GET /documents/{id}": 3,  # document (uploader, department joined) + tags + versions
+    "GET /documents/{id}/versions": 2,
+    "GET /tags/document/{id}": 2,
+}
+
+CALLS = {
+    "GET /documents/": lambda s, u, doc_id: documents.list_documents(None, 0, None, False, s, u),
+    "GET /documents/my": lambda s, u, doc_id: documents.list_my_documents(None, 0, None, False, s, u),
+    "GET /documents/search": lambda s, u, doc_id: documents.search_documents("report", "title", 1, 50, None, True, s, u),
+    "GET /documents/search?field=content": (
+        lambda s, u, doc_id: documents.search_documents("report", "content", 1, 50, None, True, s, u)
+    ),
+    "GET /documents/{id}": lambda s, u, doc_id: documents.get_document(doc_id, s, u),
+    "GET /documents/{id}/versions": lambda s, u, doc_id: documents.list_versions(doc_id, s, u),
+    "GET /tags/document/{id}": lambda s, u, doc_id: tags.get_document_tags(doc_id, s),
+}
+
+
+class Seeded:
+    def __init__(self, engine, user_id: str, doc_id: str):
+        self.engine = engine
+        self.user_id = user_id
+        self.doc_id = doc_id
+
+
+def seed(engine, count: int) -> Seeded:
+    """`count` public documents with 2 versions and 3 tags each, uploaded by one user."""
+    with Session(engine) as session:
+        session.add(Role(id=1, name="user"))
+        session.add(Department(id=1, name="check"))
+        user = User(email="check@example.com", full_name="Check", hashed_password="-", department_id=1, role_id=1)
+        session.add(user)
+        session.commit()
+
+        tag_ids = ensure_tags(session, {"alpha", "beta", "gamma"})
+        now = utc_now()
+        docs, versions, links = [], [], []
+        for i in range(count):
+            doc_id = str(uuid.uuid4())
+            docs.append(dict(id=doc_id, title=f"report {i}", description="", access_level="public",
+                             file_path="Documents/check.pdf", uploader_id=user.id, created_at=now))
+            versions.extend(dict(id=str(uuid.uuid4()), document_id=doc_id, version_number=n,
+                                 file_path="Documents/check.pdf", uploaded_by=user.id, uploaded_at=now)
+                            for n in (1, 2))
+            links.extend(dict(document_id=doc_id, tag_id=tag_id) for tag_id in tag_ids.values())
+        insert_documents(session, docs, versions, links)
+        store_version_texts(session, [(ver, ExtractedText("pdf", ["report body"])) for ver in versions])
+        session.commit()
+        return Seeded(engine, user.id, docs[0]["id"])
+
+
+@pytest.fixture(scope="module", autouse=True)
+def no_response_cache():
+    configure_response_cache(InMemoryRedis(), ttl=0)  # measure the queries, not the response cache
+
+
+@pytest.fixture(scope="module")
+def few(tmp_path_factory):
+    engine = create_scratch_engine(tmp_path_factory.mktemp("few") / "few.db")
+    yield seed(engine, 3)
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def many(tmp_path_factory):
+    engine = create_scratch_engine(tmp_path_factory.mktemp("many") / "many.db")
+    yield seed(engine, 40)
+    engine.dispose()
+
+
+def call(seeded: Seeded, endpoint: str, budget=None) -> int:
+    """Queries the endpoint runs; with `budget`, fails if it runs more."""
+    emit(DOCUMENTS_CHANGED, document_ids=[])  # memoized totals belong to the other database
+    with Session(seeded.engine) as session:
+        # The principal is loaded by get_current_user (and usually cached) before the route runs
+        user = session.exec(
+            select(User).options(joinedload(User.role), joinedload(User.department)).where(User.id == seeded.user_id)
+        ).one()
+        counting = count_queries(seeded.engine) if budget is None else assert_max_queries(budget, seeded.engine)
+        with counting as counter:
+            result = CALLS[endpoint](session, user, seeded.doc_id)
+            if not isinstance(result, Response):  # cached listings come back already encoded
+                jsonable_encoder(result)
+    return counter.count
+
+
+@pytest.mark.parametrize("endpoint", BUDGETS)
+def test_query_budget(endpoint, few, many):
+    small = call(few, endpoint)
+    large = call(many, endpoint, BUDGETS[endpoint])
+    assert large == small, f"{small} queries for 3 documents, {large} for 40"
@@ -14,6 +14,7 @@ import {
   PowerIcon,
 } from '@heroicons/react/24/solid';
 import { IoMdPerson } from 'react-icons/io';
+import api, { clearTokens } from '../services/api';
 
 const profileMenuItems = [
   {
@@ -43,8 +44,12 @@ export function ProfileMenu() {
     if (path) {
       navigate(path);
     } else if (label === 'Sign Out') {
-      // Remove token from localStorage
-      localStorage.removeItem('token');
+      // Revoke the refresh token (best effort) and remove both tokens from localStorage
+      const refreshToken = localStorage.getItem('refresh_token');
+      if (refreshToken) {
+        api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {});
+      }
+      clearTokens();
       // Redirect to login page
       navigate('/login');
     }
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { withTokenRefresh } from '../services/api';
 import {
   Card,
   CardBody,
@@ -50,6 +51,13 @@ interface TagItem {
   name: string;
 }
 
+interface DocumentDetailItem extends DocumentItem {
+  uploader?: { id: string; full_name: string; email: string; department_name?: string | null } | null;
+  tags: TagItem[];
+  current_version?: VersionItem | null;
+  versions: VersionItem[];
+}
+
 export default function DocumentDetail() {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
@@ -73,15 +81,17 @@ export default function DocumentDetail() {
   const [uploadLoading, setUploadLoading] = useState(false);
 
   // axios instance with authentication
-  const axiosAuth = axios.create({
-    baseURL: 'http://127.0.0.1:8000',
-    headers: {
-      Authorization: `Bearer ${localStorage.getItem('token') || ''}`,
-      Accept: 'application/json',
-    },
-  });
+  const axiosAuth = withTokenRefresh(
+    axios.create({
+      baseURL: 'http://127.0.0.1:8000',
+      headers: {
+        Authorization: `Bearer ${localStorage.getItem('token') || ''}`,
+        Accept: 'application/json',
+      },
+    })
+  );
 
-  // Fetch document + versions + tags
+  // Fetch document (with versions + tags)
   useEffect(() => {
     if (!id) return;
     setLoading(true);
@@ -89,18 +99,14 @@ export default function DocumentDetail() {
 
     async function fetchData() {
       try {
-        const [docRes, versionsRes, tagsRes] = await Promise.all([
-          axiosAuth.get<DocumentItem>(`/documents/${id}`),
-          axiosAuth.get<VersionItem[]>(`/documents/${id}/versions`),
-          axiosAuth.get<TagItem[]>(`/tags/document/${id}`),
-        ]);
+        const docRes = await axiosAuth.get<DocumentDetailItem>(`/documents/${id}`);
         setDoc(docRes.data);
 
-        const vers = versionsRes.data || [];
+        const vers = docRes.data.versions || [];
         vers.sort((a, b) => a.version_number - b.version_number);
         setVersions(vers);
 
-        setTags(tagsRes.data || []);
+        setTags(docRes.data.tags || []);
 
         if (vers.length > 0) {
           const last = vers[vers.length - 1];
@@ -1,6 +1,7 @@
 // src/pages/Documents.tsx
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
+import { withTokenRefresh } from '../services/api';
 import {
   Card,
   CardBody,
@@ -22,6 +23,9 @@ interface DocumentItem {
   original_filename?: string;
 }
 
+// File types the server renders thumbnails for
+const PREVIEWABLE = /\.(pdf|jpg|jpeg|png|gif|bmp|webp|tif|tiff)$/i;
+
 export default function Documents() {
   const [documents, setDocuments] = useState<DocumentItem[]>([]);
   const [loading, setLoading] = useState(true);
@@ -31,12 +35,14 @@ export default function Documents() {
   >({});
   const navigate = useNavigate();
 
-  const axiosAuth = axios.create({
-    baseURL: 'http://127.0.0.1:8000',
-    headers: {
-      Authorization: `Bearer ${localStorage.getItem('token') || ''}`,
-    },
-  });
+  const axiosAuth = withTokenRefresh(
+    axios.create({
+      baseURL: 'http://127.0.0.1:8000',
+      headers: {
+        Authorization: `Bearer ${localStorage.getItem('token') || ''}`,
+      },
+    })
+  );
 
   // Fetch documents
   useEffect(() => {
@@ -56,14 +62,16 @@ export default function Documents() {
     fetchDocs();
   }, []);
 
-  // Fetch previews as blob URLs
+  // Fetch thumbnails as blob URLs (small JPEGs rendered by the server, not the original files)
   useEffect(() => {
     async function fetchPreviews() {
       for (const doc of documents) {
+        if (!doc.current_version_id || !PREVIEWABLE.test(doc.file_path)) continue;
         try {
-          const res = await axiosAuth.get(`/documents/file/${doc.id}`, {
-            responseType: 'blob',
-          });
+          const res = await axiosAuth.get(
+            `/documents/versions/${doc.current_version_id}/thumbnail`,
+            { params: { size: 256 }, responseType: 'blob' }
+          );
           const blobUrl = URL.createObjectURL(res.data);
           setPreviewUrls((prev) => ({ ...prev, [doc.id]: blobUrl }));
         } catch (err) {
@@ -89,52 +97,41 @@ export default function Documents() {
       );
     }
 
-    const blobUrl = previewUrls[doc.id];
-    if (!blobUrl) {
+    // Other file types
+    if (!PREVIEWABLE.test(doc.file_path)) {
       return (
-        <div className='w-full h-full flex items-center justify-center'>
+        <div className='w-full h-full flex items-center justify-center rounded-md'>
           <Typography
             variant='small'
             className='text-gray-600 dark:text-gray-300'
           >
-            Loading preview...
+            No preview
           </Typography>
         </div>
       );
     }
 
-    // Images
-    if (/\.(jpg|jpeg|png|gif|bmp|webp)$/i.test(doc.file_path)) {
-      return (
-        <img
-          src={blobUrl}
-          alt={doc.title || 'preview'}
-          className='w-full h-full object-cover rounded-md'
-        />
-      );
-    }
-
-    // PDFs (use iframe for blob)
-    if (/\.pdf$/i.test(doc.file_path)) {
+    const blobUrl = previewUrls[doc.id];
+    if (!blobUrl) {
       return (
-        <iframe
-          src={blobUrl}
-          title={doc.title}
-          className='w-full h-full rounded-md'
-        />
+        <div className='w-full h-full flex items-center justify-center'>
+          <Typography
+            variant='small'
+            className='text-gray-600 dark:text-gray-300'
+          >
+            Loading preview...
+          </Typography>
+        </div>
       );
     }
 
-    // Other file types
+    // Images and PDFs (first page)
     return (
-      <div className='w-full h-full flex items-center justify-center rounded-md'>
-        <Typography
-          variant='small'
-          className='text-gray-600 dark:text-gray-300'
-        >
-          No preview
-        </Typography>
-      </div>
+      <img
+        src={blobUrl}
+        alt={doc.title || 'preview'}
+        className='w-full h-full object-cover rounded-md'
+      />
     );
   };
 
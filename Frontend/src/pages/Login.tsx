@@ -9,7 +9,7 @@ import {
 } from '@material-tailwind/react';
 import { Link, useNavigate } from 'react-router-dom';
 import siemens_logo from '../assets/siemens-logo.svg';
-import api from '../services/api'; // Axios instance with baseURL
+import api, { saveTokens } from '../services/api'; // Axios instance with baseURL
 
 export default function Login() {
   const [email, setEmail] = useState('');
@@ -33,7 +33,7 @@ export default function Login() {
       });
       console.log(res);
 
-      localStorage.setItem('token', res.data.access_token);
+      saveTokens(res.data);
       navigate('/');
     } catch (err: unknown) {
       setError('Invalid email or password');
@@ -11,6 +11,7 @@ import {
 } from '@material-tailwind/react';
 import { Link, useNavigate } from 'react-router-dom';
 import siemens_logo from '../assets/siemens-logo.svg';
+import { saveTokens } from '../services/api';
 
 export default function Register() {
   const [departments, setDepartments] = useState<
@@ -80,7 +81,7 @@ export default function Register() {
       }
 
       const data = await response.json();
-      localStorage.setItem('token', data.access_token);
+      saveTokens(data);
       navigate('/');
     } catch (error) {
       console.error('Error registering:', error);
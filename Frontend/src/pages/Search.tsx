@@ -12,6 +12,7 @@ import {
 } from '@material-tailwind/react';
 import { IoSearch, IoDownloadOutline } from 'react-icons/io5';
 import axios from 'axios';
+import { withTokenRefresh } from '../services/api';
 import { useNavigate } from 'react-router-dom';
 import { FaRegFolderOpen } from 'react-icons/fa6';
 
@@ -48,10 +49,12 @@ export default function Search() {
   const navigate = useNavigate();
   const token = localStorage.getItem('token');
 
-  const axiosAuth = axios.create({
-    baseURL: 'http://127.0.0.1:8000',
-    headers: { Authorization: `Bearer ${token || ''}` },
-  });
+  const axiosAuth = withTokenRefresh(
+    axios.create({
+      baseURL: 'http://127.0.0.1:8000',
+      headers: { Authorization: `Bearer ${token || ''}` },
+    })
+  );
 
   const fetchResults = async () => {
     if (!query) return;
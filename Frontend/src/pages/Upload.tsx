@@ -13,6 +13,7 @@ import {
   Chip,
 } from '@material-tailwind/react';
 import axios from 'axios';
+import { withTokenRefresh } from '../services/api';
 import { useNavigate } from 'react-router-dom';
 
 export default function Upload() {
@@ -30,13 +31,15 @@ export default function Upload() {
   const token = localStorage.getItem('token');
   const navigate = useNavigate();
 
-  const axiosAuth = axios.create({
-    baseURL: 'http://127.0.0.1:8000',
-    headers: {
-      Authorization: `Bearer ${token || ''}`,
-      Accept: 'application/json',
-    },
-  });
+  const axiosAuth = withTokenRefresh(
+    axios.create({
+      baseURL: 'http://127.0.0.1:8000',
+      headers: {
+        Authorization: `Bearer ${token || ''}`,
+        Accept: 'application/json',
+      },
+    })
+  );
 
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     if (e.target.files && e.target.files.length > 0) {
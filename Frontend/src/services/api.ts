@@ -1,18 +1,78 @@
-import axios from 'axios';
+import axios, { AxiosError, AxiosInstance, InternalAxiosRequestConfig } from 'axios';
 
 const API_URL = 'http://127.0.0.1:8000';
 
-const api = axios.create({
-  baseURL: API_URL,
-});
+interface Tokens {
+  access_token: string;
+  refresh_token?: string;
+}
 
-// Attach token automatically
-api.interceptors.request.use((config) => {
-  const token = localStorage.getItem('token');
-  if (token && config.headers) {
-    config.headers.Authorization = `Bearer ${token}`;
+export function saveTokens(tokens: Tokens) {
+  localStorage.setItem('token', tokens.access_token);
+  if (tokens.refresh_token) {
+    localStorage.setItem('refresh_token', tokens.refresh_token);
   }
-  return config;
-});
+}
+
+export function clearTokens() {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refresh_token');
+}
+
+// Access tokens only last a few minutes. A refresh token is good for one use (presenting it
+// twice revokes the whole login), so requests failing at the same time share one refresh.
+let refreshing: Promise<void> | null = null;
+
+function refreshTokens(): Promise<void> {
+  if (!refreshing) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshing = axios
+      .post(`${API_URL}/auth/refresh`, { refresh_token: refreshToken })
+      .then((res) => saveTokens(res.data))
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+}
+
+// Send the current access token, and on 401 refresh it and retry once
+export function withTokenRefresh(instance: AxiosInstance): AxiosInstance {
+  instance.interceptors.request.use((config) => {
+    const token = localStorage.getItem('token');
+    if (token && config.headers) {
+      config.headers.Authorization = `Bearer ${token}`;
+    }
+    return config;
+  });
+  instance.interceptors.response.use(undefined, async (error: AxiosError) => {
+    const config = error.config as (InternalAxiosRequestConfig & { _retried?: boolean }) | undefined;
+    if (
+      error.response?.status !== 401 ||
+      !config ||
+      config._retried ||
+      config.url?.startsWith('/auth/') ||
+      !localStorage.getItem('refresh_token')
+    ) {
+      return Promise.reject(error);
+    }
+    config._retried = true;
+    try {
+      await refreshTokens();
+    } catch {
+      clearTokens();
+      window.location.assign('/login');
+      return Promise.reject(error);
+    }
+    return instance(config);
+  });
+  return instance;
+}
+
+const api = withTokenRefresh(
+  axios.create({
+    baseURL: API_URL,
+  })
+);
 
 export default api;